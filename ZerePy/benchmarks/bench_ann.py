@@ -0,0 +1,100 @@
+"""
+Benchmark approximate skill-vector search against exact scoring.
+
+    python -m benchmarks.bench_ann --sizes 100000 1000000 --nprobe 1 4 8 16 --output ann.json
+
+For each size, recall@k of SkillVectorIndex.search_rows is measured against an
+exact cosine scan of every profile, next to the latency of that scan and of the
+filter-and-rank path behind filter_freelancers (MatchingIndex.rank). Requirements
+are soft: their required skills are passed as weighted wishes, not hard filters.
+"""
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.bench_matching import _latency, _metadata, _timed
+from benchmarks.synthetic import SCHEMAS, generate_profiles, generate_requirements
+
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_NPROBE = [1, 2, 4, 8, 16, 32]
+DEFAULT_QUERIES = 200
+DEFAULT_TOP_K = 10
+
+
+def _soft(requirement: Dict) -> Dict:
+    """Requirement with every skill as a weighted wish: required count fully, preferred half"""
+    weights = {skill: 0.5 for skill in requirement.get("preferred_skills", [])}
+    weights.update({skill: 1.0 for skill in requirement.get("required_skills", [])})
+    return {"skill_weights": weights, "top_k": requirement.get("top_k", DEFAULT_TOP_K)}
+
+
+def run_size(size: int, schema: str, nprobes: List[int], queries: int, top_k: int) -> Dict:
+    from src.recommendation.ann_index import SkillVectorIndex
+    from src.recommendation.matching_index import MatchingIndex
+
+    index = MatchingIndex(generate_profiles(size, schema))
+    start = time.perf_counter()
+    ann = SkillVectorIndex(index)
+    build_seconds = time.perf_counter() - start
+
+    requirements = generate_requirements(queries)
+    soft = [_soft(requirement) for requirement in requirements]
+    truth = [{row for row, _ in ann.exact_rows(requirement, top_k)} for requirement in soft]
+
+    result = {
+        "size": size,
+        "schema": schema,
+        "lists": len(ann.centroids),
+        "build_seconds": round(build_seconds, 4),
+        "exact_scan": _latency(_timed(lambda requirement: ann.exact_rows(requirement, top_k), soft)),
+        "filter_and_rank": _latency(_timed(index.rank, requirements)),
+        "ann": [],
+    }
+    for nprobe in nprobes:
+        found = [{row for row, _ in ann.search_rows(requirement, top_k, nprobe)} for requirement in soft]
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth) if t])
+        candidates = np.mean([len(ann.candidates(requirement, nprobe)) for requirement in soft])
+        latency = _latency(_timed(lambda requirement: ann.search_rows(requirement, top_k, nprobe), soft))
+        result["ann"].append({
+            "nprobe": nprobe,
+            f"recall_at_{top_k}": round(float(recall), 4),
+            "mean_candidates": round(float(candidates), 1),
+            **latency,
+        })
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Approximate skill-vector search benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--schema", choices=SCHEMAS, default="cv")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=DEFAULT_NPROBE)
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in args.sizes:
+        case = run_size(size, args.schema, args.nprobe, args.queries, args.top_k)
+        results.append(case)
+        print(f"{size:>8} profiles, {case['lists']} lists, built in {case['build_seconds']:.2f}s  "
+              f"exact scan p50 {case['exact_scan']['p50_ms']:.3f}ms  "
+              f"filter+rank p50 {case['filter_and_rank']['p50_ms']:.3f}ms", flush=True)
+        for row in case["ann"]:
+            print(f"{'':>8} nprobe {row['nprobe']:>3}  recall@{args.top_k} {row[f'recall_at_{args.top_k}']:.3f}  "
+                  f"candidates {row['mean_candidates']:>9.0f}  p50 {row['p50_ms']:.3f}ms p99 {row['p99_ms']:.3f}ms",
+                  flush=True)
+
+    report = {"metadata": _metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
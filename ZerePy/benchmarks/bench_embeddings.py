@@ -0,0 +1,91 @@
+"""
+Benchmark the int8 profile vector store against float32 brute-force search.
+
+    python -m benchmarks.bench_embeddings --sizes 100000 1000000 --dimensions 384 --output embeddings.json
+
+Profiles and jobs are embedded with the offline HashingEmbedder. For each size,
+recall@k of ProfileVectorStore.search is measured against an exact float32 scan
+of the same vectors, next to the bytes each representation takes and the latency
+of both scans.
+"""
+import argparse
+import json
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.bench_matching import _latency, _metadata, _timed
+from benchmarks.synthetic import SCHEMAS, generate_profiles, generate_requirements
+
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_DIMENSIONS = 256
+DEFAULT_QUERIES = 200
+DEFAULT_TOP_K = 10
+
+
+def run_size(size: int, schema: str, dimensions: int, queries: int, top_k: int) -> Dict:
+    from src.recommendation.embedding_store import (HashingEmbedder, ProfileVectorStore, embedding_text,
+                                                    requirement_text)
+    from src.recommendation.ranking import top_k_indices
+
+    embedder = HashingEmbedder(dimensions)
+    profiles = generate_profiles(size, schema)
+    start = time.perf_counter()
+    vectors = embedder.embed([embedding_text(profile) for profile in profiles])
+    embed_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ProfileVectorStore(directory, model=embedder.model)
+        start = time.perf_counter()
+        store.add([str(row) for row in range(size)], vectors)
+        add_seconds = time.perf_counter() - start
+
+        query_vectors = embedder.embed([requirement_text(requirement) for requirement in generate_requirements(queries)])
+        truth = [set(top_k_indices(vectors @ query, top_k).tolist()) for query in query_vectors]
+        found = [{int(key) for key, _ in store.search(query, top_k)} for query in query_vectors]
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth) if t])
+
+        result = {
+            "size": size,
+            "schema": schema,
+            "dimensions": dimensions,
+            "embed_seconds": round(embed_seconds, 4),
+            "add_seconds": round(add_seconds, 4),
+            "float32_bytes": int(vectors.nbytes),
+            "int8_bytes": store.nbytes,
+            "memory_ratio": round(store.nbytes / vectors.nbytes, 4),
+            "recall": round(float(recall), 4),
+            "float32_scan": _latency(_timed(lambda query: top_k_indices(vectors @ query, top_k), query_vectors)),
+            "int8_scan": _latency(_timed(lambda query: store.search(query, top_k), query_vectors)),
+        }
+    print(f"{size:>9} profiles  {result['int8_bytes'] / 1e6:.1f} MB int8 vs {result['float32_bytes'] / 1e6:.1f} MB "
+          f"float32  recall@{top_k} {result['recall']:.3f}  "
+          f"scan p50 {result['int8_scan']['p50_ms']:.2f}ms int8 / {result['float32_scan']['p50_ms']:.2f}ms float32",
+          flush=True)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="int8 profile vector store benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--schema", choices=SCHEMAS, default="cv")
+    parser.add_argument("--dimensions", type=int, default=DEFAULT_DIMENSIONS)
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = {
+        "metadata": _metadata(),
+        "results": [run_size(size, args.schema, args.dimensions, args.queries, args.top_k) for size in args.sizes],
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark cold import time of the agent's entry points.
+
+    python -m benchmarks.bench_import --repeat 5 --connections openai ollama --output import.json
+
+Every measurement runs in a fresh interpreter, so nothing is already imported or
+cached in sys.modules. Modules are timed on their own; each connection is timed
+as the import of the connection manager followed by loading that connection's
+class, which is what an agent naming only that connection pays at start-up.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+from benchmarks.bench_matching import _metadata
+
+DEFAULT_MODULES = ["src.connection_manager", "src.agent", "src.server.app", "main"]
+DEFAULT_CONNECTIONS = ["openai", "ollama"]
+DEFAULT_REPEAT = 5
+
+_CHILD = """
+import importlib, json, sys, time
+start = time.perf_counter()
+try:
+    module = importlib.import_module({module!r})
+    for name in {connections!r}:
+        module.ConnectionManager._class_name_to_type(name)
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+print(json.dumps({{"seconds": time.perf_counter() - start, "modules": len(sys.modules), "error": error}}))
+"""
+
+
+def _measure(module: str, connections: List[str], repeat: int) -> Dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _CHILD.format(module=module, connections=connections)],
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "median_seconds": round(statistics.median(seconds), 4),
+        "min_seconds": round(min(seconds), 4),
+        "modules_loaded": runs[-1]["modules"],
+        "error": runs[-1]["error"],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Cold import time benchmark")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--connections", nargs="*", default=DEFAULT_CONNECTIONS,
+                        help="Connections to time loading through the connection manager")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    cases = [(module, module, []) for module in args.modules]
+    cases += [(f"connection:{name}", "src.connection_manager", [name]) for name in args.connections]
+    results = []
+    for label, module, connections in cases:
+        result = {"target": label, **_measure(module, connections, args.repeat)}
+        results.append(result)
+        note = f"  ({result['error']})" if result["error"] else ""
+        print(f"{label:<28} median {result['median_seconds'] * 1000:8.1f}ms  "
+              f"{result['modules_loaded']:>5} modules{note}", flush=True)
+
+    report = {"metadata": _metadata(), "repeat": args.repeat, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
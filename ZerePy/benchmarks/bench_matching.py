@@ -0,0 +1,201 @@
+"""
+Benchmark the matching engine on synthetic profiles.
+
+    python -m benchmarks.bench_matching --sizes 1000 10000 100000 --output bench.json
+    python -m benchmarks.bench_matching --sizes 1000 --compare bench.json
+
+Every (size, schema) case runs in a fresh process so its peak RSS is its own.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic import SCHEMAS, generate_profiles, generate_requirements
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_QUERIES = 200
+# End-to-end runs stream and score every profile per job, so they use a capped profile set
+DEFAULT_END_TO_END_LIMIT = 20000
+DEFAULT_END_TO_END_JOBS = 5
+
+
+def _latency(samples: List[float]) -> Dict:
+    samples_ms = np.asarray(samples) * 1000
+    total = float(np.sum(samples))
+    return {
+        "count": len(samples),
+        "p50_ms": round(float(np.percentile(samples_ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(samples_ms, 99)), 4),
+        "mean_ms": round(float(samples_ms.mean()), 4),
+        "throughput_per_s": round(len(samples) / total, 2) if total else None,
+    }
+
+
+def _timed(function, inputs) -> List[float]:
+    samples = []
+    for value in inputs:
+        start = time.perf_counter()
+        function(value)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _offline_agent(profiles: Dict[str, Dict], cache_dir: str):
+    """FreelancerRecommendationAgent with IPFS and the chain replaced by in-memory stand-ins"""
+    from main import FreelancerRecommendationAgent
+    from src.recommendation.profile_cache import ProfileCache
+
+    class OfflineAgent(FreelancerRecommendationAgent):
+        def stream_profiles(self, ipfs_hashes: List[str]) -> AsyncIterator[Tuple[str, Dict]]:
+            async def stream():
+                for ipfs_hash in ipfs_hashes:
+                    yield ipfs_hash, profiles[ipfs_hash]
+            return stream()
+
+        def store_recommendations(self, job_id, recommended_freelancers, employer_address, private_key):
+            return "0x" + "00" * 32
+
+    return OfflineAgent("http://127.0.0.1:8545", "0x" + "00" * 20, [], profile_cache=ProfileCache(cache_dir))
+
+
+def run_case(size: int, schema: str, queries: int, end_to_end_limit: int, end_to_end_jobs: int) -> Dict:
+    """Benchmark one profile count and schema in the current process"""
+    from src.recommendation.matching_index import MatchingIndex
+
+    start = time.perf_counter()
+    profiles = generate_profiles(size, schema)
+    generate_seconds = time.perf_counter() - start
+    requirements = generate_requirements(queries)
+
+    start = time.perf_counter()
+    index = MatchingIndex(profiles)
+    ingest_seconds = time.perf_counter() - start
+
+    result = {
+        "size": size,
+        "schema": schema,
+        "generate_seconds": round(generate_seconds, 4),
+        "ingest": {
+            "seconds": round(ingest_seconds, 4),
+            "throughput_per_s": round(size / ingest_seconds, 2),
+        },
+        "filter": _latency(_timed(index.matching_rows, requirements)),
+        "rank": _latency(_timed(index.rank, requirements)),
+    }
+
+    if end_to_end_jobs:
+        subset = profiles[:end_to_end_limit]
+        by_hash = {f"Qm{row:044d}": profile for row, profile in enumerate(subset)}
+        with tempfile.TemporaryDirectory() as cache_dir:
+            agent = _offline_agent(by_hash, cache_dir)
+            hashes = list(by_hash)
+            jobs = requirements[:end_to_end_jobs]
+            samples = _timed(
+                lambda requirement: agent.recommend_freelancers("0x" + "01" * 32, requirement, hashes,
+                                                                "0x" + "00" * 20, "0x" + "11" * 32),
+                jobs,
+            )
+        result["end_to_end"] = {**_latency(samples), "profiles": len(subset)}
+
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _run_in_child(queue, arguments) -> None:
+    queue.put(run_case(*arguments))
+
+
+def _metadata() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+    }
+
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    """Human-readable changes of the headline numbers between two result files"""
+    metrics = [("ingest", "seconds"), ("filter", "p50_ms"), ("filter", "p99_ms"),
+               ("rank", "p50_ms"), ("rank", "p99_ms"), ("end_to_end", "p50_ms")]
+    baseline_cases = {(case["size"], case["schema"]): case for case in baseline["results"]}
+    lines = []
+    for case in current["results"]:
+        old = baseline_cases.get((case["size"], case["schema"]))
+        if old is None:
+            continue
+        for stage, metric in metrics:
+            if stage in case and stage in old and old[stage][metric]:
+                ratio = case[stage][metric] / old[stage][metric]
+                lines.append(f"{case['schema']:>6} {case['size']:>8} {stage}.{metric}: "
+                             f"{old[stage][metric]} -> {case[stage][metric]} ({ratio:.2f}x)")
+        lines.append(f"{case['schema']:>6} {case['size']:>8} peak_rss_mb: {old['peak_rss_mb']} -> {case['peak_rss_mb']}")
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Matching engine benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Profile counts to benchmark, e.g. 1000 10000 1000000")
+    parser.add_argument("--schemas", nargs="+", choices=SCHEMAS, default=list(SCHEMAS))
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES,
+                        help="Requirements timed for filter and rank")
+    parser.add_argument("--end-to-end-limit", type=int, default=DEFAULT_END_TO_END_LIMIT,
+                        help="Profiles streamed through recommend_freelancers")
+    parser.add_argument("--end-to-end-jobs", type=int, default=DEFAULT_END_TO_END_JOBS,
+                        help="Jobs timed end to end, 0 to skip")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Print changes against an earlier results file")
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for size in args.sizes:
+        for schema in args.schemas:
+            queue = context.Queue()
+            process = context.Process(target=_run_in_child, args=(
+                queue, (size, schema, args.queries, args.end_to_end_limit, args.end_to_end_jobs)))
+            process.start()
+            case = queue.get()
+            process.join()
+            results.append(case)
+            print(f"{schema:>6} {size:>8}  ingest {case['ingest']['seconds']:.3f}s  "
+                  f"filter p50 {case['filter']['p50_ms']:.3f}ms p99 {case['filter']['p99_ms']:.3f}ms  "
+                  f"rank p50 {case['rank']['p50_ms']:.3f}ms p99 {case['rank']['p99_ms']:.3f}ms  "
+                  f"rss {case['peak_rss_mb']}MB", flush=True)
+
+    report = {"metadata": _metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            print("\n".join(compare(report, json.load(f))))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark sharded matching against single-process ranking as workers are added.
+
+    python -m benchmarks.bench_sharding --size 1000000 --workers 1 2 4 8 --output sharding.json
+
+Speedups are relative to MatchingIndex.rank in the coordinator process. Worker
+counts above the number of cores are still run but cannot scale.
+"""
+import argparse
+import json
+import multiprocessing
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.bench_matching import _latency, _metadata, _timed
+from benchmarks.synthetic import SCHEMAS, generate_profiles, generate_requirements
+
+DEFAULT_SIZE = 200000
+DEFAULT_QUERIES = 100
+
+
+def _default_workers() -> List[int]:
+    counts = [1]
+    while counts[-1] * 2 <= multiprocessing.cpu_count():
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    from src.recommendation.matching_index import MatchingIndex
+    from src.recommendation.sharded_matching import ShardedMatcher
+
+    parser = argparse.ArgumentParser(description="Sharded matching scaling benchmark")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Profiles in the index")
+    parser.add_argument("--schema", choices=SCHEMAS, default="cv")
+    parser.add_argument("--workers", type=int, nargs="+", default=_default_workers(),
+                        help="Worker process counts to benchmark")
+    parser.add_argument("--shards-per-worker", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    requirements = generate_requirements(args.queries)
+    start = time.perf_counter()
+    index = MatchingIndex(generate_profiles(args.size, args.schema))
+    print(f"built index of {args.size} profiles in {time.perf_counter() - start:.2f}s", flush=True)
+
+    baseline = _latency(_timed(index.rank, requirements))
+    print(f"single process  rank p50 {baseline['p50_ms']:.3f}ms p99 {baseline['p99_ms']:.3f}ms", flush=True)
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for workers in args.workers:
+        with ShardedMatcher(index, workers=workers, shards=workers * args.shards_per_worker,
+                            mp_context=context) as matcher:
+            start = time.perf_counter()
+            matcher.publish()
+            publish_seconds = time.perf_counter() - start
+            # Warm up so worker start-up and the first attach are not timed
+            for requirement in requirements[:workers * 2]:
+                matcher.rank(requirement)
+            latency = _latency(_timed(matcher.rank, requirements))
+        case = {
+            "workers": workers,
+            "shards": workers * args.shards_per_worker,
+            "publish_seconds": round(publish_seconds, 4),
+            "rank": latency,
+            "speedup_p50": round(baseline["p50_ms"] / latency["p50_ms"], 2) if latency["p50_ms"] else None,
+        }
+        results.append(case)
+        print(f"{workers:>3} workers  rank p50 {latency['p50_ms']:.3f}ms p99 {latency['p99_ms']:.3f}ms  "
+              f"speedup {case['speedup_p50']}x  publish {publish_seconds:.3f}s", flush=True)
+
+    report = {
+        "metadata": _metadata(),
+        "size": args.size,
+        "schema": args.schema,
+        "single_process": baseline,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
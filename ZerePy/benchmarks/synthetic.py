@@ -0,0 +1,152 @@
+"""
+Synthetic freelancer profiles and job requirements for benchmarking the matcher.
+
+Skill popularity follows a Zipf-like law, as on real freelance marketplaces: a few
+skills (JavaScript, React, Python) appear on a large share of profiles while most
+appear on very few. Some skills are written with aliases ("react.js", "nodejs") so
+that normalisation is part of what is measured.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+# Roughly ordered from most to least common
+SKILLS = [
+    "JavaScript", "React", "Python", "Node.js", "TypeScript", "HTML", "CSS", "SQL", "AWS", "Docker",
+    "Java", "PostgreSQL", "MongoDB", "Git", "Figma", "UI/UX Design", "Solidity", "Web3.js", "Vue.js",
+    "Angular", "Django", "Flask", "Express", "GraphQL", "Kubernetes", "Go", "Rust", "C#", ".NET",
+    "PHP", "Laravel", "Ruby on Rails", "Swift", "Kotlin", "Flutter", "React Native", "Machine Learning",
+    "TensorFlow", "PyTorch", "Data Analysis", "Pandas", "Tableau", "Power BI", "Excel", "Smart Contracts",
+    "Ethereum", "Hardhat", "Foundry", "DeFi", "NFT", "Redis", "Elasticsearch", "Kafka", "Terraform",
+    "CI/CD", "Linux", "Azure", "GCP", "Firebase", "Next.js", "Tailwind CSS", "Sass", "Webpack",
+    "Jest", "Cypress", "Selenium", "Unity", "C++", "Scala", "Spark", "Hadoop", "Airflow", "dbt",
+    "Copywriting", "SEO", "Content Writing", "Technical Writing", "Illustrator", "Photoshop",
+    "Video Editing", "Blender", "Security Auditing", "Penetration Testing", "Zero Knowledge",
+]
+
+# Alternative spellings substituted for a share of the occurrences
+ALIASES = {
+    "React": ["react.js", "ReactJS"],
+    "Node.js": ["nodejs", "Node"],
+    "JavaScript": ["js", "ECMAScript"],
+    "PostgreSQL": ["postgres"],
+    "Kubernetes": ["k8s"],
+    "TypeScript": ["ts"],
+    "Web3.js": ["web3"],
+}
+ALIAS_RATE = 0.1
+
+FIRST_NAMES = ["Alice", "Bob", "Carol", "David", "Eve", "Femi", "Grace", "Hiro", "Ines", "Jamal", "Kemi", "Liam",
+               "Maya", "Nnamdi", "Olga", "Priya", "Quinn", "Rosa", "Sade", "Tariq", "Uche", "Vera", "Wei", "Yara"]
+LAST_NAMES = ["Johnson", "Smith", "Okafor", "Garcia", "Chen", "Kumar", "Adeyemi", "Novak", "Silva", "Mensah",
+              "Tanaka", "Müller", "Rossi", "Ibrahim", "Kowalski", "Nguyen"]
+AVAILABILITY = ["Full-time", "Part-time", "Contract", "10 hours/week", "20 hours/week", "30 hours per week"]
+
+SCHEMAS = ("sample", "cv")
+
+
+def _skill_weights(zipf_exponent: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, len(SKILLS) + 1) ** zipf_exponent
+    return weights / weights.sum()
+
+
+def _skill_lists(rng: np.random.Generator, count: int, low: int, high: int) -> List[List[str]]:
+    weights = _skill_weights()
+    sizes = rng.integers(low, high + 1, size=count)
+    # Oversample and de-duplicate instead of drawing without replacement row by row
+    draws = rng.choice(len(SKILLS), size=(count, high * 2), p=weights)
+    alias_draws = rng.random((count, high * 2))
+    lists = []
+    for row in range(count):
+        chosen = list(dict.fromkeys(draws[row].tolist()))[:sizes[row]]
+        skills = []
+        for position, skill_id in enumerate(chosen):
+            skill = SKILLS[skill_id]
+            if skill in ALIASES and alias_draws[row, position] < ALIAS_RATE:
+                skill = ALIASES[skill][position % len(ALIASES[skill])]
+            skills.append(skill)
+        lists.append(skills)
+    return lists
+
+
+def generate_profiles(count: int, schema: str = "sample", seed: int = 0) -> List[Dict]:
+    """
+    Synthetic profiles in one of the two schemas the agent reads.
+
+    Args:
+        count: Number of profiles
+        schema: "sample" for sample_data/freelancers.json, "cv" for frontend/uploads CVs
+        seed: Random seed, the same seed always gives the same profiles
+
+    Returns:
+        List of profile dictionaries, each with a unique address
+    """
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown schema {schema}, expected one of {SCHEMAS}")
+    rng = np.random.default_rng(seed)
+    skills = _skill_lists(rng, count, 3, 10)
+    rates = np.round(rng.lognormal(np.log(55), 0.45, size=count)).astype(int)
+    experience = np.minimum(rng.gamma(2.0, 2.5, size=count), 30).round().astype(int)
+    first = rng.integers(len(FIRST_NAMES), size=count)
+    last = rng.integers(len(LAST_NAMES), size=count)
+    availability = rng.integers(len(AVAILABILITY), size=count)
+
+    if schema == "sample":
+        return [
+            {
+                "id": f"f{row + 1}",
+                "name": f"{FIRST_NAMES[first[row]]} {LAST_NAMES[last[row]]}",
+                "address": f"0x{row + 1:040x}",
+                "skills": skills[row],
+                "hourly_rate": int(rates[row]),
+                "experience_years": int(experience[row]),
+                "availability": AVAILABILITY[availability[row]],
+                "portfolio_url": f"https://portfolio-{row + 1}.dev",
+                "contact_email": f"freelancer{row + 1}@example.com",
+            }
+            for row in range(count)
+        ]
+
+    # Most CVs carry a rating; new freelancers do not
+    ratings = np.round(np.clip(rng.normal(4.5, 0.35, size=count), 1.0, 5.0), 1)
+    rated = rng.random(count) < 0.85
+    completed = rng.negative_binomial(2, 0.1, size=count)
+    hours = rng.choice([10, 20, 25, 30, 40], size=count)
+    return [
+        {
+            "name": f"{FIRST_NAMES[first[row]]} {LAST_NAMES[last[row]]}",
+            "address": f"0x{row + 1:040x}",
+            "skills": skills[row],
+            "experienceYears": int(experience[row]),
+            "hourlyRate": int(rates[row]),
+            **({"rating": float(ratings[row])} if rated[row] else {}),
+            "completedJobs": int(completed[row]),
+            "bio": f"Freelancer working with {', '.join(skills[row][:3])}.",
+            "portfolio": [{"title": "Project", "description": "Client project", "link": "https://github.com/"}],
+            "languages": ["English"],
+            "availability": f"{hours[row]} hours per week",
+            "timezone": "UTC",
+        }
+        for row in range(count)
+    ]
+
+
+def generate_requirements(count: int, seed: int = 1) -> List[Dict]:
+    """
+    Synthetic job requirements with one to three required skills and optional bounds.
+
+    Required skills are drawn from the same popularity distribution as profiles, so
+    requirement selectivity ranges from a large share of profiles to a handful.
+    """
+    rng = np.random.default_rng(seed)
+    required = _skill_lists(rng, count, 1, 3)
+    preferred = _skill_lists(rng, count, 0, 2)
+    requirements = []
+    for row in range(count):
+        requirement = {"required_skills": required[row], "preferred_skills": preferred[row], "top_k": 10}
+        if rng.random() < 0.6:
+            requirement["max_hourly_rate"] = int(rng.integers(40, 120))
+        if rng.random() < 0.5:
+            requirement["min_experience"] = int(rng.integers(1, 8))
+        requirements.append(requirement)
+    return requirements
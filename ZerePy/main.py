@@ -1,11 +1,34 @@
+import asyncio
 import json
+import queue
 import requests
-from typing import Dict, List, Any, Optional
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Optional, AsyncIterator, Callable, Iterable, Iterator, Tuple
 from web3 import Web3
 from src.cli import ZerePyCLI
+from src.connection_manager import ConnectionManager
+from src.recommendation.batch_reads import BatchReader
+from src.recommendation.embedding_store import SemanticMatcher
+from src.recommendation.event_indexer import EventIndexer
+from src.recommendation.ipfs_fetcher import DEFAULT_IPFS_GATEWAYS, IPFSFetcher
+from src.recommendation.job_index import JobSyncer
+from src.recommendation.llm_rerank import LLMReranker
+from src.recommendation.matching_index import MatchingIndex
+from src.recommendation.pipeline import StreamingMatcher, stream_matches
+from src.recommendation.profile_cache import ProfileCache
+from src.recommendation.ranking import DEFAULT_TOP_K
+from src.recommendation.registration_sync import ContractRegistrationSource, RegistrationSyncer
+from src.recommendation.snapshot import DEFAULT_SNAPSHOT_PATH
+from src.recommendation.transactions import (CONFIRMED, DEFAULT_RECEIPT_TIMEOUT, PendingTransaction,
+                                             TransactionPipeline)
 
 class FreelancerRecommendationAgent:
-    def __init__(self, web3_provider_url: str, contract_address: str, contract_abi: List[Dict]):
+    def __init__(self, web3_provider_url: str, contract_address: str, contract_abi: List[Dict],
+                 ipfs_gateways: Optional[List[str]] = None, max_concurrency: int = 32,
+                 profile_cache: Optional[ProfileCache] = None, read_chunk_size: int = 200,
+                 reranker: Optional[LLMReranker] = None, semantic_matcher: Optional[SemanticMatcher] = None,
+                 deploy_block: Optional[int] = None, receipt_timeout: float = DEFAULT_RECEIPT_TIMEOUT):
         """
         Initialize the AI agent with Web3 connection and contract details.
         
@@ -13,10 +36,34 @@ class FreelancerRecommendationAgent:
             web3_provider_url: URL of the Ethereum node
             contract_address: Address of the smart contract
             contract_abi: ABI of the smart contract
+            ipfs_gateways: IPFS gateways to race profile requests across
+            max_concurrency: Maximum number of profiles fetched in parallel
+            profile_cache: CID-keyed profile cache, defaults to the on-disk cache in .cache/
+            read_chunk_size: Maximum number of contract view calls per batched request
+            reranker: Optional LLM re-rank stage applied to each job's shortlist
+            semantic_matcher: Optional embedding store that ranks indexed profiles by
+                similarity to the job instead of by weighted score
+            deploy_block: Block the contract was deployed in, where on-chain syncs start
+                when they have no checkpoint yet; required for those syncs without one
+            receipt_timeout: Seconds to wait for a recommendation transaction to be mined
         """
         self.web3 = Web3(Web3.HTTPProvider(web3_provider_url))
         self.contract = self.web3.eth.contract(address=contract_address, abi=contract_abi)
-        self.ipfs_gateway = "https://ipfs.io/ipfs/"
+        self.ipfs_gateways = ipfs_gateways or DEFAULT_IPFS_GATEWAYS
+        self.ipfs_gateway = self.ipfs_gateways[0]
+        self.profile_cache = profile_cache if profile_cache is not None else ProfileCache()
+        self.ipfs_fetcher = IPFSFetcher(self.ipfs_gateways, max_concurrency=max_concurrency,
+                                        cache=self.profile_cache)
+        self.batch_reader = BatchReader(self.web3, self.contract, chunk_size=read_chunk_size)
+        self.registration_syncer: Optional[RegistrationSyncer] = None
+        self.job_syncer: Optional[JobSyncer] = None
+        self.event_indexer: Optional[EventIndexer] = None
+        # Sending account address -> pipeline owning that account's nonces
+        self.transaction_pipelines: Dict[str, TransactionPipeline] = {}
+        self.reranker = reranker
+        self.semantic_matcher = semantic_matcher
+        self.deploy_block = deploy_block
+        self.receipt_timeout = receipt_timeout
     
     def fetch_profile_from_ipfs(self, ipfs_hash: str) -> Optional[Dict]:
         """
@@ -28,17 +75,23 @@ class FreelancerRecommendationAgent:
         Returns:
             Freelancer profile as a dictionary or None if fetch fails
         """
+        profile = self.profile_cache.get(ipfs_hash)
+        if profile is not None:
+            return profile
+
         try:
             response = requests.get(f"{self.ipfs_gateway}{ipfs_hash}", timeout=10)
             response.raise_for_status()
-            return json.loads(response.text)
+            profile = json.loads(response.text)
+            self.profile_cache.put(ipfs_hash, profile)
+            return profile
         except (requests.RequestException, json.JSONDecodeError) as e:
             print(f"Error fetching profile {ipfs_hash}: {str(e)}")
             return None
     
     def fetch_all_profiles(self, ipfs_hashes: List[str]) -> List[Dict]:
         """
-        Fetch all freelancer profiles from IPFS.
+        Fetch all freelancer profiles from IPFS concurrently.
         
         Args:
             ipfs_hashes: List of IPFS hashes
@@ -46,12 +99,19 @@ class FreelancerRecommendationAgent:
         Returns:
             List of freelancer profiles
         """
-        profiles = []
-        for ipfs_hash in ipfs_hashes:
-            profile = self.fetch_profile_from_ipfs(ipfs_hash)
-            if profile:
-                profiles.append(profile)
-        return profiles
+        return self.ipfs_fetcher.fetch_all(ipfs_hashes)
+
+    def stream_profiles(self, ipfs_hashes: List[str]) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Fetch freelancer profiles concurrently, yielding each one as soon as it arrives.
+        
+        Args:
+            ipfs_hashes: List of IPFS hashes
+            
+        Returns:
+            Async iterator of (ipfs_hash, profile) tuples
+        """
+        return self.ipfs_fetcher.stream(ipfs_hashes)
     
     def filter_freelancers(self, profiles: List[Dict], requirement: Dict) -> List[Dict]:
         """
@@ -62,29 +122,213 @@ class FreelancerRecommendationAgent:
             requirement: Dictionary containing filtering criteria
             
         Returns:
-            List of filtered freelancer profiles
+            List of filtered freelancer profiles, the given dicts themselves
         """
-        filtered_profiles = []
+        profiles = list(profiles)
+        return [profiles[row] for row in MatchingIndex(profiles).matching_rows(requirement)]
+
+    def rank_freelancers(self, profiles: List[Dict], requirement: Dict) -> List[Tuple[Dict, float]]:
+        """
+        Filter freelancers and keep the best ``requirement["top_k"]`` by weighted score.
         
-        for profile in profiles:
-            # Check if profile has all required skills
-            if "required_skills" in requirement:
-                has_all_skills = all(skill in profile.get("skills", []) for skill in requirement["required_skills"])
-                if not has_all_skills:
-                    continue
+        Args:
+            profiles: List of freelancer profiles
+            requirement: Dictionary containing filtering criteria and optionally top_k,
+                preferred_skills and ranking_weights
             
-            # Check if profile meets experience requirement
-            if "min_experience" in requirement and profile.get("experience", 0) < requirement["min_experience"]:
-                continue
-                
-            # Check if profile meets hourly rate requirement
-            if "max_hourly_rate" in requirement and profile.get("hourly_rate", float('inf')) > requirement["max_hourly_rate"]:
-                continue
-                
-            filtered_profiles.append(profile)
+        Returns:
+            List of (profile, score) tuples, best first, with the given profile dicts
+        """
+        profiles = list(profiles)
+        return [(profiles[row], score) for row, score in MatchingIndex(profiles).rank_rows(requirement)]
+
+    def stream_recommendations(self, ipfs_hashes: List[str], matcher: StreamingMatcher,
+                               max_matches: Optional[int] = None,
+                               min_score: Optional[float] = None) -> AsyncIterator[Tuple[Dict, float]]:
+        """
+        Fetch, filter and score profiles as a pipeline, yielding matches as they are found.
+        
+        Args:
+            ipfs_hashes: List of IPFS hashes
+            matcher: Streaming matcher holding the requirement and the running top-k
+            max_matches: Stop once this many matches scoring at least min_score were found
+            min_score: Score a match needs to count towards max_matches
+            
+        Returns:
+            Async iterator of (profile, score) tuples in arrival order
+        """
+        return stream_matches(self.stream_profiles(ipfs_hashes), matcher, max_matches, min_score)
+
+    def match_streaming(self, ipfs_hashes: List[str], requirement: Dict) -> StreamingMatcher:
+        """
+        Run the streaming pipeline to completion or until the requirement's early-stop
+        condition (max_matches matches scoring at least min_score) is met.
+        
+        Args:
+            ipfs_hashes: List of IPFS hashes
+            requirement: Dictionary containing filtering criteria
+            
+        Returns:
+            The matcher, holding the top-k and the number of profiles seen
+        """
+        matcher = StreamingMatcher(requirement)
+        
+        async def drain():
+            async for _ in self.stream_recommendations(ipfs_hashes, matcher, requirement.get("max_matches"),
+                                                       requirement.get("min_score")):
+                pass
+        
+        asyncio.run(drain())
+        return matcher
+
+    def build_index(self, ipfs_hashes: List[str]) -> MatchingIndex:
+        """
+        Fetch profiles once and index them for matching against many jobs.
+        
+        Args:
+            ipfs_hashes: List of IPFS hashes
+            
+        Returns:
+            Matching index over the fetched profiles
+        """
+        # Bios are only kept when they are embedded
+        return MatchingIndex(self.fetch_all_profiles(ipfs_hashes), keep_text=self.semantic_matcher is not None)
+
+    def registered_index(self, start_block: Optional[int] = None) -> MatchingIndex:
+        """
+        Index of every freelancer registered on-chain, kept up to date incrementally.
+        
+        The first call creates the registration syncer, restoring the index from its
+        memory-mapped snapshot when that matches the checkpoint; every call scans the
+        blocks mined since the checkpoint, up to the syncer's per-call limit, and
+        fetches only new or changed profiles.
+        
+        Args:
+            start_block: First block to scan when no checkpoint exists yet, the deploy block if not given
             
-        return filtered_profiles
+        Returns:
+            Matching index keyed by freelancer address
+        """
+        if self.registration_syncer is None:
+            source = ContractRegistrationSource(self.web3, self.contract)
+            start_block = self.deploy_block if start_block is None else start_block
+            self.registration_syncer = RegistrationSyncer(source, self.ipfs_fetcher, start_block=start_block,
+                                                          snapshot_path=DEFAULT_SNAPSHOT_PATH,
+                                                          keep_text=self.semantic_matcher is not None)
+        self.registration_syncer.sync_once()
+        if not self.registration_syncer.caught_up:
+            print(f"Registrations are synced up to block {self.registration_syncer.next_block - 1} only; "
+                  f"run again to continue catching up")
+        return self.registration_syncer.index
     
+    def recommend_jobs(self, profile: Dict, top_k: int = 10, start_block: Optional[int] = None) -> List[Dict]:
+        """
+        Recommend open on-chain jobs to a freelancer.
+        
+        Jobs are read from the marketplace event indexer, which every call brings up
+        to date; only the descriptions of newly opened jobs are read from the chain.
+        
+        Args:
+            profile: Freelancer profile or CV, e.g. frontend/uploads/sampleCV1.json
+            top_k: Number of jobs to return
+            start_block: First block to index when the event database is new, the deploy block if not given
+            
+        Returns:
+            Open jobs, best match first, each with its score
+        """
+        if self.job_syncer is None:
+            self.job_syncer = JobSyncer(self.marketplace_events(start_block=start_block), reader=self.batch_reader)
+            if self.registration_syncer is not None:
+                # Skills of registered freelancers, so free-text jobs mentioning them require them
+                self.job_syncer.index.learn_skills(list(self.registration_syncer.index.vocabulary.names))
+        self.job_syncer.sync_once()
+        return [
+            {
+                "job_id": job["job_id"],
+                "title": job["title"],
+                "budget": job["budget"],
+                "employer": job["employer"],
+                "required_skills": job["requirement"].get("required_skills", []),
+                "score": round(score, 4)
+            }
+            for job, score in self.job_syncer.index.recommend(profile, top_k)
+        ]
+    
+    def marketplace_events(self, escrow_address: Optional[str] = None, start_block: Optional[int] = None) -> EventIndexer:
+        """
+        Local SQLite mirror of marketplace and escrow events, brought up to date on every call.
+        
+        Args:
+            escrow_address: Escrow contract, read from the marketplace if not given
+            start_block: First block to index when the database is new, the deploy block if not given
+            
+        Returns:
+            Indexer whose open_jobs, applicants and funded_escrows queries run locally
+        """
+        if self.event_indexer is None:
+            if start_block is None:
+                # Events are filtered on the node, so without a deploy block they are read from genesis
+                start_block = self.deploy_block or 0
+            self.event_indexer = EventIndexer(self.web3, self.contract, escrow_address=escrow_address,
+                                              start_block=start_block)
+        self.event_indexer.sync()
+        return self.event_indexer
+
+    def transaction_pipeline(self, private_key: str) -> TransactionPipeline:
+        """
+        Transaction pipeline of the account a private key belongs to, created on first use.
+        
+        Args:
+            private_key: Private key of the sending account
+            
+        Returns:
+            Pipeline with a local nonce manager and background receipt tracking
+        """
+        address = self.web3.eth.account.from_key(private_key).address
+        if address not in self.transaction_pipelines:
+            self.transaction_pipelines[address] = TransactionPipeline(self.web3, private_key)
+        return self.transaction_pipelines[address]
+
+    def submit_recommendations(self, job_id: str, recommended_freelancers: List[Dict], private_key: str,
+                               callback: Optional[Callable[[PendingTransaction], None]] = None) -> PendingTransaction:
+        """
+        Send a storeAIRecommendations transaction without waiting for it to be mined.
+        
+        Args:
+            job_id: ID of the job
+            recommended_freelancers: List of recommended freelancer profiles
+            private_key: Private key of the employer for transaction signing
+            callback: Called with the PendingTransaction once it is mined, failed or dropped
+            
+        Returns:
+            PendingTransaction to wait on or query
+        """
+        # Extract Ethereum addresses from profiles
+        freelancer_addresses = [profile["address"] for profile in recommended_freelancers]
+        
+        # Convert job_id to bytes32 if it's not already
+        if not isinstance(job_id, bytes):
+            job_id_bytes = self.web3.to_bytes(hexstr=job_id) if job_id.startswith('0x') else self.web3.to_bytes(text=job_id)
+        else:
+            job_id_bytes = job_id
+        
+        key = job_id if isinstance(job_id, str) else self.web3.to_hex(job_id)
+        function = self.contract.functions.storeAIRecommendations(job_id_bytes, freelancer_addresses)
+        return self.transaction_pipeline(private_key).submit(key, function, callback)
+
+    def transaction_status(self, job_id: str) -> Optional[Dict]:
+        """
+        Status of the latest recommendation transaction submitted for a job.
+        
+        Returns:
+            Dictionary with status, nonce, transaction_hash and block_number, or None
+        """
+        for pipeline in self.transaction_pipelines.values():
+            status = pipeline.status(job_id)
+            if status is not None:
+                return status
+        return None
+
     def store_recommendations(self, job_id: str, recommended_freelancers: List[Dict], employer_address: str, private_key: str) -> Optional[str]:
         """
         Store recommendations in the smart contract.
@@ -99,43 +343,27 @@ class FreelancerRecommendationAgent:
             Transaction hash if successful, None otherwise
         """
         try:
-            # Extract Ethereum addresses from profiles
-            freelancer_addresses = [profile["address"] for profile in recommended_freelancers]
-            
-            # Convert job_id to bytes32 if it's not already
-            if not isinstance(job_id, bytes):
-                job_id_bytes = self.web3.to_bytes(hexstr=job_id) if job_id.startswith('0x') else self.web3.to_bytes(text=job_id)
-            else:
-                job_id_bytes = job_id
-                
-            # Build transaction
-            nonce = self.web3.eth.get_transaction_count(employer_address)
-            tx = self.contract.functions.storeAIRecommendations(
-                job_id_bytes,
-                freelancer_addresses
-            ).build_transaction({
-                'from': employer_address,
-                'gas': 2000000,
-                'gasPrice': self.web3.eth.gas_price,
-                'nonce': nonce,
-            })
-            
-            # Sign and send transaction
-            signed_tx = self.web3.eth.account.sign_transaction(tx, private_key)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            pending = self.submit_recommendations(job_id, recommended_freelancers, private_key)
             
             # Wait for transaction receipt
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash)
-            
-            if receipt.status == 1:
-                return self.web3.to_hex(tx_hash)
-            else:
-                print("Transaction failed")
+            if not pending.wait(self.receipt_timeout):
+                print(f"Error storing recommendations: transaction {pending.tx_hash} was not mined "
+                      f"within {self.receipt_timeout:g}s")
                 return None
+            return self._transaction_hash(pending)
                 
         except Exception as e:
             print(f"Error storing recommendations: {str(e)}")
             return None
+
+    def _transaction_hash(self, pending: PendingTransaction) -> Optional[str]:
+        if pending.status == CONFIRMED:
+            return pending.tx_hash
+        if pending.error:
+            print(f"Error storing recommendations: {pending.error}")
+        else:
+            print("Transaction failed")
+        return None
     
     def recommend_freelancers(self, job_id: str, requirement: Dict, ipfs_hashes: List[str], 
                              employer_address: str, private_key: str) -> Dict:
@@ -144,7 +372,10 @@ class FreelancerRecommendationAgent:
         
         Args:
             job_id: ID of the job
-            requirement: Dictionary containing filtering criteria
+            requirement: Dictionary containing filtering criteria; top_k bounds the
+                number of recommendations stored on-chain, max_matches and min_score
+                stop fetching early once enough good matches were found, except with
+                a semantic matcher, which ranks every fetched profile
             ipfs_hashes: List of IPFS hashes for freelancer profiles
             employer_address: Ethereum address of the employer
             private_key: Private key of the employer for transaction signing
@@ -152,35 +383,117 @@ class FreelancerRecommendationAgent:
         Returns:
             Dictionary containing result of the recommendation process
         """
-        # Fetch all profiles
-        profiles = self.fetch_all_profiles(ipfs_hashes)
+        if self.semantic_matcher is not None:
+            # Similarity ranking needs every profile's vector, so profiles are indexed instead of streamed
+            matching_index = self.build_index(ipfs_hashes)
+            if len(matching_index):
+                return self.recommend_from_index(job_id, requirement, matching_index, employer_address, private_key)
+        else:
+            # Fetch, filter and rank profiles as they arrive, keeping only the best top_k
+            matcher = self.match_streaming(ipfs_hashes, self.shortlist_requirement(requirement))
+            if matcher.seen:
+                return self.store_ranked(job_id, self.rerank(requirement, matcher.top()), employer_address,
+                                         private_key)
         
-        if not profiles:
-            return {
-                "success": False,
-                "message": "Failed to fetch freelancer profiles from IPFS"
-            }
+        return {
+            "success": False,
+            "message": "Failed to fetch freelancer profiles from IPFS"
+        }
+
+    def recommend_from_index(self, job_id: str, requirement: Dict, matching_index: MatchingIndex,
+                             employer_address: str, private_key: str) -> Dict:
+        """
+        Recommend freelancers for one job from an already loaded profile index.
+        
+        Args:
+            job_id: ID of the job
+            requirement: Dictionary containing filtering criteria
+            matching_index: Index over the candidate freelancer profiles
+            employer_address: Ethereum address of the employer
+            private_key: Private key of the employer for transaction signing
+            
+        Returns:
+            Dictionary containing result of the recommendation process
+        """
+        # Filter freelancers based on requirements and keep only the best top_k
+        ranked = self.rerank(requirement, self.rank_index(self.shortlist_requirement(requirement), matching_index))
+        return self.store_ranked(job_id, ranked, employer_address, private_key)
+
+    def rank_index(self, requirement: Dict, matching_index: MatchingIndex) -> List[Tuple[Dict, float]]:
+        """
+        Rank the profiles of an index for a requirement.
+        
+        With a semantic matcher the index only applies the hard filters and the
+        profiles passing them are ranked by embedding similarity to the job.
         
-        # Filter freelancers based on requirements
-        filtered_profiles = self.filter_freelancers(profiles, requirement)
+        Args:
+            requirement: Dictionary containing filtering criteria
+            matching_index: Index over the candidate freelancer profiles
+            
+        Returns:
+            List of (profile, score) tuples, best first
+        """
+        if self.semantic_matcher is None:
+            return matching_index.rank(requirement)
+        return self.semantic_matcher.rank(matching_index, requirement)
+
+    def shortlist_requirement(self, requirement: Dict) -> Dict:
+        """Requirement widened to the re-rank shortlist size, or unchanged without a reranker"""
+        if self.reranker is None:
+            return requirement
+        top_k = int(requirement.get("top_k", DEFAULT_TOP_K))
+        return {**requirement, "top_k": max(top_k, self.reranker.top_n)}
+
+    def rerank(self, requirement: Dict, ranked: List[Tuple[Dict, float]]) -> List[Tuple[Dict, float]]:
+        """
+        Reorder a shortlist with the LLM reranker, if one is set, and cut it to top_k.
         
-        if not filtered_profiles:
+        Args:
+            requirement: Dictionary containing filtering criteria
+            ranked: (profile, score) tuples, best first
+            
+        Returns:
+            At most top_k (profile, score) tuples in their final order
+        """
+        if self.reranker is None:
+            return ranked
+        return self.reranker.rerank(requirement, ranked)[:int(requirement.get("top_k", DEFAULT_TOP_K))]
+
+    def store_ranked(self, job_id: str, ranked: List[Tuple[Dict, float]],
+                     employer_address: str, private_key: str) -> Dict:
+        """
+        Store ranked recommendations on-chain and describe the outcome.
+        
+        Args:
+            job_id: ID of the job
+            ranked: (profile, score) tuples, best first
+            employer_address: Ethereum address of the employer
+            private_key: Private key of the employer for transaction signing
+            
+        Returns:
+            Dictionary containing result of the recommendation process
+        """
+        if not ranked:
             return {
                 "success": False,
                 "message": "No freelancers match the given requirements"
             }
         
+        filtered_profiles = [profile for profile, _ in ranked]
+        
         # Store recommendations in smart contract
         tx_hash = self.store_recommendations(job_id, filtered_profiles, employer_address, private_key)
-        
+        return self._stored_result(tx_hash, ranked)
+
+    def _stored_result(self, tx_hash: Optional[str], ranked: List[Tuple[Dict, float]]) -> Dict:
         if tx_hash:
             return {
                 "success": True,
-                "message": f"Successfully stored {len(filtered_profiles)} freelancer recommendations",
+                "message": f"Successfully stored {len(ranked)} freelancer recommendations",
                 "transaction_hash": tx_hash,
                 "recommended_freelancers": [
-                    {"name": profile["name"], "address": profile["address"]} 
-                    for profile in filtered_profiles
+                    {"name": profile["name"], "address": profile["address"], "score": round(score, 4)} 
+                    for profile, score in ranked
                 ]
             }
         else:
@@ -189,6 +502,144 @@ class FreelancerRecommendationAgent:
                 "message": "Failed to store recommendations in the smart contract"
             }
 
+    def load_jobs_from_file(self, path: str) -> Iterator[Dict]:
+        """
+        Read jobs from a JSONL file with one {"job_id": ..., "requirement": {...}} object per line.
+        
+        Args:
+            path: Path of the JSONL file
+            
+        Returns:
+            Iterator of job dictionaries
+        """
+        with open(path, "r") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    job = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"Skipping line {line_number} of {path}: {str(e)}")
+                    continue
+                if "job_id" not in job:
+                    print(f"Skipping line {line_number} of {path}: missing job_id")
+                    continue
+                job.setdefault("requirement", {})
+                yield job
+
+    def load_jobs_from_events(self, from_block: int, to_block: Any = "latest") -> List[Dict]:
+        """
+        Read jobs from on-chain JobCreated events.
+        
+        The requirement of each job is taken from its on-chain description when that
+        description is a JSON object; otherwise the job matches every freelancer.
+        
+        Args:
+            from_block: First block to scan
+            to_block: Last block to scan
+            
+        Returns:
+            List of job dictionaries
+        """
+        jobs = []
+        events = self.contract.events.JobCreated.get_logs(fromBlock=from_block, toBlock=to_block)
+        job_ids = [event["args"]["jobId"] for event in events]
+        # One batched read for every job instead of an eth_call each
+        for job_id, state in zip(job_ids, self.batch_reader.jobs(job_ids)):
+            if state is None:
+                print(f"Error reading job {self.web3.to_hex(job_id)}")
+                continue
+            requirement = {}
+            try:
+                parsed = json.loads(state["description"])
+                if isinstance(parsed, dict):
+                    requirement = parsed
+            except json.JSONDecodeError:
+                pass
+            jobs.append({"job_id": self.web3.to_hex(job_id), "requirement": requirement})
+        return jobs
+
+    def recommend_batch(self, jobs: Iterable[Dict], ipfs_hashes: Optional[List[str]],
+                        employer_address: str, private_key: str) -> Iterator[Dict]:
+        """
+        Recommend freelancers for many jobs against a single fetch of the profile set.
+        
+        Args:
+            jobs: Job dictionaries with job_id and requirement
+            ipfs_hashes: List of IPFS hashes for freelancer profiles, or None to match
+                against every freelancer registered on-chain
+            employer_address: Ethereum address of the employer
+            private_key: Private key of the employer for transaction signing
+            
+        Returns:
+            Iterator of result dictionaries, one per job, each tagged with its job_id;
+            jobs sent on-chain are reported as their transactions are mined, or as
+            failed once receipt_timeout passes without that
+        """
+        if ipfs_hashes is None:
+            matching_index = self.registered_index()
+        else:
+            matching_index = self.build_index(ipfs_hashes)
+        
+        # Transactions are sent back-to-back; results are reported as they are mined
+        mined = queue.Queue()
+        # Submitted transactions not reported yet, so they can be reported on timeout
+        waiting: Dict[int, PendingTransaction] = {}
+        
+        def finished(pending: PendingTransaction, ranked: List[Tuple[Dict, float]]) -> Dict:
+            waiting.pop(id(pending), None)
+            return {"job_id": pending.key, **self._stored_result(self._transaction_hash(pending), ranked)}
+        
+        for job in jobs:
+            if not len(matching_index):
+                yield {
+                    "job_id": job["job_id"],
+                    "success": False,
+                    "message": "Failed to fetch freelancer profiles from IPFS"
+                }
+                continue
+            
+            ranked = self.rerank(job["requirement"],
+                                 self.rank_index(self.shortlist_requirement(job["requirement"]), matching_index))
+            if not ranked:
+                yield {
+                    "job_id": job["job_id"],
+                    "success": False,
+                    "message": "No freelancers match the given requirements"
+                }
+                continue
+            
+            try:
+                pending = self.submit_recommendations(job["job_id"], [profile for profile, _ in ranked], private_key,
+                                                      lambda pending, ranked=ranked: mined.put((pending, ranked)))
+            except Exception as e:
+                print(f"Error storing recommendations: {str(e)}")
+                yield {
+                    "job_id": job["job_id"],
+                    "success": False,
+                    "message": "Failed to store recommendations in the smart contract"
+                }
+                continue
+            waiting[id(pending)] = pending
+            
+            while not mined.empty():
+                yield finished(*mined.get())
+        
+        deadline = time.monotonic() + self.receipt_timeout
+        while waiting:
+            try:
+                yield finished(*mined.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        for pending in waiting.values():
+            yield {
+                "job_id": pending.key,
+                "success": False,
+                "message": f"Transaction was not mined within {self.receipt_timeout:g}s",
+                "transaction_hash": pending.tx_hash
+            }
+
 
 # ... (keep all the previous code the same until the FreelancerRecommendationCLI class)
 
@@ -208,31 +659,83 @@ class FreelancerRecommendationCLI(ZerePyCLI):
         import json
         
         parser = argparse.ArgumentParser(description='Freelancer Recommendation Agent')
-        parser.add_argument('--job_id', required=True, help='Job ID (bytes32)')
-        parser.add_argument('--requirement', required=True, type=json.loads, 
+        parser.add_argument('--job_id', help='Job ID (bytes32)')
+        parser.add_argument('--requirement', type=json.loads, 
                           help='JSON string containing requirements')
-        parser.add_argument('--ipfs_hashes', required=True, type=json.loads,
-                          help='JSON array of IPFS hashes')
-        parser.add_argument('--employer_address', required=True,
+        parser.add_argument('--jobs_file',
+                          help='JSONL file of {"job_id", "requirement"} objects to match in one batch')
+        parser.add_argument('--from_block', type=int,
+                          help='Match every job created by JobCreated events since this block')
+        parser.add_argument('--deploy_block', type=int,
+                          help='Block the contract was deployed in, where syncing registrations and jobs starts; '
+                               'required unless --ipfs_hashes is given')
+        parser.add_argument('--ipfs_hashes', type=json.loads,
+                          help='JSON array of IPFS hashes, defaults to every freelancer registered on-chain')
+        parser.add_argument('--freelancer_profile',
+                          help='JSON profile or CV of a freelancer to recommend open jobs to')
+        parser.add_argument('--top_k', type=int, default=10,
+                          help='Number of jobs to recommend with --freelancer_profile')
+        parser.add_argument('--rerank_agent',
+                          help='Agent in agents/ whose LLM connection re-ranks each shortlist, e.g. example')
+        parser.add_argument('--semantic', action='store_true',
+                          help='Rank indexed profiles by embedding similarity, embedded offline and cached in .cache/')
+        parser.add_argument('--employer_address',
                           help='Ethereum address of the employer')
-        parser.add_argument('--private_key', required=True,
+        parser.add_argument('--private_key',
                           help='Private key for transaction signing')
         
-        return parser.parse_args()
+        args = parser.parse_args()
+        if args.deploy_block is None and (args.freelancer_profile or args.ipfs_hashes is None):
+            parser.error('--deploy_block is required to sync from the chain')
+        if args.freelancer_profile:
+            return args
+        if not args.employer_address or not args.private_key:
+            parser.error('--employer_address and --private_key are required unless --freelancer_profile is given')
+        if not args.jobs_file and args.from_block is None and (not args.job_id or args.requirement is None):
+            parser.error('--job_id and --requirement are required unless --jobs_file or --from_block is given')
+        return args
     
     def execute(self):
         """
         Execute the CLI application
         """
         args = self.parse_arguments()
+        self.agent.deploy_block = args.deploy_block
+        
+        if args.rerank_agent:
+            with open(Path("agents") / f"{args.rerank_agent}.json", 'r') as f:
+                agent_config = json.load(f)
+            self.agent.reranker = LLMReranker(ConnectionManager(agent_config["config"]))
+        
+        if args.semantic:
+            self.agent.semantic_matcher = SemanticMatcher()
+        
+        if args.freelancer_profile:
+            with open(args.freelancer_profile, 'r') as f:
+                profile = json.load(f)
+            print(json.dumps(self.agent.recommend_jobs(profile, args.top_k), indent=2))
+            return
+        
+        if args.jobs_file or args.from_block is not None:
+            if args.jobs_file:
+                jobs = self.agent.load_jobs_from_file(args.jobs_file)
+            else:
+                jobs = self.agent.load_jobs_from_events(args.from_block)
+            
+            # Stream one JSON result per line as each job is matched
+            for result in self.agent.recommend_batch(jobs, args.ipfs_hashes, args.employer_address,
+                                                     args.private_key):
+                print(json.dumps(result), flush=True)
+            return
+        
+        if args.ipfs_hashes is None:
+            result = self.agent.recommend_from_index(args.job_id, args.requirement, self.agent.registered_index(),
+                                                     args.employer_address, args.private_key)
+            print(json.dumps(result, indent=2))
+            return
         
-        result = self.run({
-            "job_id": args.job_id,
-            "requirement": args.requirement,
-            "ipfs_hashes": args.ipfs_hashes,
-            "employer_address": args.employer_address,
-            "private_key": args.private_key
-        })
+        result = self.agent.recommend_freelancers(args.job_id, args.requirement, args.ipfs_hashes,
+                                                  args.employer_address, args.private_key)
         
         print(json.dumps(result, indent=2))
 
@@ -1,82 +1,69 @@
+import importlib
 import logging
-from typing import Any, List, Optional, Type, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Type, Dict, Tuple
 from src.connections.base_connection import BaseConnection
-from src.connections.anthropic_connection import AnthropicConnection
-from src.connections.eternalai_connection import EternalAIConnection
-from src.connections.goat_connection import GoatConnection
-from src.connections.groq_connection import GroqConnection
-from src.connections.openai_connection import OpenAIConnection
-from src.connections.twitter_connection import TwitterConnection
-from src.connections.farcaster_connection import FarcasterConnection
-from src.connections.ollama_connection import OllamaConnection
-from src.connections.echochambers_connection import EchochambersConnection
-from src.connections.solana_connection import SolanaConnection
-from src.connections.hyperbolic_connection import HyperbolicConnection
-from src.connections.galadriel_connection import GaladrielConnection
-from src.connections.sonic_connection import SonicConnection
-from src.connections.discord_connection import DiscordConnection
-from src.connections.allora_connection import AlloraConnection
-from src.connections.xai_connection import XAIConnection
-from src.connections.ethereum_connection import EthereumConnection
-from src.connections.together_connection import TogetherAIConnection
-from src.connections.evm_connection import EVMConnection
-from src.connections.perplexity_connection import PerplexityConnection
-from src.connections.monad_connection import MonadConnection
 
 logger = logging.getLogger("connection_manager")
 
+# Seconds an is_configured result is trusted before the connection is checked again
+DEFAULT_HEALTH_TTL = 300.0
+# Most connections checked at once when refreshing every connection's status
+MAX_PARALLEL_CHECKS = 16
+
+# Connection name in an agent config -> (module, class) implementing it. Modules are
+# imported only when an agent uses the connection, so an agent does not pay for
+# loading the SDKs (web3, solana, anthropic, ...) of connections it never uses.
+CONNECTION_TYPES: Dict[str, Tuple[str, str]] = {
+    "twitter": ("src.connections.twitter_connection", "TwitterConnection"),
+    "anthropic": ("src.connections.anthropic_connection", "AnthropicConnection"),
+    "openai": ("src.connections.openai_connection", "OpenAIConnection"),
+    "farcaster": ("src.connections.farcaster_connection", "FarcasterConnection"),
+    "groq": ("src.connections.groq_connection", "GroqConnection"),
+    "eternalai": ("src.connections.eternalai_connection", "EternalAIConnection"),
+    "ollama": ("src.connections.ollama_connection", "OllamaConnection"),
+    "echochambers": ("src.connections.echochambers_connection", "EchochambersConnection"),
+    "goat": ("src.connections.goat_connection", "GoatConnection"),
+    "solana": ("src.connections.solana_connection", "SolanaConnection"),
+    "hyperbolic": ("src.connections.hyperbolic_connection", "HyperbolicConnection"),
+    "galadriel": ("src.connections.galadriel_connection", "GaladrielConnection"),
+    "sonic": ("src.connections.sonic_connection", "SonicConnection"),
+    "discord": ("src.connections.discord_connection", "DiscordConnection"),
+    "allora": ("src.connections.allora_connection", "AlloraConnection"),
+    "xai": ("src.connections.xai_connection", "XAIConnection"),
+    "ethereum": ("src.connections.ethereum_connection", "EthereumConnection"),
+    "together": ("src.connections.together_connection", "TogetherAIConnection"),
+    "evm": ("src.connections.evm_connection", "EVMConnection"),
+    "perplexity": ("src.connections.perplexity_connection", "PerplexityConnection"),
+    "monad": ("src.connections.monad_connection", "MonadConnection"),
+}
+
 
 class ConnectionManager:
-    def __init__(self, agent_config):
+    def __init__(self, agent_config, health_ttl: float = DEFAULT_HEALTH_TTL):
+        """
+        Args:
+            agent_config: Connection configs of the agent
+            health_ttl: Seconds a connection's configuration check is cached; 0 checks before every action
+        """
         self.connections: Dict[str, BaseConnection] = {}
+        self.health_ttl = health_ttl
+        # Connection name -> (configured, monotonic time of the check)
+        self._health: Dict[str, Tuple[bool, float]] = {}
+        self._health_lock = threading.Lock()
         for config in agent_config:
             self._register_connection(config)
 
     @staticmethod
-    def _class_name_to_type(class_name: str) -> Type[BaseConnection]:
-        if class_name == "twitter":
-            return TwitterConnection
-        elif class_name == "anthropic":
-            return AnthropicConnection
-        elif class_name == "openai":
-            return OpenAIConnection
-        elif class_name == "farcaster":
-            return FarcasterConnection
-        elif class_name == "groq":
-            return GroqConnection
-        elif class_name == "eternalai":
-            return EternalAIConnection
-        elif class_name == "ollama":
-            return OllamaConnection
-        elif class_name == "echochambers":
-            return EchochambersConnection
-        elif class_name == "goat":
-            return GoatConnection
-        elif class_name == "solana":
-            return SolanaConnection
-        elif class_name == "hyperbolic":
-            return HyperbolicConnection
-        elif class_name == "galadriel":
-            return GaladrielConnection
-        elif class_name == "sonic":
-            return SonicConnection
-        elif class_name == "discord":
-            return DiscordConnection
-        elif class_name == "allora":
-            return AlloraConnection
-        elif class_name == "xai":
-            return XAIConnection
-        elif class_name == "ethereum":
-            return EthereumConnection
-        elif class_name == "together":
-            return TogetherAIConnection
-        elif class_name == "evm":
-            return EVMConnection
-        elif class_name == "perplexity":
-            return PerplexityConnection
-        elif class_name == "monad":
-            return MonadConnection
-        return None
+    def _class_name_to_type(class_name: str) -> Optional[Type[BaseConnection]]:
+        """Connection class registered under a name, importing its module on first use"""
+        entry = CONNECTION_TYPES.get(class_name)
+        if entry is None:
+            return None
+        module_name, type_name = entry
+        return getattr(importlib.import_module(module_name), type_name)
 
     def _register_connection(self, config_dic: Dict[str, Any]) -> None:
         """
@@ -90,15 +77,72 @@ class ConnectionManager:
         try:
             name = config_dic["name"]
             connection_class = self._class_name_to_type(name)
+            if connection_class is None:
+                raise ValueError(f"unknown connection type, expected one of {', '.join(CONNECTION_TYPES)}")
             connection = connection_class(config_dic)
             self.connections[name] = connection
         except Exception as e:
             logging.error(f"Failed to initialize connection {name}: {e}")
 
+    def is_configured(self, connection_name: str, verbose: bool = False, refresh: bool = False) -> bool:
+        """
+        Whether a connection is configured and reachable, checked at most once per TTL.
+
+        Each connection's is_configured is usually a network round trip (listing
+        models, fetching the account, an RPC ping), so its result is cached for
+        health_ttl seconds, until an action on the connection fails or until the
+        connection is reconfigured.
+
+        Args:
+            connection_name: Name of a registered connection
+            verbose: Log why the check failed
+            refresh: Check again even if a cached result is still fresh
+        """
+        connection = self.connections[connection_name]
+        if not refresh:
+            with self._health_lock:
+                cached = self._health.get(connection_name)
+            if cached is not None and time.monotonic() - cached[1] < self.health_ttl:
+                return cached[0]
+        checked_at = time.monotonic()
+        try:
+            configured = bool(connection.is_configured(verbose=verbose))
+        except Exception as e:
+            if verbose:
+                logging.error(f"\nConfiguration check of {connection_name} failed: {e}")
+            configured = False
+        with self._health_lock:
+            self._health[connection_name] = (configured, checked_at)
+        return configured
+
+    def invalidate_health(self, connection_name: Optional[str] = None) -> None:
+        """Forget the cached check of one connection, or of every connection"""
+        with self._health_lock:
+            if connection_name is None:
+                self._health.clear()
+            else:
+                self._health.pop(connection_name, None)
+
+    def connection_statuses(self, refresh: bool = False) -> Dict[str, bool]:
+        """
+        Configuration status of every connection.
+
+        Connections without a fresh cached result are checked in parallel, so
+        listing many connections costs about one round trip instead of one each.
+
+        Args:
+            refresh: Check every connection again, ignoring cached results
+        """
+        names = list(self.connections)
+        if len(names) <= 1:
+            return {name: self.is_configured(name, refresh=refresh) for name in names}
+        with ThreadPoolExecutor(max_workers=min(len(names), MAX_PARALLEL_CHECKS)) as executor:
+            results = executor.map(lambda name: self.is_configured(name, refresh=refresh), names)
+            return dict(zip(names, results))
+
     def _check_connection(self, connection_string: str) -> bool:
         try:
-            connection = self.connections[connection_string]
-            return connection.is_configured(verbose=True)
+            return self.is_configured(connection_string, verbose=True, refresh=True)
         except KeyError:
             logging.error(
                 "\nUnknown connection. Try 'list-connections' to see all supported connections."
@@ -113,6 +157,7 @@ class ConnectionManager:
         try:
             connection = self.connections[connection_name]
             success = connection.configure()
+            self.invalidate_health(connection_name)
 
             if success:
                 logging.info(
@@ -131,21 +176,21 @@ class ConnectionManager:
             logging.error(f"\nAn error occurred: {e}")
             return False
 
-    def list_connections(self) -> None:
+    def list_connections(self, refresh: bool = False) -> Dict[str, bool]:
         """List all available connections and their status"""
+        statuses = self.connection_statuses(refresh=refresh)
         logging.info("\nAVAILABLE CONNECTIONS:")
-        for name, connection in self.connections.items():
-            status = (
-                "✅ Configured" if connection.is_configured() else "❌ Not Configured"
-            )
+        for name, configured in statuses.items():
+            status = "✅ Configured" if configured else "❌ Not Configured"
             logging.info(f"- {name}: {status}")
+        return statuses
 
     def list_actions(self, connection_name: str) -> None:
         """List all available actions for a specific connection"""
         try:
             connection = self.connections[connection_name]
 
-            if connection.is_configured():
+            if self.is_configured(connection_name):
                 logging.info(
                     f"\n✅ {connection_name} is configured. You can use any of its actions."
                 )
@@ -176,7 +221,7 @@ class ConnectionManager:
         try:
             connection = self.connections[connection_name]
 
-            if not connection.is_configured():
+            if not self.is_configured(connection_name):
                 logging.error(
                     f"\nError: Connection '{connection_name}' is not configured"
                 )
@@ -213,7 +258,12 @@ class ConnectionManager:
                 )
                 return None
 
-            return connection.perform_action(action_name, kwargs)
+            try:
+                return connection.perform_action(action_name, kwargs)
+            except Exception:
+                # The failure may be an expired key or a dead endpoint, so check again next time
+                self.invalidate_health(connection_name)
+                raise
 
         except Exception as e:
             logging.error(
@@ -226,5 +276,5 @@ class ConnectionManager:
         return [
             name
             for name, conn in self.connections.items()
-            if conn.is_configured() and getattr(conn, "is_llm_provider", lambda: False)
+            if getattr(conn, "is_llm_provider", lambda: False) and self.is_configured(name)
         ]
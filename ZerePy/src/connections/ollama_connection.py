@@ -1,11 +1,20 @@
 import logging
 import requests
 import json
-from typing import Dict, Any
+import numpy as np
+from typing import Dict, Any, List
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.helpers.embedding_cache import shared_embedding_cache, text_list
 
 logger = logging.getLogger("connections.ollama_connection")
 
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+# Ollama has no hard batch limit; smaller batches keep a local model's memory in check
+MAX_EMBEDDING_BATCH = 256
+MAX_EMBEDDING_BATCH_CHARS = 200000
+# Seconds to wait for one embedding batch, including loading the model on first use
+EMBEDDING_TIMEOUT = 120
+
 
 class OllamaConnectionError(Exception):
     """Base exception for Ollama connection errors"""
@@ -53,6 +62,14 @@ class OllamaConnection(BaseConnection):
                 ],
                 description="Generate text using Ollama's running model"
             ),
+            "embed-text": Action(
+                name="embed-text",
+                parameters=[
+                    ActionParameter("texts", True, text_list, "Text or list of texts to embed"),
+                    ActionParameter("model", False, str, "Embedding model to use")
+                ],
+                description="Embed texts with Ollama, reusing cached vectors"
+            ),
         }
 
     def configure(self) -> bool:
@@ -128,6 +145,28 @@ class OllamaConnection(BaseConnection):
         except Exception as e:
             raise OllamaAPIError(f"Text generation failed: {e}")
 
+    def embed_vectors(self, texts: List[str], model: str = None) -> np.ndarray:
+        """Embed texts with Ollama as a float32 array; only texts not in the embedding cache are sent"""
+        model = model or self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL)
+
+        def fetch(batch: List[str]) -> List[List[float]]:
+            response = requests.post(f"{self.base_url}/api/embed", json={"model": model, "input": batch},
+                                     timeout=EMBEDDING_TIMEOUT)
+            if response.status_code != 200:
+                raise OllamaAPIError(f"API error: {response.status_code} - {response.text}")
+            return response.json()["embeddings"]
+
+        try:
+            cache = shared_embedding_cache(self.config.get("embedding_cache_dir"))
+            return cache.embed(f"ollama:{model}", texts, fetch, MAX_EMBEDDING_BATCH, MAX_EMBEDDING_BATCH_CHARS,
+                               dtype=self.config.get("embedding_dtype", "float32"))
+        except Exception as e:
+            raise OllamaAPIError(f"Embedding failed: {e}")
+
+    def embed_text(self, texts: List[str], model: str = None, **kwargs) -> List[List[float]]:
+        """Embed texts with Ollama, one JSON-serialisable vector per text"""
+        return self.embed_vectors(texts, model).tolist()
+
     def perform_action(self, action_name: str, kwargs) -> Any:
         if action_name not in self.actions:
             raise KeyError(f"Unknown action: {action_name}")
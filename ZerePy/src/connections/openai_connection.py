@@ -1,12 +1,19 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 from dotenv import load_dotenv, set_key
+import numpy as np
 from openai import OpenAI
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.helpers.embedding_cache import shared_embedding_cache, text_list
 
 logger = logging.getLogger("connections.openai_connection")
 
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+# Request limits of the embeddings endpoint: 2048 inputs and about 300k tokens
+MAX_EMBEDDING_BATCH = 2048
+MAX_EMBEDDING_BATCH_CHARS = 600000
+
 class OpenAIConnectionError(Exception):
     """Base exception for OpenAI connection errors"""
     pass
@@ -65,6 +72,14 @@ class OpenAIConnection(BaseConnection):
                 name="list-models",
                 parameters=[],
                 description="List all available OpenAI models"
+            ),
+            "embed-text": Action(
+                name="embed-text",
+                parameters=[
+                    ActionParameter("texts", True, text_list, "Text or list of texts to embed"),
+                    ActionParameter("model", False, str, "Embedding model to use")
+                ],
+                description="Embed texts with OpenAI, reusing cached vectors"
             )
         }
 
@@ -190,6 +205,25 @@ class OpenAIConnection(BaseConnection):
         except Exception as e:
             raise OpenAIAPIError(f"Listing models failed: {e}")
     
+    def embed_vectors(self, texts: List[str], model: str = None) -> np.ndarray:
+        """Embed texts with OpenAI as a float32 array; only texts not in the embedding cache are sent"""
+        model = model or self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL)
+
+        def fetch(batch: List[str]) -> List[List[float]]:
+            response = self._get_client().embeddings.create(model=model, input=batch)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+        try:
+            cache = shared_embedding_cache(self.config.get("embedding_cache_dir"))
+            return cache.embed(f"openai:{model}", texts, fetch, MAX_EMBEDDING_BATCH, MAX_EMBEDDING_BATCH_CHARS,
+                               dtype=self.config.get("embedding_dtype", "float32"))
+        except Exception as e:
+            raise OpenAIAPIError(f"Embedding failed: {e}")
+
+    def embed_text(self, texts: List[str], model: str = None, **kwargs) -> List[List[float]]:
+        """Embed texts with OpenAI, one JSON-serialisable vector per text"""
+        return self.embed_vectors(texts, model).tolist()
+
     def perform_action(self, action_name: str, kwargs) -> Any:
         """Execute a Twitter action with validation"""
         if action_name not in self.actions:
@@ -1,14 +1,20 @@
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List
 from dotenv import load_dotenv, set_key
+import numpy as np
 from together import Together
 from together.types.models import ModelObject, ModelType
 
 from src.connections.base_connection import BaseConnection, Action, ActionParameter
+from src.helpers.embedding_cache import shared_embedding_cache, text_list
 
 logger = logging.getLogger("connections.together_ai_connection")
 
+DEFAULT_EMBEDDING_MODEL = "togethercomputer/m2-bert-80M-8k-retrieval"
+MAX_EMBEDDING_BATCH = 128
+MAX_EMBEDDING_BATCH_CHARS = 200000
+
 class TogetherAIConnectionError(Exception):
     """Base exception for Together AI connection errors"""
     pass
@@ -66,6 +72,14 @@ class TogetherAIConnection(BaseConnection):
                 name="list-models",
                 parameters=[],
                 description="List all available Together AI models"
+            ),
+            "embed-text": Action(
+                name="embed-text",
+                parameters=[
+                    ActionParameter("texts", True, text_list, "Text or list of texts to embed"),
+                    ActionParameter("model", False, str, "Embedding model to use")
+                ],
+                description="Embed texts with Together AI, reusing cached vectors"
             )
         }
 
@@ -176,6 +190,25 @@ class TogetherAIConnection(BaseConnection):
         except Exception as e:
             raise TogetherAIAPIError(f"Listing models failed: {e}")
     
+    def embed_vectors(self, texts: List[str], model: str = None) -> np.ndarray:
+        """Embed texts with Together AI as a float32 array; only texts not in the embedding cache are sent"""
+        model = model or self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL)
+
+        def fetch(batch: List[str]) -> List[List[float]]:
+            response = self._get_client().embeddings.create(model=model, input=batch)
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+        try:
+            cache = shared_embedding_cache(self.config.get("embedding_cache_dir"))
+            return cache.embed(f"together:{model}", texts, fetch, MAX_EMBEDDING_BATCH, MAX_EMBEDDING_BATCH_CHARS,
+                               dtype=self.config.get("embedding_dtype", "float32"))
+        except Exception as e:
+            raise TogetherAIAPIError(f"Embedding failed: {e}")
+
+    def embed_text(self, texts: List[str], model: str = None, **kwargs) -> List[List[float]]:
+        """Embed texts with Together AI, one JSON-serialisable vector per text"""
+        return self.embed_vectors(texts, model).tolist()
+
     def perform_action(self, action_name: str, kwargs) -> Any:
         """Execute a Together AI action with validation"""
         if action_name not in self.actions:
@@ -0,0 +1,307 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger("helpers.embedding_cache")
+
+DEFAULT_EMBEDDING_CACHE_DIR = Path(".cache") / "embeddings"
+DTYPES = ("float32", "int8")
+DIGEST_BYTES = hashlib.sha256().digest_size
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def text_list(value: Union[str, Iterable[str]]) -> List[str]:
+    """A single text or a batch of texts as a list of strings"""
+    if isinstance(value, str):
+        return [value]
+    try:
+        return [str(text) for text in value]
+    except TypeError:
+        raise ValueError(f"Expected a text or a list of texts, got {type(value).__name__}")
+
+
+def batches(texts: Sequence[str], max_items: int, max_chars: Optional[int] = None) -> Iterator[List[str]]:
+    """
+    Split texts into consecutive batches within a provider's request limits.
+
+    A text longer than max_chars on its own still gets a batch of its own; the
+    provider truncates or rejects it.
+    """
+    batch: List[str] = []
+    chars = 0
+    for text in texts:
+        if batch and (len(batch) >= max_items or (max_chars and chars + len(text) > max_chars)):
+            yield batch
+            batch, chars = [], 0
+        batch.append(text)
+        chars += len(text)
+    if batch:
+        yield batch
+
+
+def _check_dtype(dtype: str) -> None:
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {', '.join(DTYPES)}")
+
+
+def quantize_rows(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric int8 quantisation with one scale per row.
+
+    Returns:
+        int8 rows and float32 scales such that rows * scales[:, None] approximates vectors
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127 if vectors.size else np.zeros(len(vectors), np.float32)
+    scales = scales.astype(np.float32)
+    safe = np.where(scales > 0, scales, 1)
+    return np.clip(np.rint(vectors / safe[:, None]), -127, 127).astype(np.int8), scales
+
+
+class ModelStore:
+    """
+    Append-only vector files of one model, shared by the embedding cache and the
+    recommendation profile vector store.
+
+    ``<name>.keys`` holds the sha256 digest of each row's text, ``<name>.vectors``
+    the rows themselves and, for int8 stores, ``<name>.scales`` one float32 scale per
+    row. Rows are always appended vectors first and keys last, so a row only counts
+    once its key is on disk; a partially written tail is cut off on load.
+    """
+
+    def __init__(self, directory: Path, model: str, dtype: str):
+        slug = _UNSAFE_CHARS.sub("_", model)[:64]
+        name = f"{slug}-{hashlib.sha256(model.encode()).hexdigest()[:8]}"
+        self.model = model
+        self.meta_path = directory / f"{name}.json"
+        self.keys_path = directory / f"{name}.keys"
+        self.vectors_path = directory / f"{name}.vectors"
+        self.scales_path = directory / f"{name}.scales"
+
+        self.dtype = dtype
+        self.dimensions: Optional[int] = None
+        if self.meta_path.exists():
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+            # An existing store keeps the dtype it was created with
+            self.dtype = meta["dtype"]
+            self.dimensions = meta["dimensions"]
+
+        # Text digest -> row; of rows with the same text, the last one
+        self.rows: Dict[bytes, int] = {}
+        self._count = 0
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        if self.dimensions:
+            self._load()
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dimensions * np.dtype(self.dtype).itemsize
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _load(self) -> None:
+        sizes = [os.path.getsize(self.keys_path) // DIGEST_BYTES if self.keys_path.exists() else 0,
+                 os.path.getsize(self.vectors_path) // self._row_bytes if self.vectors_path.exists() else 0]
+        if self.dtype == "int8":
+            sizes.append(os.path.getsize(self.scales_path) // 4 if self.scales_path.exists() else 0)
+        self.truncate(min(sizes))
+
+    def truncate(self, count: int) -> None:
+        """Drop every row from ``count`` on"""
+        self._truncate(count)
+        self._count = count
+        self.rows = {digest: row for row, digest in enumerate(self.digests())}
+
+    def digests(self) -> List[bytes]:
+        """Text digest of every row, in row order"""
+        if not self._count:
+            return []
+        with open(self.keys_path, "rb") as f:
+            data = f.read(self._count * DIGEST_BYTES)
+        return [data[row * DIGEST_BYTES:(row + 1) * DIGEST_BYTES] for row in range(self._count)]
+
+    def _truncate(self, count: int) -> None:
+        files = [(self.keys_path, DIGEST_BYTES), (self.vectors_path, self._row_bytes)]
+        if self.dtype == "int8":
+            files.append((self.scales_path, 4))
+        for path, row_bytes in files:
+            if not path.exists():
+                path.touch()
+            if os.path.getsize(path) != count * row_bytes:
+                logger.warning(f"Cutting {path} back to {count} complete rows")
+                os.truncate(path, count * row_bytes)
+
+    def mapped(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Read-only maps of the vectors and, for int8 stores, the scales, remapped once rows were appended"""
+        if not self._count:
+            return np.zeros((0, self.dimensions or 0), self.dtype), np.zeros(0, np.float32)
+        if self._vectors is None or len(self._vectors) != self._count:
+            self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r",
+                                      shape=(self._count, self.dimensions))
+            if self.dtype == "int8":
+                self._scales = np.memmap(self.scales_path, dtype=np.float32, mode="r", shape=(self._count,))
+        return self._vectors, self._scales
+
+    def read(self, rows: Sequence[int]) -> np.ndarray:
+        vectors, scales = self.mapped()
+        index = np.asarray(rows, dtype=np.int64)
+        if self.dtype == "int8":
+            return vectors[index].astype(np.float32) * scales[index][:, None]
+        return np.array(vectors[index], dtype=np.float32)
+
+    def append(self, digests: List[bytes], vectors: np.ndarray) -> None:
+        if self.dimensions is None:
+            self.dimensions = int(vectors.shape[1])
+            tmp_path = self.meta_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"model": self.model, "dimensions": self.dimensions, "dtype": self.dtype}, f)
+            os.replace(tmp_path, self.meta_path)
+            self._truncate(0)
+        elif vectors.shape[1] != self.dimensions:
+            raise ValueError(f"{self.model} returned {vectors.shape[1]}-dimensional vectors, "
+                             f"the cache holds {self.dimensions}-dimensional ones")
+
+        if self.dtype == "int8":
+            rows, scales = quantize_rows(vectors)
+            with open(self.scales_path, "ab") as f:
+                f.write(scales.tobytes())
+        else:
+            rows = vectors.astype(np.float32)
+        with open(self.vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(rows).tobytes())
+        with open(self.keys_path, "ab") as f:
+            f.write(b"".join(digests))
+        for digest in digests:
+            self.rows[digest] = self._count
+            self._count += 1
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model, text hash).
+
+    Each model's vectors live in append-only files that are memory-mapped for
+    reads, as float32 or as int8 with a per-row scale at a quarter of the size. A
+    text embedded once is never sent to the provider again, in this process or
+    any later one. One process should write a cache directory at a time.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, dtype: str = "float32"):
+        """
+        Args:
+            directory: Directory of the vector files
+            dtype: "float32", or "int8" to store quantised vectors; the default for new models
+        """
+        _check_dtype(dtype)
+        self.directory = Path(directory) if directory else DEFAULT_EMBEDDING_CACHE_DIR
+        self.dtype = dtype
+        self.stats = {"hits": 0, "misses": 0, "requests": 0}
+        self._stores: Dict[str, ModelStore] = {}
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _store(self, model: str, dtype: Optional[str] = None) -> ModelStore:
+        store = self._stores.get(model)
+        if store is None:
+            _check_dtype(dtype or self.dtype)
+            store = self._stores[model] = ModelStore(self.directory, model, dtype or self.dtype)
+        return store
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get(self, model: str, texts: Sequence[str], dtype: Optional[str] = None) -> List[Optional[np.ndarray]]:
+        """Cached vectors of texts, None for texts not embedded with the model yet"""
+        with self._lock:
+            store = self._store(model, dtype)
+            rows = [store.rows.get(self.digest(text)) for text in texts]
+            found = [row for row in rows if row is not None]
+            vectors = iter(store.read(found)) if found else iter(())
+            return [next(vectors) if row is not None else None for row in rows]
+
+    def put(self, model: str, texts: Sequence[str], vectors: np.ndarray, dtype: Optional[str] = None) -> None:
+        """Store vectors of texts; texts already cached are skipped"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            store = self._store(model, dtype)
+            digests, keep, seen = [], [], set()
+            for position, text in enumerate(texts):
+                digest = self.digest(text)
+                if digest not in store.rows and digest not in seen:
+                    seen.add(digest)
+                    digests.append(digest)
+                    keep.append(position)
+            if digests:
+                store.append(digests, vectors[keep])
+
+    def embed(self, model: str, texts: Sequence[str], fetch: Callable[[List[str]], Sequence[Sequence[float]]],
+              max_batch_size: int, max_batch_chars: Optional[int] = None,
+              dtype: Optional[str] = None) -> np.ndarray:
+        """
+        Vectors of texts, fetching only the ones not cached yet.
+
+        Missing texts are de-duplicated and fetched in batches within the given
+        limits, and each batch is stored as soon as it arrives.
+
+        Args:
+            model: Cache namespace, e.g. "openai:text-embedding-3-small"
+            texts: Texts to embed
+            fetch: Provider call embedding one batch of texts, in order
+            max_batch_size: Most texts per provider request
+            max_batch_chars: Most characters per provider request
+            dtype: "float32" or "int8" storage if the model has no vectors in the
+                cache yet, the cache's dtype if not given; existing models keep theirs
+
+        Returns:
+            float32 array with one row per text
+        """
+        cached = self.get(model, texts, dtype)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        self.stats["hits"] += len(texts) - sum(vector is None for vector in cached)
+        self.stats["misses"] += len(missing)
+
+        for batch in batches(missing, max_batch_size, max_batch_chars):
+            vectors = np.asarray(fetch(batch), dtype=np.float32)
+            if vectors.ndim != 2 or vectors.shape[0] != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got an array of shape {vectors.shape}")
+            self.stats["requests"] += 1
+            self.put(model, batch, vectors, dtype)
+        if missing:
+            logger.debug(f"Embedded {len(missing)} new texts with {model}, {len(texts) - len(missing)} cached")
+            # Read back from the store so int8 caches return the same dequantised vectors on every call
+            cached = self.get(model, texts, dtype)
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(cached)
+
+
+_shared_caches: Dict[Path, EmbeddingCache] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_embedding_cache(directory: Optional[Path] = None) -> EmbeddingCache:
+    """
+    One cache per directory for every connection in the process, so they share a writer.
+
+    Connections that store vectors as different dtypes pass theirs to embed, which
+    applies it per model.
+    """
+    directory = Path(directory) if directory else DEFAULT_EMBEDDING_CACHE_DIR
+    with _shared_lock:
+        key = directory.resolve()
+        if key not in _shared_caches:
+            _shared_caches[key] = EmbeddingCache(directory)
+        return _shared_caches[key]
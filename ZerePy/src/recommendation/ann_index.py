@@ -0,0 +1,238 @@
+import logging
+import math
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.recommendation.matching_index import MatchingIndex
+from src.recommendation.profile import Profile
+from src.recommendation.profile_table import REQUIREMENT_PREDICATES
+from src.recommendation.ranking import DEFAULT_TOP_K, top_k_indices
+from src.recommendation.skill_extractor import expand_requirement
+from src.recommendation.skill_vocabulary import WORD_BITS, pack_masks
+
+logger = logging.getLogger("recommendation.ann_index")
+
+# Query weights of required and preferred skills when a requirement has no skill_weights
+REQUIRED_WEIGHT = 1.0
+PREFERRED_WEIGHT = 0.5
+DEFAULT_NPROBE = 8
+DEFAULT_SAMPLE_SIZE = 50000
+DEFAULT_ITERATIONS = 8
+# Rows converted to a dense block at a time when assigning profiles to clusters
+ASSIGN_CHUNK = 4096
+
+
+def _pairs(bits: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(row, skill id) pairs of the set bits of a packed skill matrix, in row chunks"""
+    for offset in range(0, len(bits), ASSIGN_CHUNK):
+        chunk = np.ascontiguousarray(bits[offset:offset + ASSIGN_CHUNK], dtype="<u8")
+        unpacked = np.unpackbits(chunk.view(np.uint8), axis=1, bitorder="little")
+        rows, skills = np.nonzero(unpacked)
+        yield rows + offset, skills
+
+
+class SkillVectorIndex:
+    """
+    Inverted-file (IVF) index over TF-IDF weighted skill vectors.
+
+    Every profile is a sparse vector with one idf-weighted entry per skill,
+    normalised to unit length. Profiles are clustered with spherical k-means into
+    ``nlist`` lists; a query scans only the ``nprobe`` lists whose centroids are
+    closest to it and scores those candidates exactly. With nlist around sqrt(N),
+    a query touches about ``nprobe * sqrt(N)`` profiles instead of all N, and
+    raising nprobe trades latency for recall.
+
+    The index is built from a MatchingIndex and rebuilt by ``refresh`` once that
+    index's version moves on. A MatchingIndex created with ``ann_candidates`` uses
+    it to pick the candidates of requirements that only list preferred skills.
+    """
+
+    def __init__(self, index: MatchingIndex, nlist: Optional[int] = None, nprobe: int = DEFAULT_NPROBE,
+                 sample_size: int = DEFAULT_SAMPLE_SIZE, iterations: int = DEFAULT_ITERATIONS, seed: int = 0):
+        """
+        Args:
+            index: Matching index whose profiles are searched
+            nlist: Number of clusters, defaults to the square root of the profile count
+            nprobe: Clusters scanned per query unless a query asks for another number
+            sample_size: Profiles the centroids are trained on
+            iterations: k-means iterations
+            seed: Seed of the training sample and initial centroids
+        """
+        self.index = index
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.sample_size = sample_size
+        self.iterations = iterations
+        self.seed = seed
+        self.version: Optional[int] = None
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """
+        Rebuild the index if the matching index changed since the last build.
+
+        Returns:
+            True if the index was rebuilt
+        """
+        with self.index.lock:
+            if self.version == self.index.version:
+                return False
+            version = self.index.version
+            self._profiles: List[Profile] = list(self.index.profiles)
+            self._columns = {name: values.copy() for name, values in self.index.profile_table.columns.items()}
+            words = self.index.vocabulary.words
+            self._bits = pack_masks(self.index.skill_index.skill_masks, words)
+            self.vocabulary = self.index.vocabulary
+        self._build()
+        self.version = version
+        return True
+
+    def _build(self) -> None:
+        rows, skills = len(self._bits), self._bits.shape[1] * WORD_BITS
+        pairs = list(_pairs(self._bits))
+        pair_rows = np.concatenate([chunk_rows for chunk_rows, _ in pairs]) if pairs else np.empty(0, np.int64)
+        pair_skills = np.concatenate([chunk_skills for _, chunk_skills in pairs]) if pairs else np.empty(0, np.int64)
+
+        document_frequency = np.bincount(pair_skills, minlength=skills)
+        self.idf = (np.log((1 + rows) / (1 + document_frequency)) + 1).astype(np.float32)
+        squared = np.bincount(pair_rows, weights=self.idf[pair_skills] ** 2, minlength=rows)
+        # Profiles without skills get a zero vector and never score above zero
+        self.norms = np.sqrt(squared).astype(np.float32)
+        self.norms[self.norms == 0] = np.inf
+
+        nlist = self.nlist or max(1, int(math.sqrt(rows)))
+        nlist = max(1, min(nlist, rows))
+        rng = np.random.default_rng(self.seed)
+        sample = np.sort(rng.choice(rows, size=min(rows, self.sample_size), replace=False)) if rows else np.empty(0, int)
+        self.centroids = self._train(sample, nlist, skills, rng)
+
+        # Cluster lists in CSR form: rows of cluster c are list_rows[list_offsets[c]:list_offsets[c + 1]]
+        assignment = self._assign(np.arange(rows), skills)
+        order = np.argsort(assignment, kind="stable")
+        self.list_rows = order.astype(np.int64)
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(self.centroids)))])
+        logger.info(f"Indexed {rows} skill vectors in {len(self.centroids)} lists")
+
+    def _dense(self, rows: np.ndarray, skills: int) -> np.ndarray:
+        """Unit TF-IDF vectors of some rows as a dense (len(rows), skills) block"""
+        block = np.zeros((len(rows), skills), dtype=np.float32)
+        for pair_rows, pair_skills in _pairs(self._bits[rows]):
+            block[pair_rows, pair_skills] = self.idf[pair_skills] / self.norms[rows[pair_rows]]
+        return block
+
+    def _assign(self, rows: np.ndarray, skills: int) -> np.ndarray:
+        assignment = np.empty(len(rows), dtype=np.int64)
+        for offset in range(0, len(rows), ASSIGN_CHUNK):
+            chunk = rows[offset:offset + ASSIGN_CHUNK]
+            assignment[offset:offset + len(chunk)] = np.argmax(self._dense(chunk, skills) @ self.centroids.T, axis=1)
+        return assignment
+
+    def _train(self, sample: np.ndarray, nlist: int, skills: int, rng: np.random.Generator) -> np.ndarray:
+        """Spherical k-means over the sampled vectors"""
+        vectors = self._dense(sample, skills)
+        if not len(vectors):
+            return np.zeros((1, skills), dtype=np.float32)
+        centroids = vectors[rng.choice(len(vectors), size=min(nlist, len(vectors)), replace=False)].copy()
+        for _ in range(self.iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            lengths = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(lengths > 0, sums / np.maximum(lengths, 1e-12), centroids)
+        return centroids.astype(np.float32)
+
+    def query_vector(self, requirement: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sparse query vector of a requirement.
+
+        A "skill_weights" mapping such as {"React": 1, "TypeScript": 1, "AWS": 0.3}
+        is used as is; otherwise required skills weigh REQUIRED_WEIGHT and preferred
+        ones PREFERRED_WEIGHT. Skills unknown to the index are dropped.
+
+        Returns:
+            Skill ids and their idf-weighted query weights, scaled to unit length
+        """
+        weights: Dict[int, float] = {}
+        # The vocabulary is shared with the live matching index
+        with self.index.lock:
+            if requirement.get("skill_weights"):
+                wanted = list(requirement["skill_weights"].items())
+            else:
+                requirement = expand_requirement(requirement, self.vocabulary)
+                wanted = [(skill, PREFERRED_WEIGHT) for skill in requirement.get("preferred_skills", [])]
+                wanted += [(skill, REQUIRED_WEIGHT) for skill in requirement.get("required_skills", [])]
+            for skill, weight in wanted:
+                skill_id = self.vocabulary.lookup(skill)
+                # Skills first seen after the build have no idf and are dropped
+                if skill_id is not None and skill_id < len(self.idf):
+                    weights[skill_id] = float(weight)
+        skill_ids = np.fromiter(weights, dtype=np.int64, count=len(weights))
+        values = np.fromiter(weights.values(), dtype=np.float32, count=len(weights))
+        values = values * self.idf[skill_ids]
+        length = np.linalg.norm(values)
+        return skill_ids, values / length if length else values
+
+    def _scores(self, rows: np.ndarray, skill_ids: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Dot products of the query with the unit vectors of some rows"""
+        scores = np.zeros(len(rows), dtype=np.float32)
+        bits = self._bits[rows]
+        for skill_id, weight in zip(skill_ids.tolist(), weights.tolist()):
+            word, bit = divmod(skill_id, WORD_BITS)
+            has_skill = (bits[:, word] >> np.uint64(bit)) & np.uint64(1)
+            scores += has_skill * (weight * self.idf[skill_id])
+        return scores / self.norms[rows]
+
+    def _filtered(self, rows: np.ndarray, requirement: Dict) -> np.ndarray:
+        mask = np.ones(len(rows), dtype=bool)
+        for key, (column, comparison) in REQUIREMENT_PREDICATES.items():
+            threshold = requirement.get(key)
+            if threshold is None:
+                continue
+            values = self._columns[column][rows]
+            mask &= values >= threshold if comparison == ">=" else values <= threshold
+        return rows[mask]
+
+    def candidates(self, requirement: Dict, nprobe: Optional[int] = None) -> np.ndarray:
+        """Rows of the nprobe clusters closest to the requirement's query vector"""
+        skill_ids, weights = self.query_vector(requirement)
+        if not len(skill_ids):
+            return np.empty(0, dtype=np.int64)
+        closeness = self.centroids[:, skill_ids] @ weights
+        probes = top_k_indices(closeness, nprobe or self.nprobe)
+        return np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes])
+
+    def _top(self, rows: np.ndarray, requirement: Dict, top_k: Optional[int]) -> List[Tuple[int, float]]:
+        rows = self._filtered(np.sort(rows), requirement)
+        skill_ids, weights = self.query_vector(requirement)
+        scores = self._scores(rows, skill_ids, weights)
+        best = top_k_indices(scores, int(top_k or requirement.get("top_k", DEFAULT_TOP_K)))
+        return [(int(rows[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+    def search_rows(self, requirement: Dict, top_k: Optional[int] = None,
+                    nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Approximate top-k rows by cosine similarity of skill vectors.
+
+        Numeric requirements (min_experience, max_hourly_rate, ...) are applied to
+        the candidates; required skills are not enforced, they only weigh more.
+
+        Returns:
+            List of (row id, similarity) tuples, best first
+        """
+        return self._top(self.candidates(requirement, nprobe), requirement, top_k)
+
+    def exact_rows(self, requirement: Dict, top_k: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Exact top-k by scoring every profile, for measuring the recall of search_rows"""
+        return self._top(np.arange(len(self._bits)), requirement, top_k)
+
+    def search(self, requirement: Dict, top_k: Optional[int] = None,
+               nprobe: Optional[int] = None) -> List[Tuple[Profile, float]]:
+        """
+        Approximate top-k profiles for a soft skill requirement.
+
+        Returns:
+            List of (profile, similarity) tuples, best first
+        """
+        return [(self._profiles[row], score) for row, score in self.search_rows(requirement, top_k, nprobe)]
@@ -0,0 +1,221 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import requests
+from eth_utils.abi import collapse_if_tuple
+from web3 import Web3
+
+logger = logging.getLogger("recommendation.batch_reads")
+
+# Multicall3 is deployed at the same address on nearly every EVM chain
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    }
+]
+
+DEFAULT_CHUNK_SIZE = 200
+
+# Array getters have no length function; entries are read in windows of this size
+# until one of them reverts past the end
+ARRAY_PROBE = 8
+
+
+class BatchReader:
+    """
+    Reads many view calls of the marketplace contract in a few round trips.
+
+    Calls are packed into Multicall3 ``aggregate3`` calls when the chain has Multicall3
+    deployed, and otherwise sent as JSON-RPC batches of ``eth_call`` requests, or as
+    single ``eth_call`` requests to endpoints that do not accept batches. Either way
+    each request carries at most ``chunk_size`` calls, and a call that reverts yields
+    None instead of failing its whole chunk.
+    """
+
+    def __init__(self, web3: Web3, contract, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 multicall_address: Optional[str] = MULTICALL3_ADDRESS):
+        """
+        Args:
+            web3: Web3 connection
+            contract: Marketplace contract
+            chunk_size: Maximum number of calls per request
+            multicall_address: Multicall3 deployment, or None to always use JSON-RPC batches
+        """
+        self.web3 = web3
+        self.contract = contract
+        self.chunk_size = max(1, chunk_size)
+        self.multicall = None
+        if multicall_address is not None:
+            self.multicall = web3.eth.contract(address=Web3.to_checksum_address(multicall_address),
+                                               abi=MULTICALL3_ABI)
+        self._multicall_deployed: Optional[bool] = None
+        # Cleared once the endpoint answers a JSON-RPC batch with an error
+        self._rpc_batches = True
+
+    def _use_multicall(self) -> bool:
+        if self.multicall is None:
+            return False
+        if self._multicall_deployed is None:
+            try:
+                self._multicall_deployed = len(self.web3.eth.get_code(self.multicall.address)) > 0
+            except Exception as e:
+                logger.warning(f"Could not look up Multicall3, using JSON-RPC batches: {e}")
+                self._multicall_deployed = False
+        return self._multicall_deployed
+
+    def _decode(self, function, data: bytes) -> Optional[Any]:
+        output_types = [collapse_if_tuple(output) for output in function.abi["outputs"]]
+        try:
+            values = self.web3.codec.decode(output_types, bytes(data))
+        except Exception:
+            return None
+        return values[0] if len(values) == 1 else tuple(values)
+
+    def _aggregate(self, functions: Sequence) -> List[Optional[bytes]]:
+        calls = [(function.address, True, function._encode_transaction_data()) for function in functions]
+        results = self.multicall.functions.aggregate3(calls).call()
+        return [data if success else None for success, data in results]
+
+    def _single_calls(self, functions: Sequence) -> List[Optional[bytes]]:
+        results = []
+        for function in functions:
+            try:
+                results.append(self.web3.eth.call({"to": function.address,
+                                                   "data": function._encode_transaction_data()}))
+            except Exception:
+                results.append(None)
+        return results
+
+    def _rpc_batch(self, functions: Sequence) -> List[Optional[bytes]]:
+        endpoint = getattr(self.web3.provider, "endpoint_uri", None)
+        if endpoint is None or not self._rpc_batches:
+            # Providers without a URL (IPC, websocket, tester) and endpoints that
+            # refused a batch get one eth_call each
+            return self._single_calls(functions)
+
+        payload = [
+            {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "eth_call",
+                "params": [{"to": function.address, "data": function._encode_transaction_data()}, "latest"],
+            }
+            for request_id, function in enumerate(functions)
+        ]
+        response = requests.post(str(endpoint), json=payload, timeout=30)
+        try:
+            replies = response.json()
+        except ValueError:
+            replies = None
+        if isinstance(replies, dict) and "error" in replies:
+            # A single error object instead of a list, e.g. "batch requests are not supported"
+            logger.warning(f"{endpoint} refused a JSON-RPC batch, sending one eth_call per read: "
+                           f"{replies['error']}")
+            self._rpc_batches = False
+            return self._single_calls(functions)
+        response.raise_for_status()
+        if not isinstance(replies, list):
+            raise ValueError(f"Unexpected reply to a JSON-RPC batch from {endpoint}: {response.text[:200]}")
+
+        replies = {reply.get("id"): reply for reply in replies if isinstance(reply, dict)}
+        results = []
+        for request_id in range(len(functions)):
+            reply = replies.get(request_id, {})
+            results.append(bytes.fromhex(reply["result"][2:]) if "result" in reply else None)
+        return results
+
+    def call(self, functions: Iterable) -> List[Optional[Any]]:
+        """
+        Run bound view functions, e.g. ``contract.functions.jobs(job_id)``, in batches.
+
+        Returns:
+            Decoded return value of each function in order, None where the call reverted
+        """
+        functions = list(functions)
+        send = self._aggregate if self._use_multicall() else self._rpc_batch
+        results = []
+        for start in range(0, len(functions), self.chunk_size):
+            chunk = functions[start:start + self.chunk_size]
+            for function, data in zip(chunk, send(chunk)):
+                results.append(None if data is None else self._decode(function, data))
+        return results
+
+    def jobs(self, job_ids: Sequence[bytes]) -> List[Optional[Dict]]:
+        """
+        State of many jobs.
+
+        Returns:
+            One dictionary with title, description, budget, employer, freelancer and
+            completed per job id, None where the read failed
+        """
+        results = self.call(self.contract.functions.jobs(job_id) for job_id in job_ids)
+        fields = ("title", "description", "budget", "employer", "freelancer", "completed")
+        return [dict(zip(fields, result)) if result is not None else None for result in results]
+
+    def freelancer_profiles(self, addresses: Sequence[str]) -> List[Optional[Dict]]:
+        """
+        Registrations of many freelancers.
+
+        Returns:
+            One dictionary with name, ipfs_hash and exists per address, None where the read failed
+        """
+        results = self.call(self.contract.functions.freelancerProfiles(address) for address in addresses)
+        fields = ("name", "ipfs_hash", "exists")
+        return [dict(zip(fields, result)) if result is not None else None for result in results]
+
+    def _array_entries(self, getter: str, job_ids: Sequence[bytes]) -> List[List[str]]:
+        entries: List[List[str]] = [[] for _ in job_ids]
+        # Jobs whose array may continue past what has been read so far
+        open_jobs = list(range(len(job_ids)))
+        while open_jobs:
+            functions = [
+                getattr(self.contract.functions, getter)(job_ids[job], len(entries[job]) + offset)
+                for job in open_jobs for offset in range(ARRAY_PROBE)
+            ]
+            results = self.call(functions)
+            still_open = []
+            for position, job in enumerate(open_jobs):
+                window = results[position * ARRAY_PROBE:(position + 1) * ARRAY_PROBE]
+                for value in window:
+                    if value is None:
+                        break
+                    entries[job].append(value)
+                else:
+                    still_open.append(job)
+            open_jobs = still_open
+        return entries
+
+    def job_applications(self, job_ids: Sequence[bytes]) -> List[List[str]]:
+        """Addresses of the freelancers who applied to each job"""
+        return self._array_entries("jobApplications", job_ids)
+
+    def job_recommendations(self, job_ids: Sequence[bytes]) -> List[List[str]]:
+        """Addresses of the freelancers recommended on-chain for each job"""
+        return self._array_entries("jobRecommendations", job_ids)
@@ -0,0 +1,389 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.helpers.embedding_cache import DIGEST_BYTES, EmbeddingCache, ModelStore
+from src.recommendation.matching_index import MatchingIndex
+from src.recommendation.profile import Profile, as_profile
+from src.recommendation.ranking import DEFAULT_TOP_K, top_k_indices
+from src.recommendation.skill_extractor import profile_text
+from src.recommendation.skill_vocabulary import normalize_skill
+
+logger = logging.getLogger("recommendation.embedding_store")
+
+DEFAULT_VECTOR_STORE_DIR = Path(".cache") / "profile_vectors"
+DEFAULT_DIMENSIONS = 256
+# Rows dequantised at a time during a search; blocks that fit in cache scan about three times faster than 64k rows
+DEFAULT_CHUNK_ROWS = 8192
+# Profiles embedded per embedder call when syncing an index
+SYNC_BATCH = 1024
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9#+]+(?:[./\-][a-z0-9#+]+)*")
+
+
+@lru_cache(maxsize=65536)
+def _feature(token: str, dimensions: int) -> Tuple[int, float]:
+    digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+    return digest % dimensions, 1.0 if digest >> 63 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Deterministic feature-hashing embedder that needs no network or model.
+
+    Words and word pairs are hashed into ``dimensions`` signed buckets with
+    sublinear term frequency and the result is scaled to unit length. Texts
+    sharing vocabulary get similar vectors; synonyms do not, which is what a
+    provider embedding adds. The same text always gets the same vector, in any
+    process.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS):
+        self.dimensions = dimensions
+        self.model = f"hashing-{dimensions}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN_PATTERN.findall(normalize_skill(text))
+            counts = Counter(words + [f"{first} {second}" for first, second in zip(words, words[1:])])
+            for token, count in counts.items():
+                bucket, sign = _feature(token, self.dimensions)
+                vectors[row, bucket] += sign * (1 + math.log(count))
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(lengths > 0, lengths, 1)
+
+
+class ConnectionEmbedder:
+    """Embeds through a ConnectionManager's embed-text action, e.g. OpenAI or Ollama"""
+
+    def __init__(self, connection_manager, provider: str, model: Optional[str] = None):
+        self.connection_manager = connection_manager
+        self.provider = provider
+        self.model = f"{provider}:{model or 'default'}"
+        self._params = [model] if model else []
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.connection_manager.perform_action(self.provider, "embed-text", [list(texts)] + self._params)
+        if vectors is None:
+            raise RuntimeError(f"embed-text failed on {self.provider}")
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def embedding_text(profile: Union[Profile, Dict], text: Optional[str] = None) -> str:
+    """
+    Text a profile is embedded from: its skills, bio and portfolio.
+
+    Args:
+        profile: Profile or profile dict
+        text: Bio and portfolio text kept for a Profile, e.g. MatchingIndex.text(row);
+            read from the profile itself if it is a dict
+    """
+    if text is None:
+        text = profile_text(profile) if isinstance(profile, dict) else ""
+    parts = [", ".join(as_profile(profile).skills), text]
+    return "\n".join(part for part in parts if part)
+
+
+def requirement_text(requirement: Dict) -> str:
+    """Text a job requirement is embedded from"""
+    parts = [str(requirement[key]) for key in ("title", "description") if requirement.get(key)]
+    skills = list(requirement.get("required_skills", [])) + list(requirement.get("preferred_skills", []))
+    if skills:
+        parts.append(", ".join(skills))
+    return "\n".join(parts)
+
+
+class ProfileVectorStore:
+    """
+    Append-only store of int8 quantised profile vectors with brute-force search.
+
+    Each row is a unit vector quantised to int8 with its own float32 scale, so a
+    384-dimensional vector costs 388 bytes instead of 1536. The vectors, scales and
+    text digests live in the same append-only, memory-mapped files as the embedding
+    cache (ModelStore), next to a ``.ids`` file with the JSON-encoded profile key of
+    every row.
+
+    Storing a vector under a key that already has one appends a new row and
+    retires the old one, so the files only ever grow and a crash can at worst cut
+    off a partially written last row, which is dropped on load. Searches scan the
+    live rows in chunks, dequantising one chunk at a time.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, model: str = "", chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """
+        Args:
+            directory: Directory of the store files
+            model: Name of the embedder the vectors come from; each model has files of
+                its own, as similarities across models are meaningless
+            chunk_rows: Rows scored per vectorised block during a search
+        """
+        self.directory = Path(directory) if directory else DEFAULT_VECTOR_STORE_DIR
+        self.model = model
+        self.chunk_rows = chunk_rows
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors = ModelStore(self.directory, model, "int8")
+        self.ids_path = self.vectors.keys_path.with_suffix(".ids")
+
+        # key -> (row, text digest) of the live row of every key
+        self.rows: Dict[str, Tuple[int, bytes]] = {}
+        self._keys: List[str] = []
+        self._live = np.zeros(0, dtype=bool)
+        self._lock = threading.RLock()
+        if len(self.vectors) or self.ids_path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def dimensions(self) -> Optional[int]:
+        return self.vectors.dimensions
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the vectors and scales of every row, retired rows included"""
+        return len(self._keys) * ((self.dimensions or 0) + 4)
+
+    def _load(self) -> None:
+        keys = []
+        ids_bytes = 0
+        if self.ids_path.exists():
+            with open(self.ids_path, "rb") as f:
+                for line in f:
+                    if len(keys) == len(self.vectors) or not line.endswith(b"\n"):
+                        break
+                    keys.append(json.loads(line))
+                    ids_bytes += len(line)
+        count = len(keys)
+        # Ids are appended last, so rows without one were never completely stored
+        if len(self.vectors) != count:
+            logger.warning(f"Cutting {self.directory} back to {count} complete rows")
+            self.vectors.truncate(count)
+        if self.ids_path.exists() and os.path.getsize(self.ids_path) != ids_bytes:
+            os.truncate(self.ids_path, ids_bytes)
+
+        self._keys = keys
+        self._live = np.zeros(count, dtype=bool)
+        for row, (key, digest) in enumerate(zip(keys, self.vectors.digests())):
+            previous = self.rows.get(key)
+            if previous is not None:
+                self._live[previous[0]] = False
+            self.rows[key] = (row, digest)
+            self._live[row] = True
+        logger.info(f"Loaded {len(self.rows)} profile vectors ({count} rows) from {self.directory}")
+
+    def digest(self, key: str) -> Optional[bytes]:
+        """Digest of the text the key's vector was embedded from, None if the key has no vector"""
+        entry = self.rows.get(key)
+        return entry[1] if entry else None
+
+    def add(self, keys: Sequence[str], vectors: np.ndarray, digests: Optional[Sequence[bytes]] = None) -> None:
+        """
+        Store vectors under keys, replacing the vectors stored under them before.
+
+        Vectors are scaled to unit length, so search scores are cosine similarities.
+
+        Args:
+            keys: Profile keys, e.g. freelancer addresses
+            vectors: float array with one row per key
+            digests: EmbeddingCache.digest of the text each vector was embedded from,
+                to skip re-embedding it later
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(keys) != len(vectors):
+            raise ValueError(f"Got {len(keys)} keys for {len(vectors)} vectors")
+        if not len(keys):
+            return
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        digests = list(digests) if digests is not None else [bytes(DIGEST_BYTES)] * len(keys)
+
+        with self._lock:
+            self.vectors.append(digests, vectors / np.where(lengths > 0, lengths, 1))
+            with open(self.ids_path, "a") as f:
+                f.writelines(json.dumps(str(key)) + "\n" for key in keys)
+
+            start = len(self._keys)
+            live = np.ones(len(keys), dtype=bool)
+            retired = []
+            for offset, (key, digest) in enumerate(zip(keys, digests)):
+                previous = self.rows.get(key)
+                if previous is not None:
+                    if previous[0] >= start:
+                        live[previous[0] - start] = False
+                    else:
+                        retired.append(previous[0])
+                self.rows[key] = (start + offset, digest)
+            self._keys.extend(str(key) for key in keys)
+            self._live = np.concatenate([self._live, live])
+            self._live[retired] = False
+
+    def vector(self, key: str) -> Optional[np.ndarray]:
+        """Dequantised vector stored under a key"""
+        with self._lock:
+            entry = self.rows.get(key)
+            if entry is None:
+                return None
+            return self.vectors.read([entry[0]])[0]
+
+    def search(self, query: np.ndarray, top_k: int = DEFAULT_TOP_K,
+               keys: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Keys of the vectors with the highest dot product with a query.
+
+        Args:
+            query: Query vector, ideally of unit length
+            top_k: Number of results
+            keys: Restrict the search to these keys, e.g. profiles passing hard filters
+
+        Returns:
+            List of (key, score) tuples, best first
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            vectors, scales = self.vectors.mapped()
+            if keys is None:
+                rows = np.flatnonzero(self._live)
+            else:
+                rows = np.sort(np.fromiter((self.rows[key][0] for key in keys if key in self.rows), dtype=np.int64))
+            if not len(rows) or top_k <= 0:
+                return []
+            if len(query) != self.dimensions:
+                raise ValueError(f"Expected a {self.dimensions}-dimensional query, got {len(query)}")
+            keys_by_row = self._keys
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for offset in range(0, len(rows), self.chunk_rows):
+            chunk = rows[offset:offset + self.chunk_rows]
+            # Contiguous chunks are sliced straight out of the map instead of gathered
+            if chunk[-1] - chunk[0] + 1 == len(chunk):
+                block, block_scales = vectors[chunk[0]:chunk[-1] + 1], scales[chunk[0]:chunk[-1] + 1]
+            else:
+                block, block_scales = vectors[chunk], scales[chunk]
+            scores = (block.astype(np.float32) @ query) * block_scales
+            # Running top-k: earlier winners come first and tie in row order, so ties go to the lower row
+            candidate_rows = np.concatenate([best_rows, chunk])
+            candidate_scores = np.concatenate([best_scores, scores])
+            keep = top_k_indices(candidate_scores, top_k)
+            best_rows, best_scores = candidate_rows[keep], candidate_scores[keep]
+        return [(keys_by_row[row], float(score)) for row, score in zip(best_rows.tolist(), best_scores.tolist())]
+
+
+def profile_keys(index: MatchingIndex) -> List[str]:
+    """
+    Vector store key of every row of an index.
+
+    Rows are keyed by the key they were upserted under, the freelancer address for
+    an index kept by RegistrationSyncer. Rows added without one fall back to the
+    profile's address, then its id, then its name.
+
+    Raises:
+        ValueError: If two rows would share a key, so one would overwrite the other's vector
+    """
+    keys = index.row_keys()
+    rows_by_key: Dict[str, int] = {}
+    for row, key in enumerate(keys):
+        if not key:
+            profile = index.profiles[row]
+            key = keys[row] = str(profile.address or profile.id or profile.name or f"row:{row}")
+        if key in rows_by_key:
+            raise ValueError(f"Rows {rows_by_key[key]} and {row} of the index share the vector key {key!r}; "
+                             f"upsert the profiles under distinct keys")
+        rows_by_key[key] = row
+    return keys
+
+
+class SemanticMatcher:
+    """
+    Ranks the profiles of a MatchingIndex by embedding similarity to a job.
+
+    The matching index still applies the hard filters: explicitly required skills
+    and the numeric bounds. The profiles passing them are ranked by the cosine
+    similarity of their stored vectors to the job's vector. Profiles are embedded
+    once and re-embedded only when the text they are embedded from changes, so
+    ranking a known profile set costs a single embedding of the job. Bios and
+    portfolios are part of that text for indexes built with ``keep_text``.
+    """
+
+    def __init__(self, embedder=None, store: Optional[ProfileVectorStore] = None):
+        """
+        Args:
+            embedder: Object with a ``model`` name and ``embed(texts) -> array``,
+                defaults to the offline HashingEmbedder
+            store: Vector store, defaults to one per embedder model under .cache/
+        """
+        self.embedder = embedder or HashingEmbedder()
+        if store is None:
+            store = ProfileVectorStore(model=self.embedder.model)
+        self.store = store
+        # (index id, version, row keys) of the index the stored vectors were last synced with
+        self._synced: Optional[Tuple[int, int, List[str]]] = None
+
+    def sync(self, index: MatchingIndex) -> int:
+        """
+        Embed the index's profiles that have no vector or whose text changed.
+
+        Returns:
+            Number of profiles embedded
+
+        Raises:
+            ValueError: If two profiles of the index share a key, see profile_keys
+        """
+        with index.lock:
+            if self._synced is not None and self._synced[:2] == (id(index), index.version):
+                return 0
+            version = index.version
+            keys = profile_keys(index)
+            profiles = list(index.profiles)
+            texts = [index.text(row) for row in range(len(profiles))]
+
+        pending = []
+        for key, profile, source_text in zip(keys, profiles, texts):
+            text = embedding_text(profile, source_text)
+            digest = EmbeddingCache.digest(text)
+            if self.store.digest(key) != digest:
+                pending.append((key, text, digest))
+        for start in range(0, len(pending), SYNC_BATCH):
+            batch = pending[start:start + SYNC_BATCH]
+            vectors = self.embedder.embed([text for _, text, _ in batch])
+            self.store.add([key for key, _, _ in batch], vectors, [digest for _, _, digest in batch])
+        if pending:
+            logger.info(f"Embedded {len(pending)} of {len(profiles)} profiles with {self.embedder.model}")
+        self._synced = (id(index), version, keys)
+        return len(pending)
+
+    def rank(self, index: MatchingIndex, requirement: Dict) -> List[Tuple[Profile, float]]:
+        """
+        Best ``requirement["top_k"]`` profiles of an index by similarity to the job.
+
+        Skills a job only mentions in its title or description are not required,
+        they count towards the similarity instead.
+
+        Returns:
+            List of (profile, similarity) tuples, best first
+        """
+        self.sync(index)
+        with index.lock:
+            candidate_ids = index.skill_index.candidates(requirement.get("required_skills", []))
+            rows = index.profile_table.filter(requirement, candidate_ids)
+            synced_index, version, keys = self._synced
+            if synced_index != id(index) or version != index.version:
+                # Changed since the sync above; profiles without a vector yet are left out
+                keys = profile_keys(index)
+            by_key = {keys[row]: index.profiles[row] for row in rows}
+        if not by_key:
+            return []
+        query = self.embedder.embed([requirement_text(requirement)])[0]
+        ranked = self.store.search(query, int(requirement.get("top_k", DEFAULT_TOP_K)), by_key)
+        return [(by_key[key], score) for key, score in ranked]
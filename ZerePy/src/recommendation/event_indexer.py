@@ -0,0 +1,314 @@
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+
+logger = logging.getLogger("recommendation.event_indexer")
+
+DEFAULT_DATABASE_PATH = Path(".cache") / "marketplace_events.db"
+
+# Events of smartcontract/src/Escrow.sol, which has no ABI file in the agent
+ESCROW_EVENTS_ABI = [
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "bytes32", "name": "jobId", "type": "bytes32"},
+            {"indexed": True, "internalType": "address", "name": account, "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "amount", "type": "uint256"},
+        ],
+        "name": name,
+        "type": "event",
+    }
+    for name, account in (
+        ("FundsDeposited", "employer"),
+        ("FundsReleased", "freelancer"),
+        ("FundsRefunded", "employer"),
+    )
+]
+
+# Every event table is keyed by its log position, so rolling back a reorg is a
+# DELETE on block_number and re-ingesting a range is idempotent
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS blocks (number INTEGER PRIMARY KEY, hash TEXT NOT NULL);
+
+CREATE TABLE IF NOT EXISTS job_created (
+    block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, tx_hash TEXT NOT NULL,
+    job_id TEXT NOT NULL, title TEXT NOT NULL, employer TEXT NOT NULL, budget TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS job_applied (
+    block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, tx_hash TEXT NOT NULL,
+    job_id TEXT NOT NULL, freelancer TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS job_assigned (
+    block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, tx_hash TEXT NOT NULL,
+    job_id TEXT NOT NULL, freelancer TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS job_completed (
+    block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, tx_hash TEXT NOT NULL,
+    job_id TEXT NOT NULL, freelancer TEXT NOT NULL, payout TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE TABLE IF NOT EXISTS escrow_events (
+    block_number INTEGER NOT NULL, log_index INTEGER NOT NULL, tx_hash TEXT NOT NULL,
+    job_id TEXT NOT NULL, kind TEXT NOT NULL, account TEXT NOT NULL, amount TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+
+CREATE INDEX IF NOT EXISTS job_created_job ON job_created (job_id);
+CREATE INDEX IF NOT EXISTS job_applied_job ON job_applied (job_id);
+CREATE INDEX IF NOT EXISTS job_applied_freelancer ON job_applied (freelancer);
+CREATE INDEX IF NOT EXISTS job_assigned_job ON job_assigned (job_id);
+CREATE INDEX IF NOT EXISTS job_completed_job ON job_completed (job_id);
+CREATE INDEX IF NOT EXISTS escrow_events_job ON escrow_events (job_id, kind);
+
+-- Job ids are generateJobId(title, employer), so a job re-created after cancelJob
+-- reuses its id. Only the latest JobCreated of an id is current, and only events
+-- after it describe the current job; its escrow starts at the latest deposit, which
+-- createJob makes just before emitting JobCreated. Views are re-created on every
+-- start so existing databases pick up changes to them.
+DROP VIEW IF EXISTS latest_job_created;
+CREATE VIEW latest_job_created AS
+SELECT c.* FROM job_created c
+WHERE NOT EXISTS (
+    SELECT 1 FROM job_created n
+    WHERE n.job_id = c.job_id AND (n.block_number, n.log_index) > (c.block_number, c.log_index)
+);
+
+DROP VIEW IF EXISTS current_job_applied;
+CREATE VIEW current_job_applied AS
+SELECT p.* FROM job_applied p
+JOIN latest_job_created c
+    ON c.job_id = p.job_id AND (p.block_number, p.log_index) > (c.block_number, c.log_index);
+
+DROP VIEW IF EXISTS job_status;
+CREATE VIEW job_status AS
+SELECT
+    c.job_id, c.title, c.employer, c.budget, c.block_number AS created_block,
+    (SELECT a.freelancer FROM job_assigned a
+     WHERE a.job_id = c.job_id AND (a.block_number, a.log_index) > (c.block_number, c.log_index)
+     ORDER BY a.block_number DESC, a.log_index DESC LIMIT 1) AS freelancer,
+    EXISTS (SELECT 1 FROM job_completed d
+            WHERE d.job_id = c.job_id AND (d.block_number, d.log_index) > (c.block_number, c.log_index)) AS completed,
+    EXISTS (SELECT 1 FROM escrow_events e
+            WHERE e.job_id = c.job_id AND e.kind = 'refunded'
+            AND (e.block_number, e.log_index) > (c.block_number, c.log_index)) AS cancelled
+FROM latest_job_created c;
+
+DROP VIEW IF EXISTS escrow_status;
+CREATE VIEW escrow_status AS
+SELECT
+    e.job_id,
+    SUM(CASE WHEN e.kind = 'deposited' THEN 1 ELSE 0 END) > 0 AS funded,
+    SUM(CASE WHEN e.kind = 'released' THEN 1 ELSE 0 END) > 0 AS released,
+    SUM(CASE WHEN e.kind = 'refunded' THEN 1 ELSE 0 END) > 0 AS refunded,
+    MAX(CASE WHEN e.kind = 'deposited' THEN e.amount END) AS amount
+FROM escrow_events e
+WHERE NOT EXISTS (
+    SELECT 1 FROM escrow_events d
+    WHERE d.job_id = e.job_id AND d.kind = 'deposited'
+    AND (d.block_number, d.log_index) > (e.block_number, e.log_index)
+)
+GROUP BY e.job_id;
+"""
+
+EVENT_TABLES = ("job_created", "job_applied", "job_assigned", "job_completed", "escrow_events")
+
+ESCROW_KINDS = {"FundsDeposited": "deposited", "FundsReleased": "released", "FundsRefunded": "refunded"}
+
+
+class EventIndexer:
+    """
+    Mirrors marketplace and escrow events into an indexed SQLite database.
+
+    Each poll fetches the logs of both contracts for the blocks after the checkpoint
+    with a single eth_getLogs and inserts them with executemany in one transaction.
+    The hashes of recently indexed blocks are kept next to the events; when one no
+    longer matches the chain, the events above the last matching block are deleted
+    and those blocks are indexed again.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        contract,
+        escrow_address: Optional[str] = None,
+        database_path: Optional[Path] = None,
+        start_block: int = 0,
+        reorg_depth: int = 64,
+        max_blocks_per_poll: int = 2000,
+    ):
+        """
+        Args:
+            web3: Web3 connection
+            contract: Marketplace contract
+            escrow_address: Escrow contract, read from the marketplace's escrowContract() if not given
+            database_path: SQLite file, ":memory:" for a throwaway database
+            start_block: First block to index when the database is new
+            reorg_depth: Number of recent block hashes kept to detect reorgs
+            max_blocks_per_poll: Upper bound on blocks read by one sync_once call
+        """
+        self.web3 = web3
+        self.contract = contract
+        if escrow_address is None:
+            escrow_address = contract.functions.escrowContract().call()
+        self.escrow = web3.eth.contract(address=Web3.to_checksum_address(escrow_address), abi=ESCROW_EVENTS_ABI)
+        self.reorg_depth = reorg_depth
+        self.max_blocks_per_poll = max_blocks_per_poll
+
+        database_path = str(database_path or DEFAULT_DATABASE_PATH)
+        if database_path != ":memory:":
+            Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(database_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.RLock()
+
+        # topic0 -> event class used to decode logs of that type
+        self._events = {}
+        for source in (self.contract, self.escrow):
+            for abi in source.abi:
+                if abi["type"] == "event":
+                    self._events[event_abi_to_log_topic(abi)] = source.events[abi["name"]]
+        with self.db:
+            self.db.execute("INSERT OR IGNORE INTO sync_state VALUES ('next_block', ?)", (start_block,))
+
+    @property
+    def next_block(self) -> int:
+        return self.db.execute("SELECT value FROM sync_state WHERE key = 'next_block'").fetchone()[0]
+
+    def _block_hash(self, number: int) -> str:
+        return Web3.to_hex(self.web3.eth.get_block(number)["hash"])
+
+    def _find_reorg(self) -> Optional[int]:
+        """Highest indexed block still on the canonical chain, if a recorded block was reorged out"""
+        recorded = self.db.execute("SELECT number, hash FROM blocks ORDER BY number DESC").fetchall()
+        if not recorded or self._block_hash(recorded[0]["number"]) == recorded[0]["hash"]:
+            return None
+        for row in recorded[1:]:
+            if self._block_hash(row["number"]) == row["hash"]:
+                return row["number"]
+        # Deeper than reorg_depth: drop everything that can no longer be verified
+        return recorded[-1]["number"] - 1
+
+    def _rollback(self, ancestor: int) -> None:
+        logger.warning(f"Chain reorganisation detected, re-indexing from block {ancestor + 1}")
+        with self.db:
+            for table in EVENT_TABLES:
+                self.db.execute(f"DELETE FROM {table} WHERE block_number > ?", (ancestor,))
+            self.db.execute("DELETE FROM blocks WHERE number > ?", (ancestor,))
+            self.db.execute("UPDATE sync_state SET value = ? WHERE key = 'next_block'", (ancestor + 1,))
+
+    def _rows(self, logs: List) -> Tuple[Dict[str, List[Tuple]], Dict[int, str]]:
+        rows: Dict[str, List[Tuple]] = {table: [] for table in EVENT_TABLES}
+        block_hashes = {}
+        for log in logs:
+            event = self._events.get(bytes(log["topics"][0])) if log["topics"] else None
+            if event is None:
+                continue
+            decoded = event().process_log(log)
+            args = decoded["args"]
+            position = (log["blockNumber"], log["logIndex"], Web3.to_hex(log["transactionHash"]))
+            job_id = Web3.to_hex(args["jobId"])
+            block_hashes[log["blockNumber"]] = Web3.to_hex(log["blockHash"])
+            name = decoded["event"]
+            if name == "JobCreated":
+                rows["job_created"].append((*position, job_id, args["title"], args["employer"], str(args["budget"])))
+            elif name == "JobApplied":
+                rows["job_applied"].append((*position, job_id, args["freelancer"]))
+            elif name == "JobAssigned":
+                rows["job_assigned"].append((*position, job_id, args["freelancer"]))
+            elif name == "JobCompleted":
+                rows["job_completed"].append((*position, job_id, args["freelancer"], str(args["payout"])))
+            elif name in ESCROW_KINDS:
+                account = args.get("employer", args.get("freelancer"))
+                rows["escrow_events"].append((*position, job_id, ESCROW_KINDS[name], account, str(args["amount"])))
+        return rows, block_hashes
+
+    def sync_once(self) -> int:
+        """
+        Index the blocks after the checkpoint, first undoing any reorganised blocks.
+
+        Returns:
+            Number of events inserted
+        """
+        with self.lock:
+            ancestor = self._find_reorg()
+            if ancestor is not None:
+                self._rollback(ancestor)
+
+            head = self.web3.eth.block_number
+            from_block = self.next_block
+            if head < from_block:
+                return 0
+            to_block = min(head, from_block + self.max_blocks_per_poll - 1)
+            logs = self.web3.eth.get_logs({
+                "fromBlock": from_block,
+                "toBlock": to_block,
+                "address": [self.contract.address, self.escrow.address],
+            })
+            rows, block_hashes = self._rows(logs)
+            block_hashes[to_block] = self._block_hash(to_block)
+
+            with self.db:
+                for table, values in rows.items():
+                    if values:
+                        placeholders = ", ".join("?" * len(values[0]))
+                        self.db.executemany(f"INSERT OR REPLACE INTO {table} VALUES ({placeholders})", values)
+                self.db.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?)", block_hashes.items())
+                self.db.execute("DELETE FROM blocks WHERE number <= ?", (to_block - self.reorg_depth,))
+                self.db.execute("UPDATE sync_state SET value = ? WHERE key = 'next_block'", (to_block + 1,))
+            return sum(len(values) for values in rows.values())
+
+    def sync(self) -> int:
+        """Call sync_once until the index has caught up with the chain head"""
+        inserted = 0
+        while True:
+            inserted += self.sync_once()
+            if self.next_block > self.web3.eth.block_number:
+                return inserted
+
+    def query(self, sql: str, parameters: Tuple = ()) -> List[Dict]:
+        with self.lock:
+            return [dict(row) for row in self.db.execute(sql, parameters)]
+
+    def open_jobs(self) -> List[Dict]:
+        """Jobs that are neither assigned, completed nor cancelled, newest first"""
+        return self.query(
+            "SELECT job_id, title, employer, budget, created_block FROM job_status "
+            "WHERE freelancer IS NULL AND NOT completed AND NOT cancelled ORDER BY created_block DESC"
+        )
+
+    def job(self, job_id: str) -> Optional[Dict]:
+        rows = self.query("SELECT * FROM job_status WHERE job_id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def applicants(self, job_id: str) -> List[str]:
+        """Freelancers who applied to the current job with an id, in application order"""
+        rows = self.query(
+            "SELECT freelancer FROM current_job_applied WHERE job_id = ? ORDER BY block_number, log_index", (job_id,)
+        )
+        return [row["freelancer"] for row in rows]
+
+    def applications_of(self, freelancer: str) -> List[str]:
+        """Current jobs a freelancer applied to"""
+        rows = self.query("SELECT DISTINCT job_id FROM current_job_applied WHERE freelancer = ?", (freelancer,))
+        return [row["job_id"] for row in rows]
+
+    def funded_escrows(self) -> List[Dict]:
+        """Escrows holding funds: deposited and neither released nor refunded"""
+        return self.query(
+            "SELECT job_id, amount FROM escrow_status WHERE funded AND NOT released AND NOT refunded"
+        )
+
+    def close(self) -> None:
+        self.db.close()
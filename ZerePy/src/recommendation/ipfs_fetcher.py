@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from src.recommendation.profile_cache import ProfileCache
+
+logger = logging.getLogger("recommendation.ipfs_fetcher")
+
+DEFAULT_IPFS_GATEWAYS = [
+    "https://ipfs.io/ipfs/",
+    "https://cloudflare-ipfs.com/ipfs/",
+    "https://gateway.pinata.cloud/ipfs/",
+    "https://dweb.link/ipfs/",
+]
+
+
+class GatewayStats:
+    """Latency and failure bookkeeping used to rank a single gateway"""
+
+    # Weight of the newest sample in the latency moving average
+    EWMA_ALPHA = 0.3
+    # Cool-down after a failure doubles with every consecutive failure, up to this cap
+    MAX_COOLDOWN = 60.0
+
+    def __init__(self, url: str, initial_latency: float = 1.0):
+        self.url = url
+        self.latency = initial_latency
+        self.failures = 0
+        self.successes = 0
+        self.cooldown_until = 0.0
+
+    def record_success(self, latency: float) -> None:
+        self.latency = (1 - self.EWMA_ALPHA) * self.latency + self.EWMA_ALPHA * latency
+        self.successes += 1
+        self.failures = max(0, self.failures - 1)
+        self.cooldown_until = 0.0
+
+    def record_failure(self, timeout: float) -> None:
+        # A failure counts as a full-timeout sample so a flaky gateway also looks slow
+        self.latency = (1 - self.EWMA_ALPHA) * self.latency + self.EWMA_ALPHA * timeout
+        self.failures += 1
+        cooldown = min(self.MAX_COOLDOWN, 0.5 * (2 ** self.failures))
+        self.cooldown_until = time.monotonic() + cooldown
+
+    def score(self, now: float) -> float:
+        """Lower is better. Gateways in cool-down sort after every healthy one."""
+        penalty = 1000.0 if now < self.cooldown_until else 0.0
+        return penalty + self.latency * (1 + self.failures)
+
+
+class IPFSFetcher:
+    """
+    Concurrent IPFS profile fetcher.
+
+    Every hash is requested from the best-ranked gateway first; if no answer arrives
+    within ``hedge_delay`` seconds the request is also sent to the next gateway, up to
+    ``hedge`` gateways in total, and the first valid response wins.
+    """
+
+    def __init__(
+        self,
+        gateways: Optional[List[str]] = None,
+        max_concurrency: int = 32,
+        hedge: int = 2,
+        hedge_delay: float = 0.75,
+        timeout: float = 10.0,
+        cache: Optional[ProfileCache] = None,
+    ):
+        """
+        Args:
+            gateways: Gateway URL prefixes the CID is appended to
+            max_concurrency: Maximum number of hashes being fetched at the same time
+            hedge: Maximum number of gateways raced for a single hash
+            hedge_delay: Seconds to wait for a gateway before hedging to the next one
+            timeout: Per-request timeout in seconds
+            cache: Optional CID-keyed cache consulted before and filled after every fetch
+        """
+        gateways = gateways or DEFAULT_IPFS_GATEWAYS
+        self.gateways: Dict[str, GatewayStats] = {url: GatewayStats(url) for url in gateways}
+        self.max_concurrency = max(1, max_concurrency)
+        self.hedge = max(1, min(hedge, len(self.gateways)))
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.cache = cache
+
+    def _ranked_gateways(self) -> List[GatewayStats]:
+        now = time.monotonic()
+        return sorted(self.gateways.values(), key=lambda stats: stats.score(now))
+
+    async def _fetch_from_gateway(
+        self, session: aiohttp.ClientSession, stats: GatewayStats, ipfs_hash: str
+    ) -> Dict:
+        started = time.monotonic()
+        try:
+            async with session.get(
+                f"{stats.url}{ipfs_hash}", timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                response.raise_for_status()
+                profile = json.loads(await response.text())
+        except asyncio.CancelledError:
+            # Losing a race is not the gateway's fault
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError) as e:
+            stats.record_failure(self.timeout)
+            raise e
+        stats.record_success(time.monotonic() - started)
+        return profile
+
+    async def fetch(self, session: aiohttp.ClientSession, ipfs_hash: str) -> Optional[Dict]:
+        """
+        Fetch one profile, hedging across gateways.
+
+        Args:
+            session: Shared aiohttp session
+            ipfs_hash: IPFS hash of the freelancer profile
+
+        Returns:
+            Freelancer profile as a dictionary or None if every gateway failed
+        """
+        if self.cache is not None:
+            profile = self.cache.get(ipfs_hash)
+            if profile is not None:
+                return profile
+        return await self._fetch_uncached(session, ipfs_hash)
+
+    async def _fetch_uncached(self, session: aiohttp.ClientSession, ipfs_hash: str) -> Optional[Dict]:
+        """Hedged network fetch of a hash the cache was already asked for; fills the cache"""
+        candidates = self._ranked_gateways()[:self.hedge]
+        pending = set()
+        last_error = None
+
+        try:
+            for index, stats in enumerate(candidates):
+                pending.add(asyncio.create_task(self._fetch_from_gateway(session, stats, ipfs_hash)))
+                is_last = index == len(candidates) - 1
+                # Give the gateways already in flight a head start before hedging
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending,
+                        timeout=None if is_last else self.hedge_delay,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if not done:
+                        break
+                    for task in done:
+                        if task.exception() is None:
+                            profile = task.result()
+                            if self.cache is not None:
+                                self.cache.put(ipfs_hash, profile)
+                            return profile
+                        last_error = task.exception()
+                    if not is_last:
+                        # Every request in flight failed; hedge immediately
+                        break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        logger.warning(f"Error fetching profile {ipfs_hash}: {last_error}")
+        return None
+
+    async def stream(self, ipfs_hashes: List[str]) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Fetch profiles concurrently and yield them in arrival order.
+
+        Args:
+            ipfs_hashes: List of IPFS hashes
+
+        Yields:
+            (ipfs_hash, profile) tuples; hashes that could not be fetched are skipped
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+
+        # Cached profiles are served before any network request is made
+        missing = []
+        for ipfs_hash in ipfs_hashes:
+            profile = self.cache.get(ipfs_hash) if self.cache is not None else None
+            if profile is not None:
+                yield ipfs_hash, profile
+            else:
+                missing.append(ipfs_hash)
+        if not missing:
+            return
+
+        async with aiohttp.ClientSession() as session:
+            async def worker(ipfs_hash: str):
+                async with semaphore:
+                    # Already looked up in the cache above, so each miss is only counted once
+                    profile = await self._fetch_uncached(session, ipfs_hash)
+                await queue.put((ipfs_hash, profile))
+
+            tasks = [asyncio.create_task(worker(ipfs_hash)) for ipfs_hash in missing]
+            try:
+                for _ in range(len(tasks)):
+                    ipfs_hash, profile = await queue.get()
+                    if profile is not None:
+                        yield ipfs_hash, profile
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def fetch_many(self, ipfs_hashes: List[str]) -> Dict[str, Dict]:
+        """Fetch every hash and return a hash -> profile mapping"""
+        return {ipfs_hash: profile async for ipfs_hash, profile in self.stream(ipfs_hashes)}
+
+    def fetch_all(self, ipfs_hashes: List[str]) -> List[Dict]:
+        """
+        Blocking wrapper around ``fetch_many`` for synchronous callers.
+
+        Returns:
+            Fetched profiles in the order of ``ipfs_hashes``
+        """
+        fetched = asyncio.run(self.fetch_many(ipfs_hashes))
+        return [fetched[ipfs_hash] for ipfs_hash in ipfs_hashes if ipfs_hash in fetched]
@@ -0,0 +1,285 @@
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from web3 import Web3
+
+from src.recommendation.batch_reads import BatchReader
+from src.recommendation.event_indexer import EventIndexer
+from src.recommendation.profile import Profile, as_profile
+from src.recommendation.profile_table import REQUIREMENT_PREDICATES
+from src.recommendation.ranking import DEFAULT_TOP_K, top_k_indices
+from src.recommendation.skill_extractor import extractor_for
+from src.recommendation.skill_index import SkillIndex
+from src.recommendation.skill_vocabulary import SkillVocabulary
+
+logger = logging.getLogger("recommendation.job_index")
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+def extract_skills(text: str, vocabulary: SkillVocabulary) -> List[str]:
+    """
+    Canonical names of the vocabulary skills mentioned in free text.
+
+    Uses the vocabulary's cached Aho-Corasick extractor, so longer mentions win:
+    "smart contract" over "contract" and "node js" over "node".
+    """
+    return extractor_for(vocabulary).extract(str(text))
+
+
+def parse_job(title: str, description: str, vocabulary: SkillVocabulary) -> Dict:
+    """
+    Requirement of an on-chain job.
+
+    A description holding a JSON requirement object is used as is; otherwise the
+    required skills are the vocabulary skills mentioned in the title and description.
+    """
+    try:
+        parsed = json.loads(description)
+        if isinstance(parsed, dict):
+            return parsed
+    except (TypeError, ValueError):
+        pass
+    return {"required_skills": extract_skills(f"{title}\n{description}", vocabulary)}
+
+
+class JobIndex:
+    """
+    Open jobs indexed by required skill, for recommending jobs to a freelancer.
+
+    Uses the same skill vocabulary and posting lists as the freelancer side, with
+    jobs in place of profiles. Numeric requirements are held as one threshold column
+    per requirement key (NaN when a job does not set it), so checking a freelancer
+    against every candidate job is a handful of vectorised comparisons.
+    """
+
+    def __init__(self, vocabulary: Optional[SkillVocabulary] = None):
+        self.skill_index = SkillIndex(vocabulary=vocabulary)
+        self.jobs: List[Dict] = []
+        self.rows_by_job: Dict[str, int] = {}
+        self._size = 0
+        self._open = np.zeros(0, dtype=bool)
+        self._skill_counts = np.zeros(0, dtype=np.int64)
+        self._thresholds = {key: np.zeros(0) for key in REQUIREMENT_PREDICATES}
+        self.lock = threading.RLock()
+
+    @property
+    def vocabulary(self) -> SkillVocabulary:
+        return self.skill_index.vocabulary
+
+    def __len__(self) -> int:
+        return self._size
+
+    def open_jobs(self) -> int:
+        return int(self._open[:self._size].sum())
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._open)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 16)
+
+        def grow(buffer: np.ndarray, fill) -> np.ndarray:
+            grown = np.full(capacity, fill, dtype=buffer.dtype)
+            grown[:self._size] = buffer[:self._size]
+            return grown
+
+        self._open = grow(self._open, False)
+        self._skill_counts = grow(self._skill_counts, 0)
+        self._thresholds = {key: grow(buffer, np.nan) for key, buffer in self._thresholds.items()}
+
+    def upsert(self, job: Dict) -> int:
+        """
+        Add a job, or replace the job with the same job_id.
+
+        Args:
+            job: Dictionary with job_id, title, description, budget, employer and
+                open, plus the parsed requirement
+
+        Returns:
+            Row id of the job
+        """
+        with self.lock:
+            requirement = job.get("requirement", {})
+            # Closed jobs are dropped from the postings so they never become candidates
+            skills = requirement.get("required_skills", []) if job.get("open", True) else []
+            entry = {**job, "skills": skills}
+            row = self.rows_by_job.get(job["job_id"])
+            if row is None:
+                row = self.skill_index.add(entry)
+                self._reserve(row + 1)
+                self.jobs.append(job)
+                self.rows_by_job[job["job_id"]] = row
+                self._size += 1
+            else:
+                self.skill_index.replace(row, entry)
+                self.jobs[row] = job
+            self._open[row] = bool(job.get("open", True))
+            self._skill_counts[row] = len(self.vocabulary.ids(skills))
+            for key, buffer in self._thresholds.items():
+                value = requirement.get(key)
+                try:
+                    buffer[row] = np.nan if value is None else float(value)
+                except (TypeError, ValueError):
+                    buffer[row] = np.nan
+            return row
+
+    def close(self, job_id: str) -> bool:
+        """
+        Mark a job as no longer open, e.g. once it is assigned or completed.
+
+        Returns:
+            Whether the job was open
+        """
+        with self.lock:
+            row = self.rows_by_job.get(job_id)
+            if row is None or not self._open[row]:
+                return False
+            self.upsert({**self.jobs[row], "open": False})
+            return True
+
+    def learn_skills(self, skills: List[str]) -> int:
+        """
+        Add skills to the vocabulary and re-read the free-text open jobs that mention them.
+
+        Skills extracted from a job description can only be ones the vocabulary already
+        knew when the job was indexed, so skills learned later, e.g. from a structured
+        job or from registered freelancers, would otherwise never match older jobs
+        asking for them. Called while ingesting, never by queries.
+
+        Returns:
+            Number of jobs whose required skills changed
+        """
+        with self.lock:
+            new = [skill for skill in skills if not self.vocabulary.recognizes(skill)]
+            if not new:
+                return 0
+            for skill in new:
+                self.vocabulary.intern(skill)
+            changed = 0
+            for row in np.flatnonzero(self._open[:self._size]):
+                job = self.jobs[row]
+                requirement = parse_job(job.get("title", ""), job.get("description", ""), self.vocabulary)
+                if requirement != job.get("requirement"):
+                    self.upsert({**job, "requirement": requirement})
+                    changed += 1
+            return changed
+
+    def recommend(self, profile: Union[Profile, Dict], top_k: int = DEFAULT_TOP_K,
+                  min_coverage: float = 0.0) -> List[Tuple[Dict, float]]:
+        """
+        Open jobs best suited to a freelancer.
+
+        A job is a candidate when the freelancer has at least one of its required
+        skills and meets its numeric requirements. Candidates are scored by the share
+        of the job's required skills the freelancer has. Read-only: skills unknown to
+        the vocabulary are not required by any job, so they are ignored.
+
+        Args:
+            profile: Freelancer profile or CV in either schema
+            top_k: Number of jobs to return
+            min_coverage: Minimum share of a job's required skills, in [0, 1]
+
+        Returns:
+            List of (job, score) tuples, best first
+        """
+        profile = as_profile(profile)
+        with self.lock:
+            size = self._size
+            skill_ids = [skill_id for skill_id in map(self.vocabulary.lookup, profile.skills)
+                         if skill_id is not None]
+            postings = [self.skill_index.postings.get(skill_id, []) for skill_id in set(skill_ids)]
+            postings = [np.asarray(posting, dtype=np.int64) for posting in postings if len(posting)]
+            if not postings or not size:
+                return []
+            matched = np.bincount(np.concatenate(postings), minlength=size)[:size]
+
+            counts = self._skill_counts[:size]
+            coverage = np.divide(matched, counts, out=np.zeros(size), where=counts > 0)
+            eligible = self._open[:size] & (matched > 0) & (coverage >= min_coverage)
+
+            for key, (column, comparison) in REQUIREMENT_PREDICATES.items():
+                thresholds = self._thresholds[key][:size]
+                value = getattr(profile, column)
+                # A freelancer without the field only passes jobs that do not set a bound
+                passes = value >= thresholds if comparison == ">=" else value <= thresholds
+                eligible &= np.isnan(thresholds) | passes
+
+            rows = np.flatnonzero(eligible)
+            best = top_k_indices(coverage[rows], top_k)
+            return [(self.jobs[rows[i]], float(coverage[rows[i]])) for i in best]
+
+
+class JobSyncer:
+    """
+    Keeps a JobIndex in step with the jobs mirrored by an EventIndexer.
+
+    The indexer owns ingestion: the checkpoint, reorg handling and re-created job
+    ids. Each poll brings it up to date and compares its open jobs with the ones
+    indexed here. Jobs it no longer lists as open (assigned, completed, cancelled
+    or reorged out) are closed, and the descriptions of newly opened jobs, which
+    no event carries, are read together through a BatchReader.
+    """
+
+    def __init__(self, indexer: EventIndexer, index: Optional[JobIndex] = None,
+                 reader: Optional[BatchReader] = None):
+        """
+        Args:
+            indexer: Event indexer of the marketplace and escrow contracts
+            index: Index to keep up to date, a new one if not given
+            reader: Batched reader of contract state, a new one if not given
+        """
+        self.indexer = indexer
+        self.index = index if index is not None else JobIndex()
+        self.reader = reader if reader is not None else BatchReader(indexer.web3, indexer.contract)
+        # job_id -> block of the JobCreated event the indexed job was read for
+        self.created_blocks: Dict[str, int] = {}
+        self._sync_lock = threading.Lock()
+
+    def _index_job(self, job_id: str, job: Dict) -> None:
+        requirement = parse_job(job["title"], job["description"], self.index.vocabulary)
+        # Skills a structured job lists may be mentioned by older free-text jobs
+        self.index.learn_skills(requirement.get("required_skills", []))
+        self.index.upsert({"job_id": job_id, **job, "requirement": requirement})
+
+    def _read_jobs(self, job_ids: List[str]) -> List[Dict]:
+        states = self.reader.jobs([Web3.to_bytes(hexstr=job_id) for job_id in job_ids])
+        jobs = []
+        for job_id, state in zip(job_ids, states):
+            if state is None:
+                # Left out of created_blocks, so it is read again on the next poll
+                raise RuntimeError(f"Could not read job {job_id}")
+            jobs.append({
+                "title": state["title"],
+                "description": state["description"],
+                "budget": int(state["budget"]),
+                "employer": state["employer"],
+                # A job cancelled after the indexed events reads back deleted, with no employer
+                "open": (state["employer"] != ZERO_ADDRESS and state["freelancer"] == ZERO_ADDRESS
+                         and not state["completed"]),
+            })
+        return jobs
+
+    def sync_once(self) -> int:
+        """
+        Bring the event indexer and then the job index up to date.
+
+        Returns:
+            Number of jobs opened or closed
+        """
+        with self._sync_lock:
+            self.indexer.sync()
+            open_jobs = {row["job_id"]: row["created_block"] for row in self.indexer.open_jobs()}
+            changed = 0
+            for job_id in list(self.created_blocks):
+                if open_jobs.get(job_id) != self.created_blocks[job_id]:
+                    del self.created_blocks[job_id]
+                    changed += self.index.close(job_id)
+            new = [job_id for job_id in open_jobs if job_id not in self.created_blocks]
+            for job_id, job in zip(new, self._read_jobs(new)):
+                self._index_job(job_id, job)
+                self.created_blocks[job_id] = open_jobs[job_id]
+                changed += job["open"]
+            return changed
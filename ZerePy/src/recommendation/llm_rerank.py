@@ -0,0 +1,277 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.recommendation.profile import Profile, as_profile
+from src.recommendation.profile_table import REQUIREMENT_PREDICATES
+from src.recommendation.skill_vocabulary import SkillVocabulary
+
+logger = logging.getLogger("recommendation.llm_rerank")
+
+DEFAULT_RERANK_CACHE_PATH = Path(".cache") / "llm_rerank.json"
+DEFAULT_TOP_N = 20
+# Prompt budget for the whole request, job and instructions included
+DEFAULT_TOKEN_BUDGET = 1500
+# Below this a candidate summary is too short to judge, so fewer candidates are sent instead
+MIN_SUMMARY_TOKENS = 12
+# Rough token count of English and JSON text for the tokenizers of the supported providers
+CHARS_PER_TOKEN = 4
+
+RERANK_SYSTEM_PROMPT = (
+    "You rank freelancers for a job. Judge how well each candidate's skills and experience fit "
+    "the job, not only keyword overlap. Reply with only a JSON array of candidate labels, best fit first."
+)
+
+_LABEL_PATTERN = re.compile(r"\bC(\d+)\b")
+
+# Only used to resolve skill aliases when ordering a summary's skills
+_ALIASES = SkillVocabulary()
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+
+def job_text(requirement: Dict) -> str:
+    """Compact description of a job requirement for the prompt"""
+    lines = []
+    for key in ("title", "description"):
+        if requirement.get(key):
+            lines.append(f"{key.capitalize()}: {requirement[key]}")
+    if requirement.get("required_skills"):
+        lines.append(f"Required skills: {', '.join(requirement['required_skills'])}")
+    if requirement.get("preferred_skills"):
+        lines.append(f"Preferred skills: {', '.join(requirement['preferred_skills'])}")
+    bounds = [f"{key} {requirement[key]}" for key in REQUIREMENT_PREDICATES if requirement.get(key) is not None]
+    if bounds:
+        lines.append(f"Constraints: {', '.join(bounds)}")
+    return "\n".join(lines)
+
+
+def summarize_profile(profile: Union[Profile, Dict], max_tokens: int, wanted_skills: Sequence[str] = ()) -> str:
+    """
+    One-line summary of a profile within a token budget.
+
+    Skills the job asks for are listed first, so trimming the skill list to fit the
+    budget drops the least relevant skills.
+    """
+    profile = as_profile(profile)
+    wanted = {_ALIASES.normalize(skill) for skill in wanted_skills}
+    skills = sorted(profile.skills, key=lambda skill: _ALIASES.normalize(skill) not in wanted)
+
+    facts = []
+    if np.isfinite(profile.hourly_rate):
+        facts.append(f"${profile.hourly_rate:g}/h")
+    facts.append(f"{profile.experience:g}y exp")
+    if np.isfinite(profile.rating):
+        facts.append(f"rating {profile.rating:g}")
+    if profile.completed_jobs:
+        facts.append(f"{profile.completed_jobs:g} jobs done")
+    if np.isfinite(profile.availability_hours):
+        facts.append(f"{profile.availability_hours:g}h/week")
+
+    # Over budget, drop skills the job does not ask for first, then the least telling facts
+    while True:
+        summary = "; ".join(([f"skills {', '.join(skills)}"] if skills else []) + facts)
+        if estimate_tokens(summary) <= max_tokens:
+            return summary
+        if len(skills) > 3 and _ALIASES.normalize(skills[-1]) not in wanted:
+            skills = skills[:-1]
+        elif len(facts) > 2:
+            facts = facts[:-1]
+        elif skills:
+            skills = skills[:-1]
+        else:
+            return summary[:max_tokens * CHARS_PER_TOKEN]
+
+
+def parse_ranking(response: str, count: int) -> List[int]:
+    """
+    Candidate positions in the order an LLM response ranks them.
+
+    Labels that are unknown or repeated are ignored and candidates the response
+    leaves out keep their original relative order after the ranked ones.
+    """
+    labels: List[str] = []
+    match = re.search(r"\[.*?\]", response or "", re.DOTALL)
+    if match:
+        try:
+            labels = [str(label) for label in json.loads(match.group(0))]
+        except ValueError:
+            labels = []
+    if not labels:
+        labels = [f"C{number}" for number in _LABEL_PATTERN.findall(response or "")]
+
+    order: List[int] = []
+    for label in labels:
+        found = _LABEL_PATTERN.fullmatch(label.strip())
+        if found:
+            position = int(found.group(1)) - 1
+            if 0 <= position < count and position not in order:
+                order.append(position)
+    return order + [position for position in range(count) if position not in order]
+
+
+class LLMReranker:
+    """
+    Re-ranks a shortlist of freelancers for a job with one LLM call.
+
+    The job and budgeted summaries of the top-N candidates go into a single prompt
+    sent through a ConnectionManager's generate-text action, so a job costs one
+    request however many candidates it has. Orders are cached on disk by the hash
+    of the job and of the candidate set, so the same job over the same candidates
+    is never sent twice.
+    """
+
+    def __init__(self, connection_manager, provider: Optional[str] = None, model: Optional[str] = None,
+                 top_n: int = DEFAULT_TOP_N, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 cache_path: Optional[Path] = None, max_cache_entries: int = 10000):
+        """
+        Args:
+            connection_manager: ConnectionManager with at least one configured LLM provider
+            provider: Connection to use, defaults to the first configured LLM provider
+            model: Model passed to generate-text, defaults to the connection's own
+            top_n: Candidates sent to the LLM; the rest keep their score order
+            token_budget: Approximate prompt size limit in tokens
+            cache_path: JSON file of cached orders
+            max_cache_entries: Least recently used orders beyond this are evicted
+        """
+        self.connection_manager = connection_manager
+        self.provider = provider
+        self.model = model
+        self.top_n = top_n
+        self.token_budget = token_budget
+        self.cache_path = Path(cache_path) if cache_path else DEFAULT_RERANK_CACHE_PATH
+        self.max_cache_entries = max_cache_entries
+        self.stats = {"calls": 0, "cache_hits": 0, "failures": 0}
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._load_cache()
+
+    def _load_cache(self) -> None:
+        if not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "r") as f:
+                self._cache.update(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable re-rank cache {self.cache_path}: {e}")
+
+    def _save_cache(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _provider(self) -> Optional[str]:
+        if self.provider is None:
+            providers = self.connection_manager.get_model_providers()
+            self.provider = providers[0] if providers else None
+        return self.provider
+
+    def build_prompt(self, requirement: Dict, profiles: Sequence[Union[Profile, Dict]]) -> Tuple[str, int]:
+        """
+        Prompt holding the job and one budgeted summary line per candidate.
+
+        Returns:
+            The prompt and the number of leading candidates that fit in the budget
+        """
+        job = job_text(requirement)
+        overhead = estimate_tokens(RERANK_SYSTEM_PROMPT) + estimate_tokens(job) + 20
+        count = len(profiles)
+        per_candidate = (self.token_budget - overhead) // max(count, 1)
+        if per_candidate < MIN_SUMMARY_TOKENS:
+            count = max(1, (self.token_budget - overhead) // MIN_SUMMARY_TOKENS)
+            per_candidate = MIN_SUMMARY_TOKENS
+        wanted = requirement.get("required_skills", []) + requirement.get("preferred_skills", [])
+        lines = [
+            f"C{position + 1}: {summarize_profile(profile, per_candidate, wanted)}"
+            for position, profile in enumerate(profiles[:count])
+        ]
+        prompt = (f"Job:\n{job}\n\nCandidates:\n" + "\n".join(lines) +
+                  f"\n\nRank all {len(lines)} candidates, e.g. [\"C2\", \"C1\"].")
+        return prompt, len(lines)
+
+    @staticmethod
+    def _key(profile: Profile) -> str:
+        return str(profile.id or profile.address or profile.name)
+
+    def cache_key(self, requirement: Dict, profiles: Sequence[Profile]) -> str:
+        """Hash of the job and of the candidate set, independent of the candidates' order"""
+        job_hash = _digest({key: value for key, value in requirement.items() if key != "top_k"})
+        candidate_hash = _digest(sorted(_digest(profile.to_dict()) for profile in profiles))
+        return f"{job_hash}:{candidate_hash}"
+
+    def rerank(self, requirement: Dict, ranked: List[Tuple[Union[Profile, Dict], float]]
+               ) -> List[Tuple[Union[Profile, Dict], float]]:
+        """
+        Reorder the top-N of a ranked list by LLM judgement.
+
+        Candidates keep their original scores. If no LLM provider is configured or
+        the call fails, the list is returned unchanged and nothing is cached.
+
+        Args:
+            requirement: Job requirement, optionally with "title" and "description"
+            ranked: (profile, score) tuples, best first
+
+        Returns:
+            The same tuples, with the first top_n reordered
+        """
+        shortlist = ranked[:self.top_n]
+        if len(shortlist) < 2:
+            return ranked
+        profiles = [as_profile(profile) for profile, _ in shortlist]
+        key = self.cache_key(requirement, profiles)
+
+        with self._lock:
+            order = self._cache.get(key)
+            if order is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+        if order is None:
+            order = self._ask(requirement, profiles)
+            if order is None:
+                return ranked
+            with self._lock:
+                self._cache[key] = order
+                while len(self._cache) > self.max_cache_entries:
+                    self._cache.popitem(last=False)
+                self._save_cache()
+
+        by_key = {self._key(profile): item for profile, item in zip(profiles, shortlist)}
+        reordered = [by_key[candidate] for candidate in order if candidate in by_key]
+        # Candidates the cached order does not name, e.g. after a key collision, keep their place
+        reordered += [item for item in shortlist if item not in reordered]
+        return reordered + ranked[self.top_n:]
+
+    def _ask(self, requirement: Dict, profiles: List[Profile]) -> Optional[List[str]]:
+        provider = self._provider()
+        if provider is None:
+            logger.warning("No configured LLM provider, skipping re-rank")
+            return None
+        prompt, sent = self.build_prompt(requirement, profiles)
+        params = [prompt, RERANK_SYSTEM_PROMPT] + ([self.model] if self.model else [])
+        self.stats["calls"] += 1
+        response = self.connection_manager.perform_action(provider, "generate-text", params)
+        if not response:
+            self.stats["failures"] += 1
+            logger.warning(f"Re-rank request to {provider} failed")
+            return None
+        # Candidates cut from the prompt to fit the budget are ranked after those that were sent
+        positions = parse_ranking(response, sent) + list(range(sent, len(profiles)))
+        return [self._key(profiles[position]) for position in positions]
@@ -0,0 +1,196 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.recommendation.profile import Profile, as_profile, as_profiles
+from src.recommendation.profile_table import ProfileTable
+from src.recommendation.ranking import RankingEngine
+from src.recommendation.skill_extractor import enrich_profiles, expand_requirement, profile_text
+from src.recommendation.skill_index import SkillIndex
+from src.recommendation.skill_vocabulary import SkillVocabulary
+
+
+class MatchingIndex:
+    """
+    In-memory matching state for a set of freelancer profiles.
+
+    Combines the inverted skill index with the columnar profile table, both sharing
+    row ids, so that one loaded profile set can answer any number of requirements.
+    Profiles can be added or replaced in place while the index is being queried.
+    """
+
+    def __init__(self, profiles: Optional[Iterable[Union[Profile, Dict]]] = None,
+                 vocabulary: Optional[SkillVocabulary] = None, enrich_skills: bool = False,
+                 keep_text: bool = False, ann_candidates: bool = False):
+        """
+        Args:
+            profiles: Initial profiles, as dicts of either schema or Profiles
+            vocabulary: Skill vocabulary to share, e.g. with a JobIndex
+            enrich_skills: Also index the skills mentioned in each profile's bio and
+                portfolio, which only profile dicts carry
+            keep_text: Keep each profile dict's bio and portfolio text, e.g. to embed it
+            ann_candidates: Rank requirements that only list preferred skills among the
+                profiles of their nearest skill-vector clusters instead of every profile
+        """
+        self.enrich_skills = enrich_skills
+        self.ann_candidates = ann_candidates
+        # Built on the first soft query and rebuilt once the index changed since
+        self._skill_vectors = None
+        # Row id -> free text of the source profile dict, only when keep_text is set
+        self.texts: Optional[Sequence[str]] = [] if keep_text else None
+        self.skill_index = SkillIndex(vocabulary=vocabulary)
+        self.profile_table = ProfileTable.from_profiles([], keep_profiles=False)
+        # Optional external key (e.g. freelancer address) -> row id, for in-place updates
+        self._rows_by_key: Optional[Dict[str, int]] = {}
+        # Row id -> key, used instead of the dict above by indexes loaded from a snapshot
+        self._row_keys: Optional[Sequence[str]] = None
+        self.lock = threading.RLock()
+        # Bumped on every change, so results computed at one version can be cached against it
+        self.version = 0
+        if profiles is not None:
+            self.add_all(profiles)
+
+    @property
+    def vocabulary(self) -> SkillVocabulary:
+        return self.skill_index.vocabulary
+
+    @property
+    def profiles(self) -> List[Profile]:
+        return self.skill_index.profiles
+
+    def __len__(self) -> int:
+        return len(self.skill_index)
+
+    @property
+    def rows_by_key(self) -> Dict[str, int]:
+        if self._rows_by_key is None:
+            self._rows_by_key = {key: row for row, key in enumerate(self._row_keys) if key}
+        return self._rows_by_key
+
+    def row_keys(self) -> List[str]:
+        """Key of every row, empty for rows added without one"""
+        if self._row_keys is not None and self._rows_by_key is None:
+            return list(self._row_keys)
+        keys = [""] * len(self)
+        for key, row in self.rows_by_key.items():
+            keys[row] = key
+        return keys
+
+    def text(self, row: int) -> str:
+        """Bio and portfolio text of a row's source profile, "" unless the index keeps texts"""
+        return self.texts[row] if self.texts is not None else ""
+
+    def _writable_texts(self) -> List[str]:
+        # Texts of an index loaded from a snapshot are read-only until the first change
+        if not isinstance(self.texts, list):
+            self.texts = list(self.texts)
+        return self.texts
+
+    def add_all(self, profiles: Iterable[Union[Profile, Dict]]) -> None:
+        if self.enrich_skills:
+            with self.lock:
+                profiles = enrich_profiles(profiles, self.vocabulary)
+        profiles = list(profiles)
+        texts = None
+        if self.texts is not None:
+            texts = [profile_text(profile) if isinstance(profile, dict) else "" for profile in profiles]
+        # Normalised once here; the skill index and the table share the Profile objects
+        profiles = as_profiles(profiles)
+        with self.lock:
+            self.skill_index.add_all(profiles)
+            self.profile_table.append(profiles)
+            if texts is not None:
+                self._writable_texts().extend(texts)
+            self.version += 1
+
+    def upsert(self, key: str, profile: Union[Profile, Dict]) -> int:
+        """
+        Add a profile under a key, or replace the profile already stored under it.
+
+        Returns:
+            Row id of the profile
+        """
+        with self.lock:
+            if self.enrich_skills:
+                profile = enrich_profiles([profile], self.vocabulary)[0]
+            text = profile_text(profile) if isinstance(profile, dict) else ""
+            profile = as_profile(profile)
+            row = self.rows_by_key.get(key)
+            if row is None:
+                row = self.skill_index.add(profile)
+                self.profile_table.append([profile])
+                self.rows_by_key[key] = row
+                if self.texts is not None:
+                    self._writable_texts().append(text)
+            else:
+                self.skill_index.replace(row, profile)
+                self.profile_table.update(row, profile)
+                if self.texts is not None:
+                    self._writable_texts()[row] = text
+            self.version += 1
+            return row
+
+    def matching_rows(self, requirement: Dict) -> List[int]:
+        """Row ids that have every required skill and satisfy the numeric requirements"""
+        with self.lock:
+            requirement = expand_requirement(requirement, self.vocabulary)
+            candidate_ids = self.skill_index.candidates(requirement.get("required_skills", []))
+            return self.profile_table.filter(requirement, candidate_ids)
+
+    def filter(self, requirement: Dict) -> List[Profile]:
+        """
+        Profiles that satisfy a requirement, in row order.
+
+        Required skills are answered by intersecting posting lists, and the numeric
+        requirements (experience, hourly rate, rating, completed jobs, availability)
+        by a vectorised mask over the columnar profile table.
+        """
+        with self.lock:
+            return [self.skill_index.profiles[row] for row in self.matching_rows(requirement)]
+
+    def rank(self, requirement: Dict) -> List[Tuple[Profile, float]]:
+        """
+        Best ``requirement["top_k"]`` profiles that satisfy a requirement.
+
+        A requirement with a title or description but no required_skills requires
+        the skills its text mentions.
+
+        Returns:
+            List of (profile, score) tuples, best first
+        """
+        with self.lock:
+            return [(self.skill_index.profiles[row], score) for row, score in self.rank_rows(requirement)]
+
+    def rank_rows(self, requirement: Dict) -> List[Tuple[int, float]]:
+        """
+        Row ids of the best ``requirement["top_k"]`` profiles, as ranked by rank.
+
+        Returns:
+            List of (row id, score) tuples, best first
+        """
+        engine = RankingEngine(requirement.get("ranking_weights"))
+        with self.lock:
+            requirement = expand_requirement(requirement, self.vocabulary)
+            if self.ann_candidates and not requirement.get("required_skills") and requirement.get("preferred_skills"):
+                rows = self.profile_table.filter(requirement, self.soft_candidates(requirement))
+            else:
+                rows = self.matching_rows(requirement)
+            return engine.rank(self.skill_index, self.profile_table, rows, requirement)
+
+    def soft_candidates(self, requirement: Dict) -> List[int]:
+        """
+        Row ids in the skill-vector clusters closest to a requirement's preferred skills.
+
+        Approximate: a requirement without required skills would otherwise rank every
+        profile, while the clusters hold about ``nprobe * sqrt(N)`` of them. The
+        clustering is rebuilt, holding the index lock, on the first query after the
+        index changed, so it suits indexes queried far more often than they change.
+        """
+        # ann_index builds on this module
+        from src.recommendation.ann_index import SkillVectorIndex
+
+        with self.lock:
+            if self._skill_vectors is None:
+                self._skill_vectors = SkillVectorIndex(self)
+            else:
+                self._skill_vectors.refresh()
+            return sorted(self._skill_vectors.candidates(requirement).tolist())
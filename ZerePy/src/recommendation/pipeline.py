@@ -0,0 +1,132 @@
+import heapq
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.recommendation.profile import Profile, as_profiles
+from src.recommendation.profile_table import ProfileTable
+from src.recommendation.ranking import DEFAULT_TOP_K, RankingEngine
+from src.recommendation.skill_extractor import expand_requirement
+from src.recommendation.skill_vocabulary import SkillVocabulary
+
+
+class StreamingMatcher:
+    """
+    Incremental matcher for profiles that arrive over time.
+
+    The requirement's required and wanted skills are encoded once as bitmasks, so a
+    profile is checked on arrival with one AND of its own skill bitmask instead of
+    building an index around it. Profiles that pass are scored together and then
+    dropped; only the best ``top_k`` matches are kept, in a bounded min-heap.
+    """
+
+    def __init__(self, requirement: Dict, vocabulary: Optional[SkillVocabulary] = None):
+        """
+        Args:
+            requirement: Dictionary containing filtering criteria
+            vocabulary: Skill vocabulary shared across batches
+        """
+        self.vocabulary = vocabulary if vocabulary is not None else SkillVocabulary()
+        self.source_requirement = requirement
+        self.top_k = int(requirement.get("top_k", DEFAULT_TOP_K))
+        self.engine = RankingEngine(requirement.get("ranking_weights"))
+        self.seen = 0
+        self._compiled_size: Optional[int] = None
+        self._compile()
+        # (score, -arrival, profile): the root is the weakest kept match, and of two
+        # equal scores the later arrival is evicted first
+        self._heap: List[Tuple[float, int, Profile]] = []
+
+    def _compile(self) -> None:
+        """Encode the requirement's skills over the vocabulary as it is now"""
+        self.requirement = expand_requirement(self.source_requirement, self.vocabulary)
+        required = self.requirement.get("required_skills", [])
+        self._required_mask = self.vocabulary.encode(required)
+        # Skills scored, as RankingEngine counts them: required and preferred, de-duplicated
+        self._wanted_mask = self.vocabulary.encode(required + self.requirement.get("preferred_skills", []))
+        self._wanted_count = self._wanted_mask.bit_count()
+        self._compiled_size = len(self.vocabulary)
+
+    def add(self, profiles: Iterable[Union[Profile, Dict]]) -> List[Tuple[Profile, float]]:
+        """
+        Score a batch of newly arrived profiles.
+
+        Returns:
+            (profile, score) tuples of the batch's profiles that satisfy the requirement,
+            whether or not they made it into the current top-k
+        """
+        profiles = as_profiles(profiles)
+        masks = [self.vocabulary.encode(profile.skills) for profile in profiles]
+        if self.requirement is not self.source_requirement and len(self.vocabulary) != self._compiled_size:
+            # Skills read from the requirement's text depend on the vocabulary, which grew
+            self._compile()
+        candidates = [row for row, mask in enumerate(masks) if mask & self._required_mask == self._required_mask]
+        arrival = self.seen
+        self.seen += len(profiles)
+        if not candidates:
+            return []
+
+        columns = {name: np.array([getattr(profiles[row], name) for row in candidates], dtype=np.float64)
+                   for name in ProfileTable.COLUMNS}
+        table = ProfileTable([""] * len(candidates), columns)
+        kept = table.filter(self.requirement)
+        if self._wanted_count:
+            skill_scores = np.array([(masks[candidates[i]] & self._wanted_mask).bit_count() for i in kept],
+                                    dtype=np.float64) / self._wanted_count
+        else:
+            skill_scores = np.ones(len(kept))
+        scores = self.engine.score_columns({name: values[kept] for name, values in columns.items()},
+                                           skill_scores, self.requirement)
+
+        matches = []
+        for i, score in zip(kept, scores):
+            row = candidates[i]
+            profile, score = profiles[row], float(score)
+            matches.append((profile, score))
+            entry = (score, -(arrival + row), profile)
+            if len(self._heap) < self.top_k:
+                heapq.heappush(self._heap, entry)
+            elif self.top_k and entry[:2] > self._heap[0][:2]:
+                heapq.heapreplace(self._heap, entry)
+        return matches
+
+    def top(self) -> List[Tuple[Profile, float]]:
+        """Current best matches, highest score first"""
+        return [(profile, score) for score, _, profile in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+async def stream_matches(
+    profiles: AsyncIterator[Tuple[str, Dict]],
+    matcher: StreamingMatcher,
+    max_matches: Optional[int] = None,
+    min_score: Optional[float] = None,
+) -> AsyncIterator[Tuple[Dict, float]]:
+    """
+    Run arriving profiles through a matcher and yield every match as soon as it is scored.
+
+    Stops early once ``max_matches`` matches scoring at least ``min_score`` have been
+    seen, which also cancels the fetches still in flight.
+
+    Args:
+        profiles: Async iterator of (ipfs_hash, profile) tuples, e.g. IPFSFetcher.stream
+        matcher: Matcher holding the requirement and the running top-k
+        max_matches: Number of good-enough matches after which to stop
+        min_score: Score a match needs to count towards max_matches
+
+    Yields:
+        (profile, score) tuples in arrival order
+    """
+    good_matches = 0
+    stream = profiles.__aiter__()
+    try:
+        async for _, profile in stream:
+            for match in matcher.add([profile]):
+                yield match
+                if min_score is None or match[1] >= min_score:
+                    good_matches += 1
+            if max_matches is not None and good_matches >= max_matches:
+                break
+    finally:
+        # Closing the source cancels its outstanding requests
+        if hasattr(stream, "aclose"):
+            await stream.aclose()
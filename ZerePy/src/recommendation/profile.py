@@ -0,0 +1,225 @@
+import re
+from sys import intern
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+# Profiles come from two schemas: sample_data uses snake_case, the uploaded CVs camelCase
+FIELD_ALIASES = {
+    "hourly_rate": ("hourly_rate", "hourlyRate"),
+    "experience": ("experience", "experience_years", "experienceYears"),
+    "rating": ("rating",),
+    "completed_jobs": ("completed_jobs", "completedJobs"),
+}
+
+# Value used when a profile does not state a field. Missing rates never pass a
+# max_hourly_rate check, missing experience counts as none, as in filter_freelancers.
+FIELD_DEFAULTS = {
+    "hourly_rate": np.inf,
+    "experience": 0.0,
+    "rating": np.nan,
+    "completed_jobs": 0.0,
+    "availability_hours": np.nan,
+}
+
+AVAILABILITY_KEYWORDS = {
+    "full-time": 40.0,
+    "full time": 40.0,
+    "part-time": 20.0,
+    "part time": 20.0,
+}
+
+_HOURS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(?:hours|hrs|h)\b")
+
+# Keys only found in the CV schema of frontend/uploads
+CV_KEYS = ("hourlyRate", "experienceYears", "completedJobs")
+
+
+def parse_availability_hours(availability: Optional[str]) -> float:
+    """Turn availability strings like "20 hours/week" or "Full-time" into weekly hours"""
+    if availability is None:
+        return FIELD_DEFAULTS["availability_hours"]
+    if isinstance(availability, (int, float)):
+        return float(availability)
+    text = str(availability).lower()
+    match = _HOURS_PATTERN.search(text)
+    if match:
+        return float(match.group(1))
+    for keyword, hours in AVAILABILITY_KEYWORDS.items():
+        if keyword in text:
+            return hours
+    return FIELD_DEFAULTS["availability_hours"]
+
+
+class Profile:
+    """
+    Normalised freelancer profile.
+
+    Holds only the fields the matcher reads, in slots, so a profile costs a small
+    fixed-size object instead of a dict of every key in the source JSON. Numeric
+    fields are floats with FIELD_DEFAULTS already applied. Item access by the
+    field name or any schema alias is kept for code that still treats profiles as dicts.
+    """
+
+    __slots__ = ("id", "address", "name", "skills", "hourly_rate", "experience", "rating",
+                 "completed_jobs", "availability_hours")
+
+    def __init__(self, id: Optional[str] = None, address: Optional[str] = None, name: Optional[str] = None,
+                 skills: Tuple[str, ...] = (), hourly_rate: float = FIELD_DEFAULTS["hourly_rate"],
+                 experience: float = FIELD_DEFAULTS["experience"], rating: float = FIELD_DEFAULTS["rating"],
+                 completed_jobs: float = FIELD_DEFAULTS["completed_jobs"],
+                 availability_hours: float = FIELD_DEFAULTS["availability_hours"]):
+        self.id = id
+        self.address = address
+        self.name = name
+        self.skills = skills
+        self.hourly_rate = hourly_rate
+        self.experience = experience
+        self.rating = rating
+        self.completed_jobs = completed_jobs
+        self.availability_hours = availability_hours
+
+    def __repr__(self) -> str:
+        return f"Profile(id={self.id!r}, name={self.name!r}, skills={list(self.skills)!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Profile):
+            return NotImplemented
+        return all(_same(getattr(self, field), getattr(other, field)) for field in self.__slots__)
+
+    __hash__ = None
+
+    def _attribute(self, key: str) -> str:
+        if key in self.__slots__:
+            return key
+        for field, aliases in FIELD_ALIASES.items():
+            if key in aliases:
+                return field
+        if key == "availability":
+            return "availability_hours"
+        raise KeyError(key)
+
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, self._attribute(key))
+        return list(value) if key == "skills" else value
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self._attribute(key)
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def to_dict(self) -> Dict:
+        """JSON-serialisable form with missing values left out"""
+        result = {"id": self.id, "address": self.address, "name": self.name, "skills": list(self.skills)}
+        for field in ("hourly_rate", "experience", "rating", "completed_jobs", "availability_hours"):
+            value = getattr(self, field)
+            if np.isfinite(value):
+                result[field] = value
+        return {key: value for key, value in result.items() if value is not None}
+
+
+def _same(left: Any, right: Any) -> bool:
+    if isinstance(left, float) and isinstance(right, float) and np.isnan(left) and np.isnan(right):
+        return True
+    return left == right
+
+
+def _number(value: Any, default: float) -> float:
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def compile_adapter(keys: Dict[str, Tuple[str, ...]]) -> Callable[[Dict], Profile]:
+    """
+    Build a function turning a profile dict of one schema into a Profile.
+
+    The key lookups are resolved when the adapter is compiled, so converting a
+    profile is a fixed sequence of dict lookups with no per-profile key search.
+
+    Args:
+        keys: Numeric field -> keys to try, most likely first
+    """
+    rate_keys = keys["hourly_rate"]
+    experience_keys = keys["experience"]
+    rating_keys = keys["rating"]
+    completed_keys = keys["completed_jobs"]
+    defaults = FIELD_DEFAULTS
+
+    def first(data: Dict, candidates: Tuple[str, ...]) -> Any:
+        for key in candidates:
+            value = data.get(key)
+            if value is not None:
+                return value
+        return None
+
+    def adapt(data: Dict) -> Profile:
+        address = data.get("address")
+        profile_id = data.get("id") or address
+        return Profile(
+            str(profile_id) if profile_id else None,
+            address,
+            data.get("name"),
+            # Interned so the same skill name is stored once across all profiles
+            tuple(intern(str(skill)) for skill in data.get("skills") or ()),
+            _number(first(data, rate_keys), defaults["hourly_rate"]),
+            _number(first(data, experience_keys), defaults["experience"]),
+            _number(first(data, rating_keys), defaults["rating"]),
+            _number(first(data, completed_keys), defaults["completed_jobs"]),
+            parse_availability_hours(data.get("availability")),
+        )
+
+    return adapt
+
+
+def _schema_keys(cv: bool) -> Dict[str, Tuple[str, ...]]:
+    # Each schema tries its own spelling first and the other schema's as a fallback
+    keys = {}
+    for field, aliases in FIELD_ALIASES.items():
+        own = [alias for alias in aliases if (alias in CV_KEYS) == cv]
+        keys[field] = tuple(own + [alias for alias in aliases if alias not in own])
+    return keys
+
+
+SCHEMA_ADAPTERS: Dict[str, Callable[[Dict], Profile]] = {
+    "sample": compile_adapter(_schema_keys(cv=False)),
+    "cv": compile_adapter(_schema_keys(cv=True)),
+}
+
+
+def detect_schema(data: Dict) -> str:
+    """ "cv" for profiles in the frontend/uploads CV schema, "sample" otherwise"""
+    for key in CV_KEYS:
+        if key in data:
+            return "cv"
+    return "sample"
+
+
+def as_profile(data: Union[Profile, Dict]) -> Profile:
+    """Normalise a profile dict of either schema; Profiles are returned unchanged"""
+    if isinstance(data, Profile):
+        return data
+    return SCHEMA_ADAPTERS[detect_schema(data)](data)
+
+
+def as_profiles(profiles: Iterable[Union[Profile, Dict]]) -> List[Profile]:
+    return [as_profile(profile) for profile in profiles]
+
+
+def skills_of(profile: Union[Profile, Dict]) -> Iterable[str]:
+    """Skill list of a Profile or of any dict with a "skills" key, such as an indexed job"""
+    if isinstance(profile, Profile):
+        return profile.skills
+    return profile.get("skills", [])
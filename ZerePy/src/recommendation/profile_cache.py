@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger("recommendation.profile_cache")
+
+DEFAULT_CACHE_DIR = Path(".cache") / "ipfs_profiles"
+
+# CIDs are base32/base58 strings; anything else is never used as a file name
+_CID_PATTERN = re.compile(r"^[A-Za-z0-9]{16,128}$")
+
+
+class ProfileCache:
+    """
+    Content-addressed profile cache keyed by IPFS CID.
+
+    Content behind a CID is immutable, so entries never need invalidation - only
+    eviction. Lookups go to an in-memory LRU first and then to an on-disk store
+    that survives process restarts. Both tiers are size-bounded.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_memory_entries: int = 4096,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        Args:
+            cache_dir: Directory of the on-disk store
+            max_memory_entries: Number of profiles kept in the in-memory LRU
+            max_disk_bytes: Size limit of the on-disk store, oldest entries are evicted first
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        # CID -> file size, ordered from least to most recently used
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_disk_index()
+
+    def _load_disk_index(self) -> None:
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name[:-len(".json")], stat.st_size))
+        for _, cid, size in sorted(entries):
+            self._disk[cid] = size
+            self._disk_bytes += size
+
+    def _path(self, cid: str) -> Path:
+        return self.cache_dir / f"{cid}.json"
+
+    @staticmethod
+    def is_cacheable(cid: str) -> bool:
+        return bool(_CID_PATTERN.match(cid))
+
+    def _remember(self, cid: str, profile: Dict) -> None:
+        self._memory[cid] = profile
+        self._memory.move_to_end(cid)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, cid: str) -> Optional[Dict]:
+        """
+        Look up a profile by CID.
+
+        Returns:
+            The cached profile or None on a miss
+        """
+        if not self.is_cacheable(cid):
+            return None
+
+        with self._lock:
+            profile = self._memory.get(cid)
+            if profile is not None:
+                self._memory.move_to_end(cid)
+                self.stats["memory_hits"] += 1
+                return profile
+
+            if cid in self._disk:
+                try:
+                    with open(self._path(cid), "r") as f:
+                        profile = json.load(f)
+                    os.utime(self._path(cid))
+                    self._disk.move_to_end(cid)
+                    self._remember(cid, profile)
+                    self.stats["disk_hits"] += 1
+                    return profile
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"Dropping unreadable cache entry {cid}: {e}")
+                    self._drop_disk_entry(cid)
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, cid: str, profile: Dict) -> None:
+        """Store a profile under its CID in both tiers"""
+        if not self.is_cacheable(cid):
+            return
+
+        data = json.dumps(profile, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._remember(cid, profile)
+            if cid in self._disk or len(data) > self.max_disk_bytes:
+                return
+            try:
+                # Write to a temporary file first so readers never see a partial entry
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._path(cid))
+            except OSError as e:
+                logger.warning(f"Could not write cache entry {cid}: {e}")
+                return
+            self._disk[cid] = len(data)
+            self._disk_bytes += len(data)
+            self._evict()
+
+    def _drop_disk_entry(self, cid: str) -> None:
+        size = self._disk.pop(cid, 0)
+        self._disk_bytes -= size
+        try:
+            os.remove(self._path(cid))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            cid = next(iter(self._disk))
+            self._drop_disk_entry(cid)
+            self.stats["evictions"] += 1
+
+    def __contains__(self, cid: str) -> bool:
+        with self._lock:
+            return cid in self._memory or cid in self._disk
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._disk.keys() | self._memory.keys())
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            for cid in list(self._disk):
+                self._drop_disk_entry(cid)
@@ -0,0 +1,220 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from src.recommendation.profile import (  # noqa: F401 - re-exported for existing imports
+    AVAILABILITY_KEYWORDS,
+    FIELD_ALIASES,
+    FIELD_DEFAULTS,
+    Profile,
+    as_profile,
+    as_profiles,
+    parse_availability_hours,
+)
+from src.recommendation.skill_vocabulary import SkillVocabulary, match_packed, pack_masks
+
+# requirement key -> (column, comparison)
+REQUIREMENT_PREDICATES = {
+    "min_experience": ("experience", ">="),
+    "max_hourly_rate": ("hourly_rate", "<="),
+    "min_rating": ("rating", ">="),
+    "min_completed_jobs": ("completed_jobs", ">="),
+    "min_availability_hours": ("availability_hours", ">="),
+}
+
+
+class ProfileTable:
+    """
+    Columnar view of freelancer profiles.
+
+    Numeric attributes are held as NumPy arrays aligned with ``ids`` so that a
+    requirement compiles to a single boolean mask instead of per-dict lookups.
+    """
+
+    COLUMNS = ("hourly_rate", "experience", "rating", "completed_jobs", "availability_hours")
+
+    def __init__(self, ids: Sequence[str], columns: Dict[str, np.ndarray], profiles: Optional[List[Profile]] = None,
+                 skill_bits: Optional[np.ndarray] = None, vocabulary: Optional[SkillVocabulary] = None):
+        """
+        Args:
+            ids: Profile identifiers, one per row
+            columns: Column name -> float64 array of the same length as ids
+            profiles: Source profiles, one per row, if they should be kept around
+            skill_bits: Packed (rows, words) uint64 skill bitsets over ``vocabulary``
+            vocabulary: Skill vocabulary the bitsets were encoded with
+        """
+        self.ids = ids
+        self.profiles = profiles
+        self.vocabulary = vocabulary
+        for name in self.COLUMNS:
+            if len(columns[name]) != len(ids):
+                raise ValueError(f"Column {name} has {len(columns[name])} rows, expected {len(ids)}")
+        # Backing arrays may be longer than the table so appends are amortised O(1)
+        self._size = len(ids)
+        self._buffers = {name: np.asarray(columns[name], dtype=np.float64) for name in self.COLUMNS}
+        self._skill_buffer = skill_bits
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: buffer[:self._size] for name, buffer in self._buffers.items()}
+
+    @property
+    def skill_bits(self) -> Optional[np.ndarray]:
+        if self._skill_buffer is None:
+            return None
+        return self._skill_buffer[:self._size]
+
+    @staticmethod
+    def profile_id(profile: Profile, row: int) -> str:
+        """Stable identifier of a profile, falling back to its address or row number"""
+        return str(profile.id or profile.address or row)
+
+    @classmethod
+    def from_profiles(cls, profiles: Sequence[Union[Profile, Dict]], keep_profiles: bool = True,
+                      vocabulary: Optional[SkillVocabulary] = None) -> "ProfileTable":
+        """
+        Build the table from profiles of either schema in one bulk pass.
+
+        Profile dicts are normalised into Profile objects first; those are what the
+        table keeps and returns.
+
+        Args:
+            profiles: Freelancer profiles, as dicts or Profiles
+            keep_profiles: Keep a reference to the normalised profiles for returning matches
+            vocabulary: If given, skills are also encoded into packed bitsets
+        """
+        profiles = as_profiles(profiles)
+        count = len(profiles)
+        columns = {
+            name: np.fromiter((getattr(profile, name) for profile in profiles), dtype=np.float64, count=count)
+            for name in cls.COLUMNS
+        }
+        ids = [cls.profile_id(profile, row) for row, profile in enumerate(profiles)]
+        skill_bits = None
+        if vocabulary is not None:
+            masks = [vocabulary.encode(profile.skills) for profile in profiles]
+            skill_bits = pack_masks(masks, vocabulary.words)
+        return cls(ids, columns, profiles if keep_profiles else None, skill_bits, vocabulary)
+
+    @classmethod
+    def from_json_file(cls, path: Path, vocabulary: Optional[SkillVocabulary] = None) -> "ProfileTable":
+        """Build the table from a JSON array of profiles such as sample_data/freelancers.json"""
+        with open(path, "r") as f:
+            return cls.from_profiles(json.load(f), vocabulary=vocabulary)
+
+    def _reserve(self, size: int, words: int) -> None:
+        capacity = len(self._buffers[self.COLUMNS[0]])
+        if size > capacity:
+            capacity = max(size, 2 * capacity, 16)
+            for name, buffer in self._buffers.items():
+                grown = np.empty(capacity, dtype=np.float64)
+                grown[:self._size] = buffer[:self._size]
+                self._buffers[name] = grown
+        if self._skill_buffer is not None:
+            rows, current_words = self._skill_buffer.shape
+            if rows < capacity or current_words < words:
+                # New skills may widen the vocabulary past the packed width
+                grown = np.zeros((max(rows, capacity), max(current_words, words)), dtype=np.uint64)
+                grown[:self._size, :current_words] = self._skill_buffer[:self._size]
+                self._skill_buffer = grown
+
+    def append(self, profiles: Sequence[Union[Profile, Dict]]) -> range:
+        """
+        Append profiles without rebuilding the existing rows.
+
+        Returns:
+            Row ids assigned to the new profiles
+        """
+        profiles = as_profiles(profiles)
+        new = ProfileTable.from_profiles(profiles, keep_profiles=False, vocabulary=self.vocabulary)
+        start = self._size
+        if not isinstance(self.ids, list):
+            self.ids = list(self.ids)
+        words = new.skill_bits.shape[1] if new.skill_bits is not None else 0
+        self._reserve(start + len(new), words)
+        for name in self.COLUMNS:
+            self._buffers[name][start:start + len(new)] = new.columns[name]
+        if self._skill_buffer is not None:
+            self._skill_buffer[start:start + len(new), :words] = new.skill_bits
+        self.ids.extend(ProfileTable.profile_id(profile, start + offset) for offset, profile in enumerate(profiles))
+        if self.profiles is not None:
+            self.profiles.extend(profiles)
+        self._size += len(new)
+        return range(start, self._size)
+
+    def update(self, row: int, profile: Union[Profile, Dict]) -> None:
+        """Overwrite one row in place with a changed profile"""
+        if not isinstance(self.ids, list):
+            self.ids = list(self.ids)
+        profile = as_profile(profile)
+        new = ProfileTable.from_profiles([profile], keep_profiles=False, vocabulary=self.vocabulary)
+        for name in self.COLUMNS:
+            self._buffers[name][row] = new.columns[name][0]
+        if self._skill_buffer is not None:
+            words = new.skill_bits.shape[1]
+            self._reserve(self._size, words)
+            self._skill_buffer[row] = 0
+            self._skill_buffer[row, :words] = new.skill_bits[0]
+        self.ids[row] = ProfileTable.profile_id(profile, row)
+        if self.profiles is not None:
+            self.profiles[row] = profile
+
+    def skill_mask(self, required_skills: Iterable[str]) -> np.ndarray:
+        """
+        Boolean mask of the rows whose skill bitset contains every required skill.
+
+        Raises:
+            ValueError: If the table was built without a vocabulary
+        """
+        if self.skill_bits is None:
+            raise ValueError("Profile table has no skill bitsets, build it with a vocabulary")
+        required_mask = self.vocabulary.encode(required_skills, add=False)
+        if required_mask is None:
+            return np.zeros(len(self), dtype=bool)
+        return match_packed(self.skill_bits, required_mask)
+
+    def mask(self, requirement: Dict, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Compile the numeric predicates of a requirement into a boolean mask.
+
+        Args:
+            requirement: Dictionary containing filtering criteria
+            rows: Optional row ids to restrict the evaluation to
+
+        Returns:
+            Boolean array over all rows, or over ``rows`` if given
+        """
+        size = len(self) if rows is None else len(rows)
+        mask = np.ones(size, dtype=bool)
+        for key, (column, comparison) in REQUIREMENT_PREDICATES.items():
+            threshold = requirement.get(key)
+            if threshold is None:
+                continue
+            values = self.columns[column] if rows is None else self.columns[column][rows]
+            # NaN compares False, so profiles without the field never satisfy a bound
+            if comparison == ">=":
+                mask &= values >= threshold
+            else:
+                mask &= values <= threshold
+        return mask
+
+    def filter(self, requirement: Dict, rows: Optional[Iterable[int]] = None) -> np.ndarray:
+        """
+        Row ids that satisfy the numeric predicates of a requirement.
+
+        Args:
+            requirement: Dictionary containing filtering criteria
+            rows: Optional candidate row ids, e.g. from a skill index lookup
+
+        Returns:
+            int64 array of matching row ids, in the order of ``rows``
+        """
+        if rows is None:
+            return np.flatnonzero(self.mask(requirement))
+        rows = np.asarray(rows, dtype=np.int64)
+        return rows[self.mask(requirement, rows)]
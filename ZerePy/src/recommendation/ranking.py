@@ -0,0 +1,155 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.recommendation.profile_table import ProfileTable
+from src.recommendation.skill_index import SkillIndex
+from src.recommendation.skill_vocabulary import normalize_skill
+
+DEFAULT_TOP_K = 10
+
+DEFAULT_WEIGHTS = {
+    "skills": 0.35,
+    "rate": 0.2,
+    "experience": 0.15,
+    "rating": 0.2,
+    "completed_jobs": 0.1,
+}
+
+# Ratings are out of five; unrated freelancers get a neutral score instead of zero
+MAX_RATING = 5.0
+UNRATED_SCORE = 0.5
+# Completed jobs saturate logarithmically at this count
+COMPLETED_JOBS_CAP = 50
+# Hourly rate scoring zero when the requirement has no max_hourly_rate. A fixed bound
+# keeps a profile's score independent of the other candidates, so the index, the
+# streaming matcher and the sharded matcher rank the same job the same way
+RATE_CEILING = 150.0
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k highest scores, best first.
+
+    Uses argpartition so only the k winners are sorted; ties are broken by position
+    to keep results deterministic.
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        # Include every element tied with the k-th best so the tie-break below is stable
+        kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        selected = np.flatnonzero(scores >= kth)
+    else:
+        selected = np.arange(len(scores))
+    order = np.lexsort((selected, -scores[selected]))
+    return selected[order][:k]
+
+
+class RankingEngine:
+    """
+    Weighted scoring of candidate profiles with bounded top-k selection.
+
+    Every component is scaled to [0, 1] before weighting:
+        skills          share of required and preferred skills the profile has
+        rate            cheaper relative to max_hourly_rate, or RATE_CEILING without one
+        experience      years relative to twice the minimum, at least ten years
+        rating          rating out of five
+        completed_jobs  log-scaled number of completed jobs
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            weights: Overrides for DEFAULT_WEIGHTS
+        """
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+
+    def _skill_scores(self, skill_index: SkillIndex, rows: np.ndarray, requirement: Dict) -> np.ndarray:
+        wanted = {
+            normalize_skill(skill_index.vocabulary.canonical(skill))
+            for skill in requirement.get("required_skills", []) + requirement.get("preferred_skills", [])
+        }
+        if not wanted:
+            return np.ones(len(rows))
+        matches = np.zeros(len(rows))
+        for skill in wanted:
+            # Skills unknown to the vocabulary count towards the total but never match
+            posting = skill_index.posting(skill)
+            if len(posting):
+                matches += np.isin(rows, posting, assume_unique=True)
+        return matches / len(wanted)
+
+    @staticmethod
+    def _rate_scores(rates: np.ndarray, requirement: Dict) -> np.ndarray:
+        ceiling = requirement.get("max_hourly_rate")
+        ceiling = RATE_CEILING if ceiling is None else float(ceiling)
+        scores = np.clip((ceiling - rates) / max(ceiling, 1e-9), 0.0, 1.0)
+        # Freelancers without a stated rate score zero
+        return np.where(np.isfinite(rates), scores, 0.0)
+
+    @staticmethod
+    def _experience_scores(experience: np.ndarray, requirement: Dict) -> np.ndarray:
+        cap = max(2 * requirement.get("min_experience", 0), 10)
+        return np.clip(experience / cap, 0.0, 1.0)
+
+    def score(self, skill_index: SkillIndex, profile_table: ProfileTable,
+              rows: np.ndarray, requirement: Dict) -> np.ndarray:
+        """
+        Weighted score of every candidate row.
+
+        Args:
+            skill_index: Skill index with the same rows as profile_table
+            profile_table: Columnar profile table
+            rows: Candidate row ids
+            requirement: Dictionary containing filtering criteria
+
+        Returns:
+            float64 array of scores aligned with rows
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        columns = {name: values[rows] for name, values in profile_table.columns.items()}
+        return self.score_columns(columns, self._skill_scores(skill_index, rows, requirement), requirement)
+
+    def score_columns(self, columns: Dict[str, np.ndarray], skill_scores: np.ndarray, requirement: Dict) -> np.ndarray:
+        """
+        Weighted score of candidates given their numeric columns and skill scores.
+
+        Args:
+            columns: Column name -> values of the candidates, as in ProfileTable.columns
+            skill_scores: Share of the wanted skills each candidate has
+            requirement: Dictionary containing filtering criteria
+
+        Returns:
+            float64 array of scores aligned with the columns
+        """
+        rating = np.nan_to_num(columns["rating"] / MAX_RATING, nan=UNRATED_SCORE)
+        completed = np.log1p(columns["completed_jobs"]) / np.log1p(COMPLETED_JOBS_CAP)
+
+        components = {
+            "skills": skill_scores,
+            "rate": self._rate_scores(columns["hourly_rate"], requirement),
+            "experience": self._experience_scores(columns["experience"], requirement),
+            "rating": np.clip(rating, 0.0, 1.0),
+            "completed_jobs": np.clip(completed, 0.0, 1.0),
+        }
+        scores = np.zeros(len(skill_scores))
+        for name, weight in self.weights.items():
+            if weight:
+                scores += weight * components[name]
+        return scores
+
+    def rank(self, skill_index: SkillIndex, profile_table: ProfileTable,
+             rows: np.ndarray, requirement: Dict) -> List[Tuple[int, float]]:
+        """
+        Best ``requirement["top_k"]`` candidates, highest score first.
+
+        Returns:
+            List of (row id, score) tuples
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        scores = self.score(skill_index, profile_table, rows, requirement)
+        best = top_k_indices(scores, int(requirement.get("top_k", DEFAULT_TOP_K)))
+        return [(int(rows[i]), float(scores[i])) for i in best]
@@ -0,0 +1,305 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from web3 import Web3
+
+from src.recommendation.ipfs_fetcher import IPFSFetcher
+from src.recommendation.matching_index import MatchingIndex
+from src.recommendation.snapshot import SnapshotError, load_snapshot, write_snapshot
+
+logger = logging.getLogger("recommendation.registration_sync")
+
+DEFAULT_CHECKPOINT_PATH = Path(".cache") / "registration_sync.json"
+
+REGISTER_FREELANCER_SIGNATURE = "registerFreelancer(string,string)"
+
+
+class Registration(NamedTuple):
+    block_number: int
+    address: str
+    name: str
+    ipfs_hash: str
+
+
+class ContractRegistrationSource:
+    """
+    Reads freelancer registrations from the marketplace contract.
+
+    The marketplace ABI emits no event for ``registerFreelancer``, so registrations
+    are recovered from the successful calls to it. On nodes with the ``trace_filter``
+    API the calls are selected by contract address on the node; elsewhere, including
+    a local EthereumTesterProvider, every block in the range is read in full.
+    """
+
+    def __init__(self, web3: Web3, contract, use_traces: Optional[bool] = None):
+        """
+        Args:
+            web3: Web3 connection
+            contract: Marketplace contract
+            use_traces: Whether the node supports trace_filter, probed on first use if None
+        """
+        self.web3 = web3
+        self.contract = contract
+        self.selector = bytes(Web3.keccak(text=REGISTER_FREELANCER_SIGNATURE)[:4])
+        self.use_traces = use_traces
+
+    def block_number(self) -> int:
+        return self.web3.eth.block_number
+
+    def _registration(self, block_number: int, sender: str, tx_hash, tx_input) -> Optional[Registration]:
+        data = bytes(tx_input) if not isinstance(tx_input, str) else bytes.fromhex(tx_input[2:])
+        if data[:4] != self.selector:
+            return None
+        if self.web3.eth.get_transaction_receipt(tx_hash)["status"] != 1:
+            return None
+        _, params = self.contract.decode_function_input(data)
+        return Registration(block_number, Web3.to_checksum_address(sender), params["_name"], params["_ipfsHash"])
+
+    def _traced_registrations(self, from_block: int, to_block: int) -> List[Registration]:
+        traces = self.web3.manager.request_blocking("trace_filter", [{
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block),
+            "toAddress": [self.contract.address],
+        }])
+        found = []
+        for trace in traces or []:
+            action = trace.get("action", {})
+            if trace.get("type") != "call" or action.get("callType") != "call" or trace.get("error"):
+                continue
+            # The caller of the contract, which differs from the transaction sender for smart wallets
+            registration = self._registration(int(trace["blockNumber"]), action["from"],
+                                              trace["transactionHash"], action["input"])
+            if registration is not None:
+                found.append(registration)
+        return found
+
+    def _scanned_registrations(self, from_block: int, to_block: int) -> List[Registration]:
+        contract_address = self.contract.address.lower()
+        found = []
+        for block_number in range(from_block, to_block + 1):
+            block = self.web3.eth.get_block(block_number, full_transactions=True)
+            for tx in block["transactions"]:
+                if not tx.get("to") or tx["to"].lower() != contract_address:
+                    continue
+                registration = self._registration(block_number, tx["from"], tx["hash"], tx["input"])
+                if registration is not None:
+                    found.append(registration)
+        return found
+
+    def registrations(self, from_block: int, to_block: int) -> List[Registration]:
+        """Registrations mined in the inclusive block range, in chain order"""
+        if self.use_traces is not False:
+            try:
+                found = self._traced_registrations(from_block, to_block)
+                self.use_traces = True
+                return found
+            except ValueError as e:
+                # Raised for JSON-RPC errors such as an unknown method
+                if self.use_traces:
+                    raise
+                logger.info(f"Node does not support trace_filter, reading blocks in full: {e}")
+                self.use_traces = False
+        return self._scanned_registrations(from_block, to_block)
+
+
+class RegistrationSyncer:
+    """
+    Keeps a MatchingIndex in step with on-chain freelancer registrations.
+
+    Each poll scans the blocks after the persisted checkpoint towards the confirmed
+    head, in ranges of ``max_blocks_per_poll`` and at most ``max_blocks_per_sync``
+    blocks per poll, fetches the profiles whose CID is new or changed and upserts
+    them into the index keyed by freelancer address, so the index is never rebuilt
+    from scratch. Without a checkpoint the scan starts at ``start_block``, which is
+    required so a node without trace_filter is never read in full from genesis.
+    """
+
+    def __init__(
+        self,
+        source: ContractRegistrationSource,
+        fetcher: IPFSFetcher,
+        index: Optional[MatchingIndex] = None,
+        checkpoint_path: Optional[Path] = None,
+        start_block: Optional[int] = None,
+        confirmations: int = 2,
+        max_blocks_per_poll: int = 500,
+        max_blocks_per_sync: int = 50_000,
+        poll_interval: float = 15.0,
+        snapshot_path: Optional[Path] = None,
+        keep_text: bool = False,
+    ):
+        """
+        Args:
+            source: Where registrations are read from
+            fetcher: IPFS fetcher used for new or changed profiles
+            index: Index to keep up to date, a new one if not given
+            checkpoint_path: JSON file holding the last synced block and known CIDs
+            start_block: First block to scan when there is no checkpoint yet, the block
+                the marketplace was deployed in; syncing without either raises ValueError
+            confirmations: Blocks to stay behind the head so reorgs are not indexed
+            max_blocks_per_poll: Blocks scanned per request
+            max_blocks_per_sync: Blocks scanned by one sync_once call; a longer catch-up
+                continues on the following calls
+            poll_interval: Seconds between polls of the background thread
+            snapshot_path: If given, the index is restored from this snapshot when it
+                matches the checkpoint and re-written after every complete sync
+            keep_text: Keep each profile's bio and portfolio text in a new index, for
+                embedding it
+        """
+        self.source = source
+        self.fetcher = fetcher
+        self.keep_text = keep_text
+        self.index = index if index is not None else MatchingIndex(keep_text=keep_text)
+        self.checkpoint_path = Path(checkpoint_path) if checkpoint_path else DEFAULT_CHECKPOINT_PATH
+        self.confirmations = confirmations
+        self.max_blocks_per_poll = max_blocks_per_poll
+        self.max_blocks_per_sync = max_blocks_per_sync
+        self.poll_interval = poll_interval
+
+        self.next_block: Optional[int] = start_block
+        # Confirmed head seen by the last poll
+        self.head: Optional[int] = None
+        # address -> {"name", "ipfs_hash"} of the latest registration seen on-chain
+        self.freelancers: Dict[str, Dict[str, str]] = {}
+        # address -> CID currently held by the index
+        self.indexed: Dict[str, str] = {}
+        # Registrations whose profile could not be fetched on the last poll
+        self.pending = 0
+        self.snapshot_path = snapshot_path
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sync_lock = threading.Lock()
+        self._load_checkpoint()
+        if snapshot_path is not None and index is None:
+            self._restore_snapshot()
+
+    @property
+    def caught_up(self) -> bool:
+        """Whether the last poll scanned every block up to the confirmed head"""
+        return self.head is not None and self.next_block is not None and self.next_block > self.head
+
+    def _snapshot_metadata(self) -> Dict:
+        return {"contract": self.source.contract.address, "next_block": self.next_block, "texts": self.keep_text}
+
+    def _restore_snapshot(self) -> None:
+        try:
+            self.index = load_snapshot(self.snapshot_path, self._snapshot_metadata())
+        except SnapshotError as e:
+            logger.info(f"Rebuilding matching index: {e}")
+            return
+        # Snapshots are only written once every checkpointed registration is indexed
+        self.indexed = {address: entry["ipfs_hash"] for address, entry in self.freelancers.items()}
+
+    def _load_checkpoint(self) -> None:
+        if not self.checkpoint_path.exists():
+            return
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                checkpoint = json.load(f)
+            self.next_block = checkpoint["next_block"]
+            self.freelancers = checkpoint.get("freelancers", {})
+        except (OSError, json.JSONDecodeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.checkpoint_path}: {e}")
+
+    def _save_checkpoint(self) -> None:
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.checkpoint_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"next_block": self.next_block, "freelancers": self.freelancers}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _refresh_index(self) -> int:
+        stale = {
+            address: entry for address, entry in self.freelancers.items()
+            if self.indexed.get(address) != entry["ipfs_hash"]
+        }
+        if not stale:
+            self.pending = 0
+            return 0
+
+        profiles = asyncio.run(self.fetcher.fetch_many([entry["ipfs_hash"] for entry in stale.values()]))
+        updated = 0
+        pending = 0
+        for address, entry in stale.items():
+            profile = profiles.get(entry["ipfs_hash"])
+            if profile is None:
+                # Retried on the next poll
+                pending += 1
+                continue
+            profile = {**profile, "address": address, "name": profile.get("name") or entry["name"]}
+            self.index.upsert(address, profile)
+            self.indexed[address] = entry["ipfs_hash"]
+            updated += 1
+        self.pending = pending
+        return updated
+
+    def sync_once(self) -> int:
+        """
+        Scan up to max_blocks_per_sync blocks towards the confirmed head and bring the
+        index up to date with every registration seen so far.
+
+        Also loads every registration already recorded in the checkpoint that is not
+        in the index yet, which after a restart is served from the profile cache.
+
+        Returns:
+            Number of profiles added or replaced in the index
+
+        Raises:
+            ValueError: If there is neither a checkpoint nor a start block
+        """
+        with self._sync_lock:
+            if self.next_block is None:
+                raise ValueError("No registration checkpoint yet: pass the block the marketplace "
+                                 "was deployed in as start_block")
+            self.head = self.source.block_number() - self.confirmations
+            scanned = self.head >= self.next_block
+            last_block = min(self.head, self.next_block + self.max_blocks_per_sync - 1)
+            if self.head - self.next_block >= self.max_blocks_per_poll:
+                logger.info(f"Catching up on registrations from block {self.next_block} to {last_block} "
+                            f"of {self.head}")
+            while self.next_block <= last_block:
+                to_block = min(last_block, self.next_block + self.max_blocks_per_poll - 1)
+                for registration in self.source.registrations(self.next_block, to_block):
+                    self.freelancers[registration.address] = {
+                        "name": registration.name,
+                        "ipfs_hash": registration.ipfs_hash,
+                    }
+                # Checkpointed per range so an interrupted catch-up resumes where it stopped
+                self.next_block = to_block + 1
+                self._save_checkpoint()
+            updated = self._refresh_index()
+            if not self.caught_up:
+                logger.info(f"Registrations synced to block {self.next_block - 1}, "
+                            f"{self.head - self.next_block + 1} blocks behind the head")
+            if self.snapshot_path is not None and (updated or scanned) and not self.pending:
+                write_snapshot(self.index, self.snapshot_path, self._snapshot_metadata())
+            return updated
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                logger.error(f"Registration sync failed: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Start polling in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
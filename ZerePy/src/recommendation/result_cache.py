@@ -0,0 +1,83 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from src.recommendation.profile_table import REQUIREMENT_PREDICATES
+from src.recommendation.ranking import DEFAULT_TOP_K
+from src.recommendation.skill_vocabulary import SkillVocabulary, normalize_skill
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+def normalize_requirement(requirement: Dict, vocabulary: SkillVocabulary) -> Dict:
+    """
+    Canonical form of a requirement for use as a cache key.
+
+    Skills are resolved to their canonical names, de-duplicated and sorted, numeric
+    bounds are floats and unset fields are left out, so requirements that rank the
+    same way normalise to the same dictionary.
+    """
+    normalized: Dict[str, Any] = {}
+    for key in ("required_skills", "preferred_skills"):
+        skills = {normalize_skill(vocabulary.canonical(skill)) for skill in requirement.get(key) or []}
+        if skills:
+            normalized[key] = sorted(skills)
+    for key in REQUIREMENT_PREDICATES:
+        if requirement.get(key) is not None:
+            normalized[key] = float(requirement[key])
+    normalized["top_k"] = int(requirement.get("top_k", DEFAULT_TOP_K))
+    if requirement.get("ranking_weights"):
+        normalized["ranking_weights"] = {name: float(weight)
+                                         for name, weight in sorted(requirement["ranking_weights"].items())}
+    return normalized
+
+
+def requirement_hash(requirement: Dict, vocabulary: SkillVocabulary) -> str:
+    """SHA-256 of the normalised requirement"""
+    encoded = json.dumps(normalize_requirement(requirement, vocabulary), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of results keyed by (key, index version).
+
+    Entries are never invalidated explicitly: once the index changes its version
+    moves on, so old entries stop being hit and are evicted as new ones arrive.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, int], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get((key, version))
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((key, version))
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        with self._lock:
+            self._entries[(key, version)] = value
+            self._entries.move_to_end((key, version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
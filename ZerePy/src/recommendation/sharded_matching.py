@@ -0,0 +1,218 @@
+import heapq
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.recommendation.matching_index import MatchingIndex
+from src.recommendation.profile import Profile
+from src.recommendation.profile_table import REQUIREMENT_PREDICATES, ProfileTable
+from src.recommendation.ranking import DEFAULT_TOP_K, RankingEngine, top_k_indices
+from src.recommendation.skill_extractor import expand_requirement
+from src.recommendation.skill_vocabulary import WORD_BITS, match_packed, normalize_skill, pack_masks
+
+logger = logging.getLogger("recommendation.sharded_matching")
+
+# name -> (byte offset, shape, dtype) of each array inside the shared block
+Layout = Dict[str, Tuple[int, Tuple[int, ...], str]]
+
+# Shared block attached by this worker process, replaced when the coordinator republishes
+_attached: Dict[str, object] = {}
+
+
+def _views(buffer, layout: Layout) -> Dict[str, np.ndarray]:
+    return {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+        for name, (offset, shape, dtype) in layout.items()
+    }
+
+
+def _attach(block_name: str, layout: Layout) -> Dict[str, np.ndarray]:
+    """Views over the published columns, attaching the shared block on first use"""
+    if _attached.get("name") != block_name:
+        old = _attached.get("block")
+        _attached.clear()
+        if old is not None:
+            old.close()
+        try:
+            # Tracking would make this process unlink a block the coordinator owns
+            block = shared_memory.SharedMemory(name=block_name, track=False)
+        except TypeError:
+            # Before Python 3.13 pool workers share the coordinator's resource tracker instead
+            block = shared_memory.SharedMemory(name=block_name)
+        _attached.update(name=block_name, block=block, views=_views(block.buf, layout))
+    return _attached["views"]
+
+
+def _shard_rows(block_name: str, layout: Layout, start: int, stop: int, query: Dict) -> np.ndarray:
+    views = _attach(block_name, layout)
+    columns = {name: views[name][start:stop] for name in ProfileTable.COLUMNS}
+    table = ProfileTable(range(stop - start), columns)
+    mask = table.mask(query["requirement"])
+    if query["required_mask"]:
+        mask &= match_packed(views["skill_bits"][start:stop], query["required_mask"])
+    return np.flatnonzero(mask)
+
+
+def _shard_top_k(block_name: str, layout: Layout, start: int, stop: int, query: Dict) -> List[Tuple[float, int]]:
+    """
+    Local top-k of one shard.
+
+    Returns:
+        List of (score, row id) tuples, best first, with row ids of the whole index
+    """
+    rows = _shard_rows(block_name, layout, start, stop, query)
+    if not len(rows):
+        return []
+    views = _attach(block_name, layout)
+    columns = {name: views[name][start:stop][rows] for name in ProfileTable.COLUMNS}
+
+    bits = views["skill_bits"][start:stop][rows]
+    matches = np.zeros(len(rows))
+    for skill_id in query["wanted_ids"]:
+        word, bit = divmod(skill_id, WORD_BITS)
+        if word < bits.shape[1]:
+            matches += (bits[:, word] >> np.uint64(bit)) & np.uint64(1)
+    skill_scores = matches / query["wanted_total"] if query["wanted_total"] else np.ones(len(rows))
+
+    scores = RankingEngine(query["weights"]).score_columns(columns, skill_scores, query["requirement"])
+    best = top_k_indices(scores, query["top_k"])
+    return [(float(scores[i]), start + int(rows[i])) for i in best]
+
+
+class ShardedMatcher:
+    """
+    Ranks a MatchingIndex across worker processes.
+
+    The numeric columns and packed skill bitsets of the index are copied once into
+    a single shared memory block. Every worker maps that block instead of receiving
+    the data, so a query only sends the compiled requirement and a row range. Each
+    shard filters and scores its rows and returns a local top-k, and the
+    coordinator merges the shard results into the global top-k.
+
+    Results match MatchingIndex.rank, ties included: shards hold contiguous row
+    ranges and the merge breaks ties by row id.
+    """
+
+    def __init__(self, index: MatchingIndex, workers: Optional[int] = None, shards: Optional[int] = None,
+                 mp_context: Optional[multiprocessing.context.BaseContext] = None):
+        """
+        Args:
+            index: Matching index to rank; republished on the next query once it changes
+            workers: Worker processes, defaults to the CPU count
+            shards: Row ranges a query is split into, defaults to one per worker
+        """
+        self.index = index
+        self.workers = workers or os.cpu_count() or 1
+        self.shards = shards or self.workers
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context)
+        self._block: Optional[shared_memory.SharedMemory] = None
+        self._layout: Layout = {}
+        self._bounds: List[int] = []
+        self._profiles: List[Profile] = []
+        self.version: Optional[int] = None
+
+    def __enter__(self) -> "ShardedMatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def publish(self) -> None:
+        """Copy the index into a new shared block if it changed since the last publish"""
+        with self.index.lock:
+            if self.version == self.index.version and self._block is not None:
+                return
+            rows = len(self.index.profile_table)
+            arrays = dict(self.index.profile_table.columns)
+            arrays["skill_bits"] = pack_masks(self.index.skill_index.skill_masks, self.index.vocabulary.words)
+            layout: Layout = {}
+            offset = 0
+            for name, array in arrays.items():
+                # 64-byte alignment keeps every column on its own cache lines
+                offset = (offset + 63) // 64 * 64
+                layout[name] = (offset, array.shape, array.dtype.str)
+                offset += array.nbytes
+            # Columns are views of the table's buffers, so they are copied before the lock is released
+            block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+            for name, view in _views(block.buf, layout).items():
+                view[...] = arrays[name]
+            profiles = list(self.index.profiles)
+            version = self.index.version
+
+        old = self._block
+        self._block, self._layout, self._profiles, self.version = block, layout, profiles, version
+        self._bounds = [rows * shard // self.shards for shard in range(self.shards + 1)]
+        if old is not None:
+            # Workers still mapping the old block keep their mapping until they next attach
+            old.close()
+            old.unlink()
+        logger.info(f"Published {rows} profiles in {self.shards} shards ({offset / 1e6:.1f} MB)")
+
+    def _compile(self, requirement: Dict) -> Optional[Dict]:
+        """Resolve skills to ids in the coordinator, which owns the vocabulary"""
+        vocabulary = self.index.vocabulary
+        requirement = expand_requirement(requirement, vocabulary)
+        required_mask = vocabulary.encode(requirement.get("required_skills", []), add=False)
+        if required_mask is None:
+            # A required skill no profile has
+            return None
+        wanted = {
+            normalize_skill(vocabulary.canonical(skill))
+            for skill in requirement.get("required_skills", []) + requirement.get("preferred_skills", [])
+        }
+        wanted_ids = [vocabulary.lookup(skill) for skill in wanted]
+        return {
+            "requirement": {key: requirement[key] for key in REQUIREMENT_PREDICATES if requirement.get(key) is not None},
+            "required_mask": required_mask,
+            # Skills unknown to the vocabulary count towards the total but never match
+            "wanted_ids": [skill_id for skill_id in wanted_ids if skill_id is not None],
+            "wanted_total": len(wanted),
+            "weights": requirement.get("ranking_weights"),
+            "top_k": int(requirement.get("top_k", DEFAULT_TOP_K)),
+        }
+
+    def _map(self, function, query: Dict) -> List:
+        futures = [
+            self._executor.submit(function, self._block.name, self._layout, start, stop, query)
+            for start, stop in zip(self._bounds, self._bounds[1:]) if stop > start
+        ]
+        return [future.result() for future in futures]
+
+    def rank_rows(self, requirement: Dict) -> List[Tuple[int, float]]:
+        """
+        Best ``requirement["top_k"]`` rows that satisfy a requirement.
+
+        Returns:
+            List of (row id, score) tuples, best first
+        """
+        self.publish()
+        with self.index.lock:
+            query = self._compile(requirement)
+        if query is None or query["top_k"] <= 0:
+            return []
+        shard_results = self._map(_shard_top_k, query)
+        # Each shard list is sorted by score descending, then row ascending
+        merged = heapq.merge(*shard_results, key=lambda item: (-item[0], item[1]))
+        return [(row, score) for score, row in list(merged)[:query["top_k"]]]
+
+    def rank(self, requirement: Dict) -> List[Tuple[Profile, float]]:
+        """
+        Best ``requirement["top_k"]`` profiles that satisfy a requirement.
+
+        Returns:
+            List of (profile, score) tuples, best first
+        """
+        ranked = self.rank_rows(requirement)
+        return [(self._profiles[row], score) for row, score in ranked]
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
@@ -0,0 +1,197 @@
+import threading
+import weakref
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from src.recommendation.skill_vocabulary import SkillVocabulary, normalize_skill
+
+# Characters that continue a word, so a skill cannot start or end next to them
+WORD_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789#+")
+# Characters that join words ("node.js", "ci-cd", "ui/ux") but end a sentence when not followed by a word
+JOINER_CHARS = frozenset(".-/")
+
+# Free-text fields of the CV schema that describe a freelancer's skills
+PROFILE_TEXT_FIELDS = ("bio",)
+PORTFOLIO_TEXT_FIELDS = ("title", "description")
+
+
+def _starts_word(text: str, start: int) -> bool:
+    if start == 0:
+        return True
+    previous = text[start - 1]
+    if previous in WORD_CHARS:
+        return False
+    # "asp.net" does not mention ".net", but "(.net" and " .net" do
+    return previous not in JOINER_CHARS or start < 2 or text[start - 2] not in WORD_CHARS
+
+
+def _ends_word(text: str, end: int) -> bool:
+    if end == len(text):
+        return True
+    following = text[end]
+    if following in WORD_CHARS:
+        return False
+    # "react.js" is not a mention of "react", but "React." at the end of a sentence is
+    return following not in JOINER_CHARS or end + 1 == len(text) or text[end + 1] not in WORD_CHARS
+
+
+class SkillExtractor:
+    """
+    Aho-Corasick automaton over every spelling a skill vocabulary recognizes.
+
+    Text is scanned once, character by character, whatever the number of skills.
+    Overlapping mentions resolve to the leftmost and then longest one, so "smart
+    contract" wins over "contract" and "node.js" over "node", and a mention only
+    counts on word boundaries, so "ts" is not found in "its". Aliases resolve to
+    their canonical skill.
+    """
+
+    def __init__(self, vocabulary: SkillVocabulary):
+        self.vocabulary = vocabulary
+        self.revision = vocabulary.revision
+        # Trie as parallel lists: goto[node][char] -> node, fail[node] -> node,
+        # outputs[node] -> (length, phrase) of every phrase ending at the node
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, str]]] = [[]]
+        for phrase in vocabulary.phrases():
+            if phrase:
+                self._add(phrase)
+        self._link()
+
+    def _add(self, phrase: str) -> None:
+        node = 0
+        for char in phrase:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        self._outputs[node].append((len(phrase), phrase))
+
+    def _link(self) -> None:
+        """Breadth-first failure links; each node inherits the outputs of its failure node"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def mentions(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Non-overlapping skill mentions in text, in order.
+
+        Returns:
+            List of (start, end, phrase) tuples over the normalised text
+        """
+        text = normalize_skill(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = []
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, phrase in outputs[node]:
+                start = position + 1 - length
+                if _starts_word(text, start) and _ends_word(text, position + 1):
+                    found.append((start, position + 1, phrase))
+
+        # Leftmost, then longest, mentions win
+        found.sort(key=lambda mention: (mention[0], mention[0] - mention[1]))
+        mentions = []
+        covered = 0
+        for start, end, phrase in found:
+            if start >= covered:
+                mentions.append((start, end, phrase))
+                covered = end
+        return mentions
+
+    def extract(self, text: str) -> List[str]:
+        """
+        Canonical names of the skills mentioned in text, de-duplicated in order of first mention.
+
+        Read-only: skills are not interned, so extracting never invalidates the automaton.
+        """
+        keys = {}
+        for _, _, phrase in self.mentions(text):
+            keys.setdefault(self.vocabulary.normalize(phrase), phrase)
+        return [self.vocabulary.canonical(phrase) for phrase in keys.values()]
+
+
+_extractors: "weakref.WeakKeyDictionary[SkillVocabulary, SkillExtractor]" = weakref.WeakKeyDictionary()
+_extractors_lock = threading.Lock()
+
+
+def extractor_for(vocabulary: SkillVocabulary) -> SkillExtractor:
+    """
+    Compiled extractor of a vocabulary.
+
+    Automata are cached per vocabulary and only rebuilt once it recognizes new
+    spellings, i.e. new skills or aliases, since they were compiled.
+    """
+    with _extractors_lock:
+        extractor = _extractors.get(vocabulary)
+        if extractor is None or extractor.revision != vocabulary.revision:
+            extractor = SkillExtractor(vocabulary)
+            _extractors[vocabulary] = extractor
+        return extractor
+
+
+def profile_text(profile: Dict) -> str:
+    """Free text of a profile dict: its bio and the titles and descriptions of its portfolio"""
+    parts = [str(profile[field]) for field in PROFILE_TEXT_FIELDS if profile.get(field)]
+    for item in profile.get("portfolio") or []:
+        if isinstance(item, dict):
+            parts.extend(str(item[field]) for field in PORTFOLIO_TEXT_FIELDS if item.get(field))
+    return "\n".join(parts)
+
+
+def enrich_profiles(profiles: Iterable[Dict], vocabulary: SkillVocabulary) -> List[Dict]:
+    """
+    Add the skills mentioned in each profile's free text to its skill list.
+
+    The stated skills of all profiles are interned first, so a skill one freelancer
+    lists is found in another's bio. Profiles without free text are returned as is;
+    enriched ones are shallow copies.
+    """
+    profiles = list(profiles)
+    for profile in profiles:
+        if isinstance(profile, dict):
+            vocabulary.ids(profile.get("skills") or [])
+    extractor = extractor_for(vocabulary)
+
+    enriched = []
+    for profile in profiles:
+        text = profile_text(profile) if isinstance(profile, dict) else ""
+        if not text:
+            enriched.append(profile)
+            continue
+        skills = list(profile.get("skills") or [])
+        stated = {vocabulary.normalize(skill) for skill in skills}
+        skills.extend(skill for skill in extractor.extract(text) if vocabulary.normalize(skill) not in stated)
+        enriched.append({**profile, "skills": skills})
+    return enriched
+
+
+def expand_requirement(requirement: Dict, vocabulary: SkillVocabulary) -> Dict:
+    """
+    Requirement with required_skills read from its free text when it lists none.
+
+    A requirement holding only a "title" and/or "description" gets the skills those
+    mention as its required skills, as on-chain jobs do. Requirements that already
+    list required_skills are returned unchanged.
+    """
+    if requirement.get("required_skills") or not (requirement.get("title") or requirement.get("description")):
+        return requirement
+    text = f"{requirement.get('title') or ''}\n{requirement.get('description') or ''}"
+    return {**requirement, "required_skills": extractor_for(vocabulary).extract(text)}
@@ -0,0 +1,164 @@
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.recommendation.profile import skills_of
+from src.recommendation.skill_vocabulary import SkillVocabulary, ids_of, mask_of
+
+
+def intersect_postings(left: Sequence[int], right: Sequence[int]) -> Sequence[int]:
+    """
+    Intersect two sorted posting lists.
+
+    When one list is much shorter, each of its ids is located in the longer one by
+    binary search instead of walking both lists. Postings loaded from a snapshot are
+    NumPy arrays and are intersected with NumPy instead.
+    """
+    if len(left) > len(right):
+        left, right = right, left
+    if not len(left):
+        return []
+    if isinstance(left, np.ndarray) or isinstance(right, np.ndarray):
+        return np.intersect1d(left, right, assume_unique=True)
+
+    if len(left) * 8 < len(right):
+        result = []
+        lo = 0
+        for profile_id in left:
+            lo = bisect_left(right, profile_id, lo)
+            if lo == len(right):
+                break
+            if right[lo] == profile_id:
+                result.append(profile_id)
+        return result
+
+    result = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        if left[i] == right[j]:
+            result.append(left[i])
+            i += 1
+            j += 1
+        elif left[i] < right[j]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class SkillIndex:
+    """
+    Inverted index from interned skill id to a sorted posting list of profile ids.
+
+    Profile ids are positions in ``self.profiles`` and are handed out in increasing
+    order, so appending to a posting list keeps it sorted. Next to the postings every
+    profile's skill set is kept as a bitmask over the vocabulary, which turns a
+    required-skills test for a single profile into one AND-and-compare.
+    """
+
+    # Once the shortest posting list is this many times smaller than the next one,
+    # candidates are checked against their bitmask instead of intersecting lists
+    BITMASK_RATIO = 32
+
+    def __init__(self, profiles: Optional[Iterable[Dict]] = None,
+                 vocabulary: Optional[SkillVocabulary] = None):
+        self.vocabulary = vocabulary if vocabulary is not None else SkillVocabulary()
+        self.profiles: List[Dict] = []
+        self.skill_masks: List[int] = []
+        self.postings: Dict[int, List[int]] = {}
+        # Set when the structures above are read-only views loaded from a snapshot
+        self.frozen = False
+        if profiles is not None:
+            self.add_all(profiles)
+
+    def add(self, profile: Dict) -> int:
+        """
+        Add a profile to the index.
+
+        Returns:
+            The id assigned to the profile
+        """
+        if self.frozen:
+            self.thaw()
+        profile_id = len(self.profiles)
+        skill_ids = self.vocabulary.ids(skills_of(profile))
+        self.profiles.append(profile)
+        self.skill_masks.append(mask_of(skill_ids))
+        for skill_id in skill_ids:
+            self.postings.setdefault(skill_id, []).append(profile_id)
+        return profile_id
+
+    def add_all(self, profiles: Iterable[Dict]) -> None:
+        for profile in profiles:
+            self.add(profile)
+
+    def replace(self, profile_id: int, profile: Dict) -> None:
+        """Swap the profile stored under an id, moving it between posting lists in place"""
+        if self.frozen:
+            self.thaw()
+        old_ids = set(ids_of(self.skill_masks[profile_id]))
+        new_ids = set(self.vocabulary.ids(skills_of(profile)))
+        for skill_id in old_ids - new_ids:
+            posting = self.postings[skill_id]
+            del posting[bisect_left(posting, profile_id)]
+        for skill_id in new_ids - old_ids:
+            insort(self.postings.setdefault(skill_id, []), profile_id)
+        self.profiles[profile_id] = profile
+        self.skill_masks[profile_id] = mask_of(new_ids)
+
+    def thaw(self) -> None:
+        """Copy snapshot-backed structures into plain lists so the index can be modified"""
+        self.profiles = list(self.profiles)
+        self.skill_masks = list(self.skill_masks)
+        self.postings = {skill_id: [int(profile_id) for profile_id in posting]
+                         for skill_id, posting in self.postings.items()}
+        self.frozen = False
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def posting(self, skill: str) -> List[int]:
+        """Sorted ids of the profiles that have a skill, in any spelling"""
+        skill_id = self.vocabulary.lookup(skill)
+        return self.postings.get(skill_id, []) if skill_id is not None else []
+
+    def required_mask(self, required_skills: Iterable[str]) -> Optional[int]:
+        """Bitmask of the required skills, or None if one of them is unknown to the index"""
+        return self.vocabulary.encode(required_skills, add=False)
+
+    def has_skills(self, profile_id: int, required_mask: int) -> bool:
+        return self.skill_masks[profile_id] & required_mask == required_mask
+
+    def candidates(self, required_skills: Iterable[str]) -> List[int]:
+        """
+        Ids of profiles that have every required skill.
+
+        Posting lists are intersected smallest-first so the working set only shrinks.
+        """
+        skill_ids = self.vocabulary.ids(required_skills, add=False)
+        if skill_ids is None:
+            return []
+        if not skill_ids:
+            return list(range(len(self.profiles)))
+
+        postings = []
+        for skill_id in skill_ids:
+            posting = self.postings.get(skill_id)
+            if posting is None or not len(posting):
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        required_mask = mask_of(skill_ids)
+
+        result = postings[0]
+        for posting in postings[1:]:
+            if len(result) * self.BITMASK_RATIO < len(posting):
+                return [
+                    profile_id for profile_id in result
+                    if self.skill_masks[profile_id] & required_mask == required_mask
+                ]
+            result = intersect_postings(result, posting)
+            if not len(result):
+                break
+        return list(result)
@@ -0,0 +1,214 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from src.recommendation.profile import skills_of
+
+# alias (normalised) -> canonical skill name
+DEFAULT_SKILL_ALIASES = {
+    "react.js": "React",
+    "reactjs": "React",
+    "react js": "React",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "node js": "Node.js",
+    "vue": "Vue.js",
+    "vuejs": "Vue.js",
+    "angularjs": "Angular",
+    "ts": "TypeScript",
+    "js": "JavaScript",
+    "ecmascript": "JavaScript",
+    "postgres": "PostgreSQL",
+    "postgresql": "PostgreSQL",
+    "mongo": "MongoDB",
+    "k8s": "Kubernetes",
+    "amazon web services": "AWS",
+    "golang": "Go",
+    "web3": "Web3.js",
+    "web3js": "Web3.js",
+    "smart contract": "Smart Contracts",
+    "ml": "Machine Learning",
+    "artificial intelligence": "AI",
+    "ui/ux": "UI/UX Design",
+    "ux/ui": "UI/UX Design",
+    "ci-cd": "CI/CD",
+    "express.js": "Express",
+    "expressjs": "Express",
+}
+
+WORD_BITS = 64
+
+
+def normalize_skill(skill: str) -> str:
+    """Canonical form used for skill comparisons: lower-cased with collapsed whitespace"""
+    return " ".join(str(skill).lower().split())
+
+
+def mask_of(skill_ids: Iterable[int]) -> int:
+    mask = 0
+    for skill_id in skill_ids:
+        mask |= 1 << skill_id
+    return mask
+
+
+def ids_of(mask: int) -> List[int]:
+    """Skill ids set in a bitmask, lowest first"""
+    skill_ids = []
+    while mask:
+        lowest = mask & -mask
+        skill_ids.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return skill_ids
+
+
+class SkillVocabulary:
+    """
+    Interns canonical skill names to dense integer ids.
+
+    Aliases such as "react.js" resolve to the id of their canonical name, so a
+    profile's skill set can be held as an integer bitmask where bit ``i`` is set
+    when the profile has skill ``i``.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._aliases: Dict[str, str] = {}
+        # normalised canonical name -> display name
+        self._display: Dict[str, str] = {}
+        # Bumped whenever a spelling the vocabulary recognizes is added, so structures
+        # derived from phrases() know to rebuild; interning an alias target is not one
+        self.revision = 0
+        for alias, canonical in (DEFAULT_SKILL_ALIASES if aliases is None else aliases).items():
+            self.add_alias(alias, canonical)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add_alias(self, alias: str, canonical: str) -> None:
+        """Make ``alias`` resolve to the same id as ``canonical``"""
+        alias, target = normalize_skill(alias), normalize_skill(canonical)
+        if self._aliases.get(alias) == target:
+            return
+        self._aliases[alias] = target
+        self._display.setdefault(target, str(canonical).strip())
+        self.revision += 1
+
+    def _key(self, skill: str) -> str:
+        key = normalize_skill(skill)
+        return self._aliases.get(key, key)
+
+    def normalize(self, skill: str) -> str:
+        """Normalised canonical key of a skill, resolving aliases without interning it"""
+        return self._key(skill)
+
+    def intern(self, skill: str) -> int:
+        """
+        Id of a skill, assigning a new one if the skill has not been seen.
+
+        The first spelling seen for a skill becomes its display name, unless the
+        skill is the target of an alias.
+        """
+        key = self._key(skill)
+        skill_id = self._ids.get(key)
+        if skill_id is None:
+            skill_id = len(self.names)
+            self._ids[key] = skill_id
+            self.names.append(self._display.get(key, str(skill).strip()))
+            if key not in self._display:
+                self.revision += 1
+        return skill_id
+
+    def lookup(self, skill: str) -> Optional[int]:
+        """Id of a known skill or None"""
+        return self._ids.get(self._key(skill))
+
+    def recognizes(self, skill: str) -> bool:
+        """Whether a skill has an id or is the canonical name of a configured alias"""
+        key = self._key(skill)
+        return key in self._ids or key in self._display
+
+    def phrases(self) -> Set[str]:
+        """Every normalised spelling the vocabulary recognizes: skills, alias targets and aliases"""
+        return set(self._ids) | set(self._display) | set(self._aliases)
+
+    def canonical(self, skill: str) -> str:
+        """Canonical display name of a skill, e.g. "react.js" -> "React", without interning it"""
+        skill_id = self.lookup(skill)
+        if skill_id is not None:
+            return self.names[skill_id]
+        return self._display.get(self._key(skill), str(skill).strip())
+
+    def ids(self, skills: Iterable[str], add: bool = True) -> Optional[List[int]]:
+        """
+        Sorted, de-duplicated ids of a skill list.
+
+        Args:
+            skills: Skill names in any spelling
+            add: Intern unseen skills; if False an unknown skill makes the result None
+
+        Returns:
+            List of skill ids, or None if add is False and a skill is unknown
+        """
+        skill_ids = set()
+        for skill in skills:
+            skill_id = self.intern(skill) if add else self.lookup(skill)
+            if skill_id is None:
+                return None
+            skill_ids.add(skill_id)
+        return sorted(skill_ids)
+
+    def encode(self, skills: Iterable[str], add: bool = True) -> Optional[int]:
+        """
+        Encode a skill list as an integer bitmask.
+
+        Returns:
+            Bitmask of skill ids, or None if add is False and a skill is unknown
+        """
+        skill_ids = self.ids(skills, add)
+        return None if skill_ids is None else mask_of(skill_ids)
+
+    def decode(self, mask: int) -> List[str]:
+        """Canonical names of the skills set in a bitmask"""
+        return [self.names[skill_id] for skill_id in ids_of(mask)]
+
+    def encode_profile(self, profile: Dict) -> int:
+        """Bitmask of a profile's skills; sample_data and CV profiles both list them under "skills" """
+        return self.encode(skills_of(profile))
+
+    @property
+    def words(self) -> int:
+        """Number of 64-bit words needed to hold a bitmask over the whole vocabulary"""
+        return max(1, (len(self.names) + WORD_BITS - 1) // WORD_BITS)
+
+
+def pack_masks(masks: Iterable[int], words: int) -> np.ndarray:
+    """
+    Pack integer bitmasks into a (len(masks), words) uint64 array.
+
+    Word ``w`` of a row holds skill ids ``64 * w`` to ``64 * w + 63``.
+    """
+    masks = list(masks)
+    packed = np.zeros((len(masks), words), dtype=np.uint64)
+    low_bits = (1 << WORD_BITS) - 1
+    for word in range(words):
+        shift = word * WORD_BITS
+        packed[:, word] = np.fromiter(
+            ((mask >> shift) & low_bits for mask in masks), dtype=np.uint64, count=len(masks)
+        )
+    return packed
+
+
+def match_packed(packed: np.ndarray, required_mask: int) -> np.ndarray:
+    """
+    Rows of a packed bitset matrix that contain every bit of ``required_mask``.
+
+    Returns:
+        Boolean array with one entry per row
+    """
+    words = packed.shape[1]
+    if required_mask >> (words * WORD_BITS):
+        # A required skill lies beyond the packed width, so no row can have it
+        return np.zeros(len(packed), dtype=bool)
+    required = pack_masks([required_mask], words)[0]
+    return ((packed & required) == required).all(axis=1)
@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.recommendation.matching_index import MatchingIndex
+from src.recommendation.profile import Profile
+from src.recommendation.profile_table import ProfileTable
+from src.recommendation.skill_vocabulary import WORD_BITS, SkillVocabulary, pack_masks
+
+logger = logging.getLogger("recommendation.snapshot")
+
+DEFAULT_SNAPSHOT_PATH = Path(".cache") / "matching_index.snap"
+
+SNAPSHOT_MAGIC = b"AJSSNAP\x00"
+# Bump whenever the layout or the meaning of a section changes
+SNAPSHOT_VERSION = 2
+ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sQ")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, corrupt or was written by another version"""
+    pass
+
+
+class StringColumn(Sequence[str]):
+    """Read-only sequence of strings decoded on access from a UTF-8 blob and offsets"""
+
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return bytes(self.data[start:end]).decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self[row]
+
+    @staticmethod
+    def encode(values: Sequence[str]) -> Dict[str, np.ndarray]:
+        encoded = [str(value).encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return {"offsets": offsets, "data": np.frombuffer(b"".join(encoded), dtype=np.uint8)}
+
+
+class SnapshotProfiles(Sequence[Profile]):
+    """Profiles rebuilt on access from the string, skill and numeric sections"""
+
+    def __init__(self, ids: StringColumn, addresses: StringColumn, names: StringColumn,
+                 skills: StringColumn, skill_offsets: np.ndarray, columns: Dict[str, np.ndarray]):
+        """
+        Args:
+            ids: Profile ids, one per row
+            addresses: Wallet addresses, "" where unknown
+            names: Display names, "" where unknown
+            skills: Stated skills of every profile, concatenated
+            skill_offsets: Skills of row r are skills[skill_offsets[r]:skill_offsets[r + 1]]
+            columns: ProfileTable column name -> float64 values
+        """
+        self.ids = ids
+        self.addresses = addresses
+        self.names = names
+        self.skills = skills
+        self.skill_offsets = skill_offsets
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, row: int) -> Profile:
+        start, end = int(self.skill_offsets[row]), int(self.skill_offsets[row + 1])
+        return Profile(self.ids[row], self.addresses[row] or None, self.names[row] or None,
+                       skills=tuple(self.skills[position] for position in range(start, end)),
+                       **{name: float(values[row]) for name, values in self.columns.items()})
+
+
+class SnapshotSkillMasks(Sequence[int]):
+    """Integer skill bitmasks recovered from the packed uint64 rows"""
+
+    def __init__(self, skill_bits: np.ndarray):
+        self.skill_bits = skill_bits
+
+    def __len__(self) -> int:
+        return len(self.skill_bits)
+
+    def __getitem__(self, row: int) -> int:
+        mask = 0
+        for word, value in enumerate(self.skill_bits[row]):
+            mask |= int(value) << (word * WORD_BITS)
+        return mask
+
+
+def _sections(index: MatchingIndex) -> Dict[str, np.ndarray]:
+    skill_index = index.skill_index
+    table = index.profile_table
+    sections = {f"column.{name}": np.ascontiguousarray(values, dtype=np.float64)
+                for name, values in table.columns.items()}
+
+    sections["skill_bits"] = pack_masks(skill_index.skill_masks, index.vocabulary.words)
+
+    # Postings in CSR form: ids of skill s are posting_ids[posting_offsets[s]:posting_offsets[s + 1]]
+    lengths = [len(skill_index.postings.get(skill_id, ())) for skill_id in range(len(index.vocabulary))]
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    posting_ids = np.empty(int(offsets[-1]), dtype=np.int64)
+    for skill_id in range(len(index.vocabulary)):
+        posting_ids[offsets[skill_id]:offsets[skill_id + 1]] = skill_index.postings.get(skill_id, ())
+    sections["posting_offsets"] = offsets
+    sections["posting_ids"] = posting_ids
+
+    profiles = skill_index.profiles
+    # Stated skills in CSR form, so restored profiles keep their original spellings
+    skill_counts = [len(profile.skills) for profile in profiles]
+    skill_offsets = np.zeros(len(skill_counts) + 1, dtype=np.int64)
+    np.cumsum(skill_counts, out=skill_offsets[1:])
+    sections["skill_offsets"] = skill_offsets
+    strings = {
+        "ids": list(table.ids),
+        "addresses": [profile.address or "" for profile in profiles],
+        "names": [profile.name or "" for profile in profiles],
+        "keys": index.row_keys(),
+        "skills": [skill for profile in profiles for skill in profile.skills],
+    }
+    if index.texts is not None:
+        strings["texts"] = list(index.texts)
+    for name, values in strings.items():
+        for part, array in StringColumn.encode(values).items():
+            sections[f"{name}.{part}"] = array
+    return sections
+
+
+def write_snapshot(index: MatchingIndex, path: Optional[Path] = None, metadata: Optional[Dict] = None) -> Path:
+    """
+    Atomically write a snapshot of a matching index.
+
+    Layout: magic, header length, JSON header, then every section aligned to 64 bytes.
+    The header records the version, section offsets, a CRC32 of the section data, the
+    skill vocabulary and caller metadata used to detect stale snapshots.
+
+    Args:
+        index: Index to snapshot
+        path: Destination file
+        metadata: JSON-serialisable description of the source the index was built from
+
+    Returns:
+        Path of the written snapshot
+    """
+    path = Path(path) if path else DEFAULT_SNAPSHOT_PATH
+    with index.lock:
+        sections = _sections(index)
+        vocabulary = list(index.vocabulary.names)
+        rows = len(index)
+
+    layout = {}
+    offset = 0
+    checksum = 0
+    for name, array in sections.items():
+        offset = (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        checksum = zlib.crc32(array.tobytes(), checksum)
+        offset += array.nbytes
+
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "rows": rows,
+        "checksum": checksum,
+        "data_bytes": offset,
+        "vocabulary": vocabulary,
+        "metadata": metadata or {},
+        "sections": layout,
+    }).encode("utf-8")
+    data_start = (_PREFIX.size + len(header) + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(SNAPSHOT_MAGIC, len(header)))
+            f.write(header)
+            for name, array in sections.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def read_header(path: Path) -> Dict:
+    """
+    Read and validate the header of a snapshot.
+
+    Raises:
+        SnapshotError: If the file is missing, not a snapshot or of another version
+    """
+    try:
+        with open(path, "rb") as f:
+            magic, header_length = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != SNAPSHOT_MAGIC:
+                raise SnapshotError(f"{path} is not a matching index snapshot")
+            header = json.loads(f.read(header_length))
+    except (OSError, struct.error, json.JSONDecodeError) as e:
+        raise SnapshotError(f"Could not read snapshot {path}: {e}")
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Snapshot {path} has version {header.get('version')}, expected {SNAPSHOT_VERSION}")
+    header["data_start"] = (_PREFIX.size + header_length + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+    return header
+
+
+def load_snapshot(path: Optional[Path] = None, metadata: Optional[Dict] = None, verify: bool = True) -> MatchingIndex:
+    """
+    Memory-map a snapshot as a matching index without parsing any profile JSON.
+
+    Columns, bitsets and postings stay backed by the file (copy-on-write), so only
+    the pages a query touches are read. Modifying the loaded index first copies the
+    skill index into plain lists.
+
+    Args:
+        path: Snapshot file
+        metadata: If given, must equal the metadata stored with the snapshot
+        verify: Check the CRC32 of the section data
+
+    Raises:
+        SnapshotError: If the snapshot is missing, corrupt, of another version or stale
+    """
+    path = Path(path) if path else DEFAULT_SNAPSHOT_PATH
+    header = read_header(path)
+    if metadata is not None and header["metadata"] != metadata:
+        raise SnapshotError(f"Snapshot {path} is stale")
+
+    try:
+        data = np.memmap(path, dtype=np.uint8, mode="c", offset=header["data_start"], shape=(header["data_bytes"],))
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Could not map snapshot {path}: {e}")
+
+    if verify:
+        checksum = 0
+        for name, section in header["sections"].items():
+            nbytes = int(np.prod(section["shape"])) * np.dtype(section["dtype"]).itemsize
+            checksum = zlib.crc32(data[section["offset"]:section["offset"] + nbytes], checksum)
+        if checksum != header["checksum"]:
+            raise SnapshotError(f"Snapshot {path} failed its checksum")
+
+    def section(name: str) -> np.ndarray:
+        spec = header["sections"][name]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        start = spec["offset"]
+        return data[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    def strings(name: str) -> StringColumn:
+        return StringColumn(section(f"{name}.offsets"), section(f"{name}.data"))
+
+    vocabulary = SkillVocabulary()
+    for skill in header["vocabulary"]:
+        vocabulary.intern(skill)
+
+    index = MatchingIndex(vocabulary=vocabulary)
+    skill_bits = section("skill_bits")
+    offsets = section("posting_offsets")
+    posting_ids = section("posting_ids")
+
+    columns = {name: section(f"column.{name}") for name in ProfileTable.COLUMNS}
+    skill_index = index.skill_index
+    skill_index.profiles = SnapshotProfiles(strings("ids"), strings("addresses"), strings("names"),
+                                            strings("skills"), section("skill_offsets"), columns)
+    skill_index.skill_masks = SnapshotSkillMasks(skill_bits)
+    skill_index.postings = {
+        skill_id: posting_ids[offsets[skill_id]:offsets[skill_id + 1]]
+        for skill_id in range(len(offsets) - 1)
+    }
+    skill_index.frozen = True
+
+    index.profile_table = ProfileTable(strings("ids"), columns)
+    index._rows_by_key = None
+    index._row_keys = strings("keys")
+    if "texts.offsets" in header["sections"]:
+        index.texts = strings("texts")
+    return index
@@ -0,0 +1,294 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+logger = logging.getLogger("recommendation.transactions")
+
+DEFAULT_GAS_LIMIT = 2000000
+
+# Seconds to wait for a transaction to be mined, as web3's wait_for_transaction_receipt
+DEFAULT_RECEIPT_TIMEOUT = 120.0
+
+# Nodes reject a replacement unless it raises the fee by at least 10%
+MIN_FEE_BUMP = 1.125
+
+PENDING = "pending"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+DROPPED = "dropped"
+
+
+class PendingTransaction:
+    """
+    A submitted transaction and every replacement sent for it.
+
+    All replacements share one nonce, so exactly one of ``tx_hashes`` can be mined.
+    """
+
+    def __init__(self, key: str, nonce: int, tx: Dict, callback: Optional[Callable] = None):
+        self.key = key
+        self.nonce = nonce
+        self.tx = tx
+        self.callback = callback
+        self.tx_hashes: List[str] = []
+        self.status = PENDING
+        self.receipt = None
+        self.error: Optional[str] = None
+        self.sent_at = 0.0
+        self.replacements = 0
+        self._missing_receipts = 0
+        self._done = threading.Event()
+
+    @property
+    def tx_hash(self) -> Optional[str]:
+        """Hash of the mined transaction once there is a receipt, else of the latest one sent"""
+        if self.receipt is not None:
+            return Web3.to_hex(self.receipt["transactionHash"])
+        return self.tx_hashes[-1] if self.tx_hashes else None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the transaction is confirmed, failed or dropped; False on timeout"""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        return {
+            "key": self.key,
+            "status": self.status,
+            "nonce": self.nonce,
+            "transaction_hash": self.tx_hash,
+            "replacements": self.replacements,
+            "block_number": self.receipt["blockNumber"] if self.receipt is not None else None,
+            "error": self.error,
+        }
+
+
+class TransactionPipeline:
+    """
+    Sends transactions from one account back-to-back and tracks them in the background.
+
+    Nonces are handed out locally instead of asking the node before every send, so
+    submitting never waits for an earlier transaction to be mined. A background
+    thread polls the account's mined nonce and only fetches receipts for the
+    transactions it has passed; transactions still pending after ``replace_after``
+    seconds are re-sent with the same nonce and a higher gas price.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        private_key: str,
+        gas_limit: int = DEFAULT_GAS_LIMIT,
+        poll_interval: float = 2.0,
+        replace_after: float = 60.0,
+        fee_bump: float = MIN_FEE_BUMP,
+        max_replacements: int = 5,
+        gas_price_ttl: float = 15.0,
+    ):
+        """
+        Args:
+            web3: Web3 connection
+            private_key: Key of the sending account
+            gas_limit: Gas limit of every transaction
+            poll_interval: Seconds between receipt polls
+            replace_after: Seconds a transaction may stay pending before its fee is bumped
+            fee_bump: Factor the gas price is multiplied by on each replacement
+            max_replacements: Replacements sent for one transaction before giving up bumping
+            gas_price_ttl: Seconds the node's gas price is reused between submissions
+        """
+        self.web3 = web3
+        self.account = web3.eth.account.from_key(private_key)
+        self.address = self.account.address
+        self.gas_limit = gas_limit
+        self.poll_interval = poll_interval
+        self.replace_after = replace_after
+        self.fee_bump = max(fee_bump, MIN_FEE_BUMP)
+        self.max_replacements = max_replacements
+        self.gas_price_ttl = gas_price_ttl
+
+        self.transactions: Dict[str, PendingTransaction] = {}
+        self._pending: List[PendingTransaction] = []
+        self._next_nonce: Optional[int] = None
+        self._chain_id: Optional[int] = None
+        self._gas_price = 0
+        self._gas_price_at = 0.0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _current_gas_price(self) -> int:
+        now = time.monotonic()
+        if now - self._gas_price_at > self.gas_price_ttl:
+            self._gas_price = self.web3.eth.gas_price
+            self._gas_price_at = now
+        return self._gas_price
+
+    def _sync_nonce(self) -> None:
+        self._next_nonce = self.web3.eth.get_transaction_count(self.address, "pending")
+
+    def _send(self, pending: PendingTransaction) -> None:
+        signed_tx = self.account.sign_transaction(pending.tx)
+        tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        pending.tx_hashes.append(Web3.to_hex(tx_hash))
+        pending.sent_at = time.monotonic()
+
+    def submit(self, key: str, contract_function, callback: Optional[Callable] = None) -> PendingTransaction:
+        """
+        Sign and send a contract call without waiting for it to be mined.
+
+        Args:
+            key: Caller's identifier for the transaction, e.g. the job id
+            contract_function: Bound contract function, e.g.
+                contract.functions.storeAIRecommendations(job_id, addresses)
+            callback: Called from the tracking thread with the PendingTransaction
+                once it is confirmed, failed or dropped
+
+        Returns:
+            PendingTransaction to query or wait on
+
+        Raises:
+            Exception: The node's error if the transaction could not be sent; only a
+                nonce conflict is retried, once, after re-reading the account's nonce
+        """
+        with self._lock:
+            if self._next_nonce is None:
+                self._sync_nonce()
+                self._chain_id = self.web3.eth.chain_id
+            for attempt in range(2):
+                tx = contract_function.build_transaction({
+                    "from": self.address,
+                    "gas": self.gas_limit,
+                    "gasPrice": self._current_gas_price(),
+                    "nonce": self._next_nonce,
+                    "chainId": self._chain_id,
+                })
+                pending = PendingTransaction(key, self._next_nonce, tx, callback)
+                try:
+                    self._send(pending)
+                    break
+                except Exception as e:
+                    if attempt == 0 and "nonce" in str(e).lower():
+                        # Another sender used this account; pick up from the node's count
+                        self._sync_nonce()
+                        continue
+                    # Nothing was sent, so the nonce is still free for the next transaction
+                    raise
+            self.transactions[key] = pending
+            self._next_nonce += 1
+            self._pending.append(pending)
+        self._ensure_tracking()
+        return pending
+
+    def status(self, key: str) -> Optional[Dict]:
+        """Status of the transaction submitted under a key, or None if there is none"""
+        pending = self.transactions.get(key)
+        return pending.to_dict() if pending is not None else None
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted transaction is done; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for pending in list(self.transactions.values()):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not pending.wait(remaining):
+                return False
+        return True
+
+    def _finish(self, pending: PendingTransaction, status: str) -> None:
+        pending.status = status
+        pending._done.set()
+        if pending.callback is not None:
+            try:
+                pending.callback(pending)
+            except Exception as e:
+                logger.error(f"Transaction callback for {pending.key} failed: {e}")
+
+    def _receipt(self, pending: PendingTransaction):
+        for tx_hash in reversed(pending.tx_hashes):
+            try:
+                return self.web3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+        return None
+
+    def _replace(self, pending: PendingTransaction) -> None:
+        old_price = pending.tx["gasPrice"]
+        with self._lock:
+            new_price = max(int(old_price * self.fee_bump) + 1, self._current_gas_price())
+            pending.tx = {**pending.tx, "gasPrice": new_price}
+            try:
+                self._send(pending)
+            except Exception as e:
+                # Typically "already known" or "nonce too low" when the original was just mined
+                pending.tx = {**pending.tx, "gasPrice": old_price}
+                logger.warning(f"Could not replace transaction {pending.key}: {e}")
+                return
+        pending.replacements += 1
+        logger.info(f"Replaced stuck transaction {pending.key} (nonce {pending.nonce}) at gas price {new_price}")
+
+    def poll(self) -> int:
+        """
+        Check pending transactions once.
+
+        Returns:
+            Number of transactions that completed on this poll
+        """
+        with self._lock:
+            pending_list = list(self._pending)
+        if not pending_list:
+            return 0
+
+        mined_nonce = self.web3.eth.get_transaction_count(self.address, "latest")
+        finished = []
+        now = time.monotonic()
+        for pending in pending_list:
+            if pending.nonce >= mined_nonce:
+                if (now - pending.sent_at > self.replace_after
+                        and pending.replacements < self.max_replacements):
+                    self._replace(pending)
+                continue
+            receipt = self._receipt(pending)
+            if receipt is None:
+                # The nonce was used but none of our hashes has a receipt yet; nodes
+                # can lag behind each other, so only give up after a few polls
+                pending._missing_receipts += 1
+                if pending._missing_receipts >= 3:
+                    pending.error = "Nonce was used by a transaction that is not tracked here"
+                    finished.append((pending, DROPPED))
+                continue
+            pending.receipt = receipt
+            finished.append((pending, CONFIRMED if receipt["status"] == 1 else FAILED))
+
+        with self._lock:
+            done = {id(pending) for pending, _ in finished}
+            self._pending = [pending for pending in self._pending if id(pending) not in done]
+        for pending, status in finished:
+            self._finish(pending, status)
+        return len(finished)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Transaction tracking failed: {e}")
+            self._stop_event.wait(self.poll_interval)
+
+    def _ensure_tracking(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread; pending transactions stay pending"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
@@ -6,12 +6,55 @@ import logging
 import asyncio
 import signal
 import threading
+import json
+import os
 from pathlib import Path
+from web3 import Web3
 from src.cli import ZerePyCLI
+from src.recommendation.ipfs_fetcher import IPFSFetcher
+from src.recommendation.matching_index import MatchingIndex
+from src.recommendation.profile import as_profile
+from src.recommendation.profile_cache import ProfileCache
+from src.recommendation.registration_sync import ContractRegistrationSource, RegistrationSyncer
+from src.recommendation.result_cache import ResultCache, requirement_hash
+from src.recommendation.skill_extractor import expand_requirement
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("server/app")
 
+def profile_sources_from_env() -> List[Path]:
+    """Profile files or directories of JSON profiles listed in RECOMMENDATION_PROFILES, separated by os.pathsep"""
+    sources = os.getenv("RECOMMENDATION_PROFILES", "")
+    return [Path(source) for source in sources.split(os.pathsep) if source.strip()]
+
+def ann_candidates_from_env() -> bool:
+    """Whether RECOMMENDATION_ANN_CANDIDATES asks for approximate candidates of preferred-skill-only requirements"""
+    return os.getenv("RECOMMENDATION_ANN_CANDIDATES", "").strip().lower() in ("1", "true", "yes")
+
+def registration_syncer_from_env() -> Optional[RegistrationSyncer]:
+    """
+    Registration syncer of the marketplace in RECOMMENDATION_CONTRACT_ADDRESS, or None if unset.
+
+    Also reads RECOMMENDATION_RPC_URL, RECOMMENDATION_DEPLOY_BLOCK and
+    RECOMMENDATION_CONTRACT_ABI (contract_abi.json by default).
+    """
+    contract_address = os.getenv("RECOMMENDATION_CONTRACT_ADDRESS")
+    if not contract_address:
+        return None
+    rpc_url = os.getenv("RECOMMENDATION_RPC_URL")
+    deploy_block = os.getenv("RECOMMENDATION_DEPLOY_BLOCK")
+    if not rpc_url or not deploy_block:
+        raise ValueError("RECOMMENDATION_RPC_URL and RECOMMENDATION_DEPLOY_BLOCK are required with "
+                         "RECOMMENDATION_CONTRACT_ADDRESS")
+    with open(os.getenv("RECOMMENDATION_CONTRACT_ABI", "contract_abi.json"), "r") as f:
+        contract_abi = json.load(f)
+    web3 = Web3(Web3.HTTPProvider(rpc_url))
+    contract = web3.eth.contract(address=Web3.to_checksum_address(contract_address), abi=contract_abi)
+    # CVs describe much of what a freelancer can do in their bio and portfolio
+    return RegistrationSyncer(ContractRegistrationSource(web3, contract), IPFSFetcher(cache=ProfileCache()),
+                              index=MatchingIndex(enrich_skills=True, ann_candidates=ann_candidates_from_env()),
+                              start_block=int(deploy_block))
+
 class ActionRequest(BaseModel):
     """Request model for agent actions"""
     connection: str
@@ -23,13 +66,43 @@ class ConfigureRequest(BaseModel):
     connection: str
     params: Optional[Dict[str, Any]] = {}
 
+class RecommendationRequest(BaseModel):
+    """Request model for freelancer recommendations"""
+    title: Optional[str] = None
+    description: Optional[str] = None
+    required_skills: List[str] = []
+    preferred_skills: List[str] = []
+    min_experience: Optional[float] = None
+    max_hourly_rate: Optional[float] = None
+    min_rating: Optional[float] = None
+    min_completed_jobs: Optional[float] = None
+    min_availability_hours: Optional[float] = None
+    top_k: int = 10
+    ranking_weights: Optional[Dict[str, float]] = None
+
+class ProfilesRequest(BaseModel):
+    """Request model for adding or replacing freelancer profiles"""
+    profiles: List[Dict[str, Any]]
+
 class ServerState:
     """Simple state management for the server"""
-    def __init__(self):
+    def __init__(self, profile_sources: Optional[List[Path]] = None,
+                 registration_syncer: Optional[RegistrationSyncer] = None):
+        """
+        Args:
+            profile_sources: Profile files or directories loaded into the recommendation index
+            registration_syncer: Syncer whose index, kept up to date with on-chain
+                registrations, is used instead of profile_sources
+        """
         self.cli = ZerePyCLI()
+        self.profile_sources = list(profile_sources or [])
+        self.registration_syncer = registration_syncer
         self.agent_running = False
         self.agent_task = None
         self._stop_event = threading.Event()
+        self.matching_index = None
+        self.recommendation_cache = ResultCache()
+        self._index_lock = threading.Lock()
 
     def _run_agent_loop(self):
         """Run agent loop in a separate thread"""
@@ -73,10 +146,94 @@ class ServerState:
                 self.agent_task.join(timeout=5)
             self.agent_running = False
 
+    def load_matching_index(self, allow_empty: bool = False) -> MatchingIndex:
+        """
+        Build the long-lived recommendation index on first use.
+
+        With a registration syncer the index is its index, synced once here and then
+        kept up to date in the background; otherwise it is loaded from profile_sources.
+
+        Args:
+            allow_empty: Start from an empty index when there is no source, e.g. for
+                profiles added through the API
+
+        Raises:
+            ValueError: If no source is configured or none of them holds a profile
+        """
+        with self._index_lock:
+            if self.matching_index is not None:
+                return self.matching_index
+            if self.registration_syncer is not None:
+                self.registration_syncer.sync_once()
+                self.registration_syncer.start()
+                self.matching_index = self.registration_syncer.index
+                logger.info(f"Serving {len(self.matching_index)} registered freelancers")
+                return self.matching_index
+
+            # CVs describe much of what a freelancer can do in their bio and portfolio
+            index = MatchingIndex(enrich_skills=True, ann_candidates=ann_candidates_from_env())
+            profiles = []
+            for source in self.profile_sources:
+                files = sorted(source.glob("*.json")) if source.is_dir() else [source]
+                for path in files:
+                    if not path.exists():
+                        logger.warning(f"Profile source {path} does not exist")
+                        continue
+                    with open(path, "r") as f:
+                        data = json.load(f)
+                    # A file holds either a list of profiles or a single CV
+                    for position, profile in enumerate(data if isinstance(data, list) else [data]):
+                        profile.setdefault("id", path.stem if isinstance(data, dict) else f"{path.stem}-{position}")
+                        profiles.append(profile)
+            if not profiles and not allow_empty:
+                raise ValueError("No freelancer profiles found: set RECOMMENDATION_CONTRACT_ADDRESS to serve "
+                                 "registered freelancers, or RECOMMENDATION_PROFILES to profile files")
+            # Every stated skill is known before any bio is read, so a skill one CV lists is found in another's bio
+            for profile in profiles:
+                index.vocabulary.ids(profile.get("skills") or [])
+            for profile in profiles:
+                self.upsert_profile(index, profile)
+            logger.info(f"Loaded {len(index)} profiles into the recommendation index")
+            self.matching_index = index
+            return self.matching_index
+
+    @staticmethod
+    def upsert_profile(index: MatchingIndex, profile: Dict[str, Any]) -> int:
+        # Only read the key here: the index needs the dict itself to mine the bio and portfolio for skills
+        key = as_profile(profile).id
+        if not key:
+            raise ValueError("Profile needs an id or address")
+        return index.upsert(key, profile)
+
+    def recommend(self, requirement: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Rank the indexed profiles against a requirement, reusing cached results.
+
+        Results are cached by the normalised requirement and the index version, so a
+        repeated search is a dictionary lookup until a profile is added or replaced.
+        """
+        index = self.load_matching_index()
+        with index.lock:
+            # Skills named only in the description become part of the cache key
+            requirement = expand_requirement(requirement, index.vocabulary)
+            version = index.version
+            key = requirement_hash(requirement, index.vocabulary)
+            cached = self.recommendation_cache.get(key, version)
+            if cached is not None:
+                return {**cached, "cached": True}
+            ranked = index.rank(requirement)
+        result = {
+            "version": version,
+            "recommendations": [{"profile": profile.to_dict(), "score": score} for profile, score in ranked],
+        }
+        self.recommendation_cache.put(key, version, result)
+        return {**result, "cached": False}
+
 class ZerePyServer:
-    def __init__(self):
+    def __init__(self, profile_sources: Optional[List[Path]] = None,
+                 registration_syncer: Optional[RegistrationSyncer] = None):
         self.app = FastAPI(title="ZerePy Server")
-        self.state = ServerState()
+        self.state = ServerState(profile_sources, registration_syncer)
         self.setup_routes()
 
     def setup_routes(self):
@@ -116,16 +273,19 @@ class ZerePyServer:
                 raise HTTPException(status_code=400, detail=str(e))
 
         @self.app.get("/connections")
-        async def list_connections():
+        async def list_connections(refresh: bool = False):
             """List all available connections"""
             if not self.state.cli.agent:
                 raise HTTPException(status_code=400, detail="No agent loaded")
             
             try:
+                connection_manager = self.state.cli.agent.connection_manager
+                # Stale checks run in parallel in a worker thread
+                statuses = await asyncio.to_thread(connection_manager.connection_statuses, refresh)
                 connections = {}
-                for name, conn in self.state.cli.agent.connection_manager.connections.items():
+                for name, conn in connection_manager.connections.items():
                     connections[name] = {
-                        "configured": conn.is_configured(),
+                        "configured": statuses[name],
                         "is_llm_provider": conn.is_llm_provider
                     }
                 return {"connections": connections}
@@ -182,6 +342,7 @@ class ZerePyServer:
                     raise HTTPException(status_code=404, detail=f"Connection {name} not found")
                 
                 success = connection.configure(**config.params)
+                self.state.cli.agent.connection_manager.invalidate_health(name)
                 if success:
                     return {"status": "success", "message": f"Connection {name} configured successfully"}
                 else:
@@ -191,25 +352,62 @@ class ZerePyServer:
                 raise HTTPException(status_code=500, detail=str(e))
 
         @self.app.get("/connections/{name}/status")
-        async def connection_status(name: str):
+        async def connection_status(name: str, refresh: bool = False):
             """Get configuration status of a connection"""
             if not self.state.cli.agent:
                 raise HTTPException(status_code=400, detail="No agent loaded")
                 
             try:
-                connection = self.state.cli.agent.connection_manager.connections.get(name)
+                connection_manager = self.state.cli.agent.connection_manager
+                connection = connection_manager.connections.get(name)
                 if not connection:
                     raise HTTPException(status_code=404, detail=f"Connection {name} not found")
                     
+                configured = await asyncio.to_thread(connection_manager.is_configured, name, True, refresh)
                 return {
                     "name": name,
-                    "configured": connection.is_configured(verbose=True),
+                    "configured": configured,
                     "is_llm_provider": connection.is_llm_provider
                 }
                 
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
 
+        @self.app.post("/recommendations")
+        async def recommendations(request: RecommendationRequest):
+            """Rank indexed freelancers against a job requirement"""
+            requirement = request.model_dump(exclude_none=True)
+            try:
+                # The cache key needs the index lock, which a ranking or reload may hold, so
+                # hits and misses alike are answered off the event loop
+                result = await asyncio.to_thread(self.state.recommend, requirement)
+                return {"status": "success", **result}
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.post("/recommendations/profiles")
+        async def add_profiles(request: ProfilesRequest):
+            """Add or replace profiles in the recommendation index"""
+            try:
+                index = await asyncio.to_thread(self.state.load_matching_index, True)
+                rows = await asyncio.to_thread(
+                    lambda: [self.state.upsert_profile(index, profile) for profile in request.profiles]
+                )
+                return {"status": "success", "rows": rows, "version": index.version, "profiles": len(index)}
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+        @self.app.get("/recommendations/status")
+        async def recommendation_status():
+            """Size and version of the recommendation index and cache statistics"""
+            index = self.state.matching_index
+            return {
+                "loaded": index is not None,
+                "profiles": len(index) if index is not None else 0,
+                "version": index.version if index is not None else None,
+                "cache": self.state.recommendation_cache.stats(),
+            }
+
 def create_app():
-    server = ZerePyServer()
+    server = ZerePyServer(profile_sources_from_env(), registration_syncer_from_env())
     return server.app
\ No newline at end of file
@@ -28,9 +28,9 @@ class ZerePyClient:
         """Load a specific agent"""
         return self._make_request("POST", f"/agents/{agent_name}/load")
 
-    def list_connections(self) -> Dict[str, Any]:
-        """List available connections"""
-        return self._make_request("GET", "/connections")
+    def list_connections(self, refresh: bool = False) -> Dict[str, Any]:
+        """List available connections, re-checking cached statuses if refresh is set"""
+        return self._make_request("GET", "/connections", params={"refresh": refresh} if refresh else None)
 
     def perform_action(self, connection: str, action: str, params: Optional[List[str]] = None) -> Dict[str, Any]:
         """Execute an agent action"""
@@ -47,4 +47,12 @@ class ZerePyClient:
 
     def stop_agent(self) -> Dict[str, Any]:
         """Stop the agent loop"""
-        return self._make_request("POST", "/agent/stop")
\ No newline at end of file
+        return self._make_request("POST", "/agent/stop")
+
+    def get_recommendations(self, requirement: Dict[str, Any]) -> Dict[str, Any]:
+        """Rank indexed freelancers against a job requirement"""
+        return self._make_request("POST", "/recommendations", json=requirement)
+
+    def add_profiles(self, profiles: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add or replace freelancer profiles in the recommendation index"""
+        return self._make_request("POST", "/recommendations/profiles", json={"profiles": profiles})